@@ -23,7 +23,8 @@ open_jpeg_extension = Pybind11Extension(
     sources=[
         "src/uiucprescon/imagevalidate/glue.cpp",
         "src/uiucprescon/imagevalidate/openjp2wrap.cpp",
-        "src/uiucprescon/imagevalidate/opj_colorspace_checker.cpp"
+        "src/uiucprescon/imagevalidate/opj_colorspace_checker.cpp",
+        "src/uiucprescon/imagevalidate/opj_stream.cpp"
     ],
     language="c++",
     libraries=["openjp2"],
@@ -1,16 +1,34 @@
 """Validate images against a profile."""
 
+from typing import Any, TYPE_CHECKING
+
 from .issues import IssueCategory
 from .report import Report
-from .profile import Profile, available_profiles, get_profile, get_profile_classes
+from .profile import Profile, available_profiles, get_profile, \
+    get_profile_classes, invalidate_profile_registry, validate_against
 from . import profiles
 
+if TYPE_CHECKING:
+    from .dispatch import Dispatcher
+
 __all__ = [
     "Report",
     "Profile",
+    "Dispatcher",
     "profiles",
     "IssueCategory",
     "available_profiles",
     "get_profile",
-    "get_profile_classes"
+    "get_profile_classes",
+    "invalidate_profile_registry",
+    "validate_against",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """Import the dispatcher, and the format sniffing it needs, when used."""
+    if name == "Dispatcher":
+        # pylint: disable=import-outside-toplevel
+        from .dispatch import Dispatcher
+        return Dispatcher
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,8 @@
+"""Run the command line interface with python -m uiucprescon.imagevalidate."""
+
+import sys
+
+from uiucprescon.imagevalidate import cli
+
+if __name__ == "__main__":
+    sys.exit(cli.main())
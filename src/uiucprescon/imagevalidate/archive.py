@@ -0,0 +1,182 @@
+"""Validate the image files inside zip and tar archives without extracting.
+
+Members are read into memory and validated with AbsProfile.validate_buffer.
+The metadata library only reads files from disk, so the regions of each
+member that hold metadata are written to a sparse temporary file for it.
+Pixel data is never written out.
+Zip archives can be read at random so workers read and validate members in
+parallel. Tar archives, which may be compressed as a single stream, are read
+one member after another while workers validate the members already read.
+"""
+
+import functools
+import os
+import tarfile
+import time
+import zipfile
+from typing import Iterable, Iterator, Optional, Set, Tuple, Union
+
+from uiucprescon.imagevalidate import batch
+from uiucprescon.imagevalidate.profiles import AbsProfile
+from uiucprescon.imagevalidate.report import Report
+
+
+class ArchiveMemberError(Exception):
+    """A member of an archive could not be validated."""
+
+    def __init__(self, archive: str, member: str,
+                 error: BaseException) -> None:
+        """Describe the member that failed and why.
+
+        Args:
+            archive:
+                path to the archive
+            member:
+                name of the member inside the archive
+            error:
+                the exception raised while validating the member
+        """
+        super().__init__(f"{os.path.join(archive, member)}: {error}")
+        self.archive = archive
+        self.member = member
+        self.error = error
+
+
+def is_archive(path: str) -> bool:
+    """Check if a file is a zip or tar archive."""
+    return zipfile.is_zipfile(path) or tarfile.is_tarfile(path)
+
+
+def _matches(name: str, extensions: Set[str]) -> bool:
+    return os.path.splitext(name)[1].lower() in extensions
+
+
+def iter_tar_members(archive: str,
+                     extensions: Set[str]) -> Iterator[Tuple[str, bytes]]:
+    """Read the matching files of a tar archive in a single pass.
+
+    Args:
+        archive:
+            path to a tar archive, which may be compressed
+        extensions:
+            file extensions to read, including the leading dot
+
+    Yields:
+        Name and content of each matching file
+
+    """
+    with tarfile.open(archive, "r|*") as tar_file:
+        for member in tar_file:
+            if not member.isfile() or not _matches(member.name, extensions):
+                continue
+            member_file = tar_file.extractfile(member)
+            if member_file is not None:
+                yield member.name, member_file.read()
+
+
+def _validate_member(profile: AbsProfile, archive: str, member: str,
+                     data: bytes, fail_fast: bool = False) \
+        -> Union[Report, ArchiveMemberError]:
+    filename = os.path.join(archive, member)
+    start = time.perf_counter()
+    try:
+        if fail_fast:
+            report = profile.validate_buffer(data, filename, fail_fast=True)
+        else:
+            report = profile.validate_buffer(data, filename=filename)
+    except Exception as error:  # pylint: disable=broad-except
+        return ArchiveMemberError(archive, member, error)
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def _validate_zip_member(profile: AbsProfile, zip_file: zipfile.ZipFile,
+                         archive: str, member: str,
+                         fail_fast: bool = False) \
+        -> Union[Report, ArchiveMemberError]:
+    try:
+        data = zip_file.read(member)
+    except Exception as error:  # pylint: disable=broad-except
+        return ArchiveMemberError(archive, member, error)
+    return _validate_member(profile, archive, member, data, fail_fast)
+
+
+def _validate_tar_member(profile: AbsProfile, archive: str,
+                         member: Tuple[str, bytes],
+                         fail_fast: bool = False) \
+        -> Union[Report, ArchiveMemberError]:
+    name, data = member
+    return _validate_member(profile, archive, name, data, fail_fast)
+
+
+def validate_archive(profile: AbsProfile,
+                     archive: str,
+                     workers: Optional[int] = None,
+                     return_exceptions: bool = False,
+                     fail_fast: bool = False) \
+        -> Iterator[Union[Report, ArchiveMemberError]]:
+    """Validate the image files inside a zip or tar archive.
+
+    Only members with one of the valid extensions of the profile are
+    validated. No more than the number of workers are held in memory at
+    once.
+
+    Args:
+        profile:
+            profile to validate the members with
+        archive:
+            path to a zip or tar archive
+        workers:
+            number of members to validate at once. Defaults to the number of
+            CPUs.
+        return_exceptions:
+            yield an ArchiveMemberError for each member that could not be
+            validated instead of raising it
+        fail_fast:
+            stop validating each member at its first issue, see
+            AbsProfile.validate_snapshot
+
+    Yields:
+        Reports for each member in the order they finish. The filename of
+        each report is the path of the archive joined with the member name.
+
+    """
+    extensions = {
+        extension.lower() for extension in profile.valid_extensions
+    }
+    results: Iterable[Union[Report, ArchiveMemberError]]
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as zip_file:
+            members = [
+                info.filename for info in zip_file.infolist()
+                if not info.is_dir() and _matches(info.filename, extensions)
+            ]
+            results = batch.imap_unordered(
+                functools.partial(
+                    _validate_zip_member, profile, zip_file, archive,
+                    fail_fast=fail_fast
+                ),
+                members,
+                workers=workers
+            )
+            yield from _raise_or_return(results, return_exceptions)
+    elif tarfile.is_tarfile(archive):
+        results = batch.imap_unordered(
+            functools.partial(
+                _validate_tar_member, profile, archive, fail_fast=fail_fast
+            ),
+            iter_tar_members(archive, extensions),
+            workers=workers
+        )
+        yield from _raise_or_return(results, return_exceptions)
+    else:
+        raise ValueError(f"{archive} is not a zip or tar archive")
+
+
+def _raise_or_return(results: Iterable[Union[Report, ArchiveMemberError]],
+                     return_exceptions: bool) \
+        -> Iterator[Union[Report, ArchiveMemberError]]:
+    for result in results:
+        if isinstance(result, ArchiveMemberError) and not return_exceptions:
+            raise result from result.error
+        yield result
@@ -0,0 +1,158 @@
+"""Running validations concurrently."""
+
+import concurrent.futures
+import enum
+import itertools
+import os
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, \
+    Iterable, Iterator, Optional, Set, TypeVar, Union
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class _Sentinel(enum.Enum):
+    # Returned in place of an item once the items run out
+    EXHAUSTED = enum.auto()
+
+
+# Names of the executor classes in concurrent.futures. Looked up when used so
+# that the multiprocessing machinery is only imported if it is needed.
+EXECUTORS: Dict[str, str] = {
+    "thread": "ThreadPoolExecutor",
+    "process": "ProcessPoolExecutor",
+}
+
+
+def default_workers() -> int:
+    """Get the number of workers used when none is requested."""
+    return os.cpu_count() or 1
+
+
+def imap_unordered(function: Callable[[T], R],
+                   items: Iterable[T],
+                   workers: Optional[int] = None,
+                   executor: str = "thread",
+                   max_in_flight: Optional[int] = None) -> Iterator[R]:
+    """Apply a function to every item using a pool of workers.
+
+    Items are pulled from the iterable only as fast as results are consumed
+    so that no more than max_in_flight items are ever pending at once.
+
+    Args:
+        function:
+            callable to apply to each item. Must be picklable when using the
+            process executor.
+        items:
+            items to apply the function to. May be a lazy iterable.
+        workers:
+            number of workers in the pool. Defaults to the number of CPUs.
+        executor:
+            Either "thread" or "process"
+        max_in_flight:
+            limit of items submitted but not yet yielded. Defaults to the
+            number of workers.
+
+    Yields:
+        Results in the order they finish
+
+    """
+    try:
+        executor_type = getattr(concurrent.futures, EXECUTORS[executor])
+    except KeyError as error:
+        raise ValueError(
+            f"Unknown executor {executor}. "
+            f"Valid options are: {', '.join(EXECUTORS)}"
+        ) from error
+
+    workers = workers or default_workers()
+    limit = max(max_in_flight or workers, 1)
+    remaining = iter(items)
+
+    pool = executor_type(max_workers=workers)
+    pending: Set[concurrent.futures.Future] = set()
+    try:
+        for item in itertools.islice(remaining, limit):
+            pending.add(pool.submit(function, item))
+
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending,
+                return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                next_item = next(remaining, _Sentinel.EXHAUSTED)
+                if next_item is not _Sentinel.EXHAUSTED:
+                    pending.add(pool.submit(function, next_item))
+                yield future.result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+async def amap_unordered(function: Callable[[T], Awaitable[R]],
+                         items: Union[Iterable[T], AsyncIterable[T]],
+                         concurrency: Optional[int] = None,
+                         return_exceptions: bool = False) \
+        -> AsyncIterator[Union[R, BaseException]]:
+    """Await a coroutine function for every item, a limited number at once.
+
+    Items are pulled from the iterable only as fast as results are consumed.
+    Closing the generator cancels the calls that have not finished.
+
+    Args:
+        function:
+            coroutine function to call with each item
+        items:
+            items to call the function with. May be an async iterable.
+        concurrency:
+            limit of calls running at once. Defaults to the number of CPUs.
+        return_exceptions:
+            yield the exceptions raised by calls instead of raising them
+
+    Yields:
+        Results in the order they finish
+
+    """
+    # Only loaded by programs that use asyncio.
+    # pylint: disable=import-outside-toplevel
+    import asyncio
+
+    limit = max(concurrency or default_workers(), 1)
+    if isinstance(items, AsyncIterable):
+        remaining_async = aiter(items)
+
+        async def next_item() -> Union[T, _Sentinel]:
+            return await anext(remaining_async, _Sentinel.EXHAUSTED)
+    else:
+        remaining = iter(items)
+
+        async def next_item() -> Union[T, _Sentinel]:
+            return next(remaining, _Sentinel.EXHAUSTED)
+
+    pending: Set["asyncio.Future[R]"] = set()
+    try:
+        while len(pending) < limit:
+            item = await next_item()
+            if item is _Sentinel.EXHAUSTED:
+                break
+            pending.add(asyncio.ensure_future(function(item)))
+
+        while pending:
+            done, pending = await asyncio.wait(
+                pending,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                item = await next_item()
+                if item is not _Sentinel.EXHAUSTED:
+                    pending.add(asyncio.ensure_future(function(item)))
+                exception = task.exception() if return_exceptions else None
+                if exception is not None:
+                    yield exception
+                else:
+                    yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
@@ -0,0 +1,253 @@
+"""Persistent cache of validation results."""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from uiucprescon.imagevalidate.report import Report
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS reports (
+        path TEXT NOT NULL,
+        profile TEXT NOT NULL,
+        version TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        inode INTEGER NOT NULL,
+        content_hash TEXT,
+        report TEXT NOT NULL,
+        stored_size INTEGER NOT NULL,
+        last_used REAL NOT NULL,
+        PRIMARY KEY (path, profile, version)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS reports_last_used ON reports (last_used)",
+    "CREATE TABLE IF NOT EXISTS cache_size (total INTEGER NOT NULL)",
+    """
+    INSERT INTO cache_size (total)
+    SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM cache_size)
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reports_insert AFTER INSERT ON reports
+    BEGIN
+        UPDATE cache_size SET total = total + NEW.stored_size;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reports_update
+    AFTER UPDATE OF stored_size ON reports
+    BEGIN
+        UPDATE cache_size
+        SET total = total - OLD.stored_size + NEW.stored_size;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reports_delete AFTER DELETE ON reports
+    BEGIN
+        UPDATE cache_size SET total = total - OLD.stored_size;
+    END
+    """,
+]
+
+
+def package_version() -> str:
+    """Get the installed version of this package."""
+    # pylint: disable=import-outside-toplevel
+    import importlib.metadata
+    try:
+        return importlib.metadata.version("uiucprescon.imagevalidate")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def hash_file(file: str, chunk_size: int = 1024 * 1024) -> str:
+    """Calculate the sha256 hash of the content of a file."""
+    file_hash = hashlib.sha256()
+    with open(file, "rb") as file_handle:
+        for chunk in iter(lambda: file_handle.read(chunk_size), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+class ValidationCache:
+    """On-disk cache of reports for files that have not changed.
+
+    Entries are keyed on the path, size, modification time and inode of the
+    file, the cache key of the profile and the version of this package. A
+    cached report is only returned if all of these match, so files are not
+    opened at all unless content verification is requested.
+    """
+
+    def __init__(self,
+                 database: str,
+                 max_size: Optional[int] = None,
+                 verify_content: bool = False) -> None:
+        """Open or create a cache database.
+
+        Args:
+            database:
+                path to the SQLite database file
+            max_size:
+                limit, in bytes, of the stored reports. The least recently
+                used entries are evicted when the limit is passed.
+            verify_content:
+                also compare a sha256 hash of the content of the file before
+                using a cached report
+        """
+        self.database = database
+        self.max_size = max_size
+        self.verify_content = verify_content
+        self.version = package_version()
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Leave out the database connection when pickled."""
+        state = self.__dict__.copy()
+        state["_lock"] = None
+        state["_connection"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore a cache that was pickled, opening a new connection."""
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Connection to the cache database, opened when first needed."""
+        if self._connection is None:
+            connection = sqlite3.connect(
+                self.database,
+                timeout=30,
+                check_same_thread=False,
+                isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                connection.execute(statement)
+            self._connection = connection
+        return self._connection
+
+    def close(self) -> None:
+        """Close the connection to the cache database."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def get(self, file: str, profile_name: str,
+            file_stat: Optional[os.stat_result] = None) -> Optional[Report]:
+        """Locate a cached report for a file.
+
+        Args:
+            file:
+                path to an image file
+            profile_name:
+                cache key of the profile the file is validated against
+            file_stat:
+                status of the file, read now if not given
+
+        Returns:
+            The cached report or None if the file has changed since it was
+            stored or was never stored.
+
+        """
+        path = os.path.abspath(file)
+        if file_stat is None:
+            file_stat = os.stat(path)
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT size, mtime_ns, inode, content_hash, report "
+                "FROM reports WHERE path = ? AND profile = ? AND version = ?",
+                (path, profile_name, self.version)
+            ).fetchone()
+        if row is None:
+            return None
+
+        size, mtime_ns, inode, content_hash, data = row
+        if (size, mtime_ns, inode) != \
+                (file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino):
+            return None
+
+        if self.verify_content and content_hash != hash_file(path):
+            return None
+
+        with self._lock:
+            self.connection.execute(
+                "UPDATE reports SET last_used = ? "
+                "WHERE path = ? AND profile = ? AND version = ?",
+                (time.time(), path, profile_name, self.version)
+            )
+        report = Report.from_json(data)
+        report.filename = file
+        return report
+
+    def put(self, file: str, profile_name: str, report: Report,
+            file_stat: Optional[os.stat_result] = None) -> None:
+        """Store the report of a file.
+
+        Args:
+            file:
+                path to an image file
+            profile_name:
+                cache key of the profile the file was validated against
+            report:
+                results of the validation
+            file_stat:
+                status of the file taken before it was validated. If the
+                file changes while it is validated, the report is stored
+                under the old status and is not used again. Read now if not
+                given.
+        """
+        path = os.path.abspath(file)
+        if file_stat is None:
+            file_stat = os.stat(path)
+        content_hash = hash_file(path) if self.verify_content else None
+        data = report.to_json()
+        with self._lock:
+            self.connection.execute(
+                "INSERT INTO reports "
+                "(path, profile, version, size, mtime_ns, inode, "
+                "content_hash, report, stored_size, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (path, profile, version) DO UPDATE SET "
+                "size = excluded.size, "
+                "mtime_ns = excluded.mtime_ns, "
+                "inode = excluded.inode, "
+                "content_hash = excluded.content_hash, "
+                "report = excluded.report, "
+                "stored_size = excluded.stored_size, "
+                "last_used = excluded.last_used",
+                (
+                    path, profile_name, self.version,
+                    file_stat.st_size, file_stat.st_mtime_ns,
+                    file_stat.st_ino, content_hash, data, len(data),
+                    time.time()
+                )
+            )
+            if self.max_size is not None:
+                self._evict(self.max_size)
+
+    def size(self) -> int:
+        """Get the number of bytes used by the stored reports."""
+        with self._lock:
+            return self._size()
+
+    def _size(self) -> int:
+        return int(self.connection.execute(
+            "SELECT total FROM cache_size"
+        ).fetchone()[0])
+
+    def _evict(self, max_size: int) -> None:
+        while self._size() > max_size:
+            deleted = self.connection.execute(
+                "DELETE FROM reports WHERE rowid = ("
+                "SELECT rowid FROM reports ORDER BY last_used LIMIT 1)"
+            ).rowcount
+            if deleted == 0:
+                break
@@ -0,0 +1,310 @@
+"""Command line interface for validating images."""
+
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+from typing import Iterable, Iterator, List, Optional, Set, TextIO, Tuple, \
+    Union
+
+from uiucprescon import imagevalidate
+from uiucprescon.imagevalidate import batch
+from uiucprescon.imagevalidate.cache import ValidationCache
+from uiucprescon.imagevalidate.profiles import BUILTIN_PROFILES, declarative
+from uiucprescon.imagevalidate.summary import ValidationSummary
+
+VALID = "valid"
+INVALID = "invalid"
+ERROR = "error"
+AUTO = "auto"
+
+
+def get_arg_parser() -> argparse.ArgumentParser:
+    """Create the argument parser for the command line interface."""
+    parser = argparse.ArgumentParser(
+        prog="imagevalidate",
+        description="Validate the embedded metadata of image files against "
+                    "a profile."
+    )
+    parser.add_argument(
+        "profile",
+        nargs="?",
+        help="Name of the profile to validate against, or auto to pick "
+             "the profile for each file from its signature. "
+             "Use --list-profiles to see the options."
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        help="Files or directories to validate. Use - or leave empty to "
+             "read a list of files from stdin, one per line."
+    )
+    parser.add_argument(
+        "--profile-file",
+        metavar="FILE",
+        action="append",
+        default=[],
+        help="Load more profiles from a TOML or YAML definition file. "
+             "Can be given more than once."
+    )
+    parser.add_argument(
+        "--list-profiles",
+        action="store_true",
+        help="Print the available profiles and exit"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of files to validate at once. "
+             "Defaults to the number of CPUs."
+    )
+    parser.add_argument(
+        "--executor",
+        choices=sorted(batch.EXECUTORS),
+        default="thread",
+        help="Run validations in a pool of threads or processes"
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print each result as a line of JSON"
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="DATABASE",
+        default=None,
+        help="Reuse the results for files that have not changed since they "
+             "were last validated, stored in this SQLite database"
+    )
+    parser.add_argument(
+        "--header-only",
+        action="store_true",
+        help="Only read the parts of each file that hold metadata"
+    )
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Stop checking each file at its first issue. Only that issue "
+             "is reported."
+    )
+    parser.add_argument(
+        "--summary",
+        action="store_true",
+        help="Print totals of the issues found and the slowest files to "
+             "stderr when finished"
+    )
+    return parser
+
+
+def walk_files(root: str) -> Iterator[str]:
+    """Locate all files inside a directory, lazily.
+
+    Only one open directory handle per level of depth is kept so memory
+    use does not grow with the number of files.
+
+    Args:
+        root:
+            Directory to search
+
+    Yields:
+        Path to each file found
+
+    """
+    stack = [os.scandir(root)]
+    try:
+        while stack:
+            entry = next(stack[-1], None)
+            if entry is None:
+                stack.pop().close()
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(os.scandir(entry.path))
+            elif entry.is_file():
+                yield entry.path
+    finally:
+        for iterator in stack:
+            iterator.close()
+
+
+def locate_files(paths: Iterable[str],
+                 extensions: Set[str],
+                 stdin: TextIO) -> Iterator[str]:
+    """Expand the paths given by the user into files to validate.
+
+    Directories are searched for files that match the extensions. Files
+    named explicitly are always included.
+
+    Args:
+        paths:
+            Files, directories or "-" for a list of files read from stdin
+        extensions:
+            File extensions to look for, including the leading dot
+        stdin:
+            Stream to read a list of files from
+
+    Yields:
+        Paths to files
+
+    """
+    def matches(file_path: str) -> bool:
+        return os.path.splitext(file_path)[1].lower() in extensions
+
+    for path in paths:
+        if path == "-":
+            for line in stdin:
+                file_path = line.rstrip("\r\n")
+                if file_path:
+                    yield file_path
+        elif os.path.isdir(path):
+            yield from filter(matches, walk_files(path))
+        else:
+            yield path
+
+
+def validate_file(profile: Union[imagevalidate.Profile,
+                                 imagevalidate.Dispatcher],
+                  file: str) \
+        -> Tuple[str, Optional[imagevalidate.Report], Optional[str]]:
+    """Validate a file without letting a failure stop the rest of the run.
+
+    Args:
+        profile:
+            Profile or dispatcher to validate with
+        file:
+            Path to the file
+
+    Returns:
+        The path, the report if validation finished, and the reason if it
+        could not.
+
+    """
+    try:
+        return file, profile.validate(file), None
+    except Exception as error:  # pylint: disable=broad-except
+        return file, None, str(error) or error.__class__.__name__
+
+
+def timed_validate_file(profile: Union[imagevalidate.Profile,
+                                       imagevalidate.Dispatcher],
+                        file: str) \
+        -> Tuple[Tuple[str, Optional[imagevalidate.Report], Optional[str]],
+                 float]:
+    """Validate a file and measure how long it took."""
+    start = time.perf_counter()
+    result = validate_file(profile, file)
+    return result, time.perf_counter() - start
+
+
+def format_result(file: str,
+                  report: Optional[imagevalidate.Report],
+                  error: Optional[str]) -> str:
+    """Format the outcome of validating a file as a single line."""
+    if report is None:
+        return f"{ERROR}\t{file}\t{error}"
+    if report.valid:
+        return f"{VALID}\t{file}"
+    return f"{INVALID}\t{file}\t{' '.join(report.issues())}"
+
+
+def format_result_json(file: str,
+                       report: Optional[imagevalidate.Report],
+                       error: Optional[str]) -> str:
+    """Format the outcome of validating a file as a line of JSON."""
+    if report is None:
+        return json.dumps({"filename": file, "error": error})
+    return report.to_json()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the command line interface.
+
+    Args:
+        argv:
+            Command line arguments. Defaults to sys.argv
+
+    Returns:
+        Exit status. 0 if every file is valid, 1 if any file is invalid or
+        could not be validated.
+
+    """
+    parser = get_arg_parser()
+    args = parser.parse_args(argv)
+
+    file_profiles = dict()
+    for profile_file in args.profile_file:
+        try:
+            file_profiles.update(declarative.load_profiles(profile_file))
+        except (OSError, declarative.ProfileDefinitionError) as load_error:
+            parser.error(f"Unable to load {profile_file}: {load_error}")
+    available_profiles = \
+        imagevalidate.available_profiles().union(file_profiles)
+
+    if args.list_profiles:
+        for profile_name in sorted(available_profiles):
+            print(profile_name)
+        return 0
+
+    if args.profile is None:
+        parser.error("a profile is required")
+
+    if args.profile != AUTO and args.profile not in available_profiles:
+        parser.error(
+            f"Unknown profile \"{args.profile}\". Valid profiles are: "
+            f"{', '.join(sorted(available_profiles))}"
+        )
+
+    cache = ValidationCache(args.cache) if args.cache else None
+    validator: Union[imagevalidate.Profile, imagevalidate.Dispatcher]
+    if args.profile == AUTO:
+        validator = imagevalidate.Dispatcher(
+            [file_profile() for file_profile in file_profiles.values()] +
+            list(BUILTIN_PROFILES),
+            cache=cache,
+            header_only=args.header_only,
+            fail_fast=args.fail_fast
+        )
+        extensions = validator.valid_extensions
+    else:
+        if args.profile in file_profiles:
+            validation_profile = file_profiles[args.profile]()
+        else:
+            validation_profile = imagevalidate.get_profile(args.profile)
+        validator = imagevalidate.Profile(
+            validation_profile,
+            cache=cache,
+            header_only=args.header_only,
+            fail_fast=args.fail_fast
+        )
+        extensions = validation_profile.valid_extensions
+    files = locate_files(
+        args.paths or ["-"],
+        extensions={extension.lower() for extension in extensions},
+        stdin=sys.stdin
+    )
+
+    formatter = format_result_json if args.json else format_result
+    summary = ValidationSummary()
+    results = batch.imap_unordered(
+        functools.partial(timed_validate_file, validator),
+        files,
+        workers=args.workers,
+        executor=args.executor
+    )
+    for (file, report, error), seconds in results:
+        if report is None:
+            summary.add_error(file, seconds)
+        else:
+            summary.add(report, seconds)
+        print(formatter(file, report, error), flush=True)
+
+    if cache is not None:
+        cache.close()
+    if args.summary:
+        if args.json:
+            print(json.dumps(summary.summary()), file=sys.stderr)
+        else:
+            print(summary, file=sys.stderr)
+    return 0 if summary.valid == summary.files else 1
@@ -1,10 +1,12 @@
 """Common helper functions."""
 
 import abc
+import logging
+from typing import List, NamedTuple, Optional, Sequence, Tuple
 
-import py3exiv2bind
-import py3exiv2bind.core
-from uiucprescon.imagevalidate import openjp2wrap  # type: ignore
+from uiucprescon.imagevalidate.snapshot import MetadataSnapshot
+
+logger = logging.getLogger(__name__)
 
 
 class InvalidStrategy(Exception):
@@ -15,12 +17,12 @@ class AbsColorSpaceExtractor(metaclass=abc.ABCMeta):
     """Base class for extracting the color space from an image file."""
 
     @abc.abstractmethod
-    def check(self, image: str) -> str:
+    def check(self, image: MetadataSnapshot) -> str:
         """Check the color space of a given file.
 
         Args:
             image:
-                path to an image file
+                metadata snapshot of an image file
 
         Returns:
             color space name
@@ -40,12 +42,12 @@ class ExtractColorSpace:
         """
         self.strategy = strategy
 
-    def check(self, image: str) -> str:
+    def check(self, image: MetadataSnapshot) -> str:
         """Check the color space of a given file.
 
         Args:
             image:
-                path to an image file
+                metadata snapshot of an image file
 
         Returns:
             color space name
@@ -60,21 +62,19 @@ class ColorSpaceIccDeviceModelCheck(AbsColorSpaceExtractor):
     Useful for identifying sRGB.
     """
 
-    def check(self, image: str) -> str:
+    def check(self, image: MetadataSnapshot) -> str:
         """Check the color space of a given file.
 
         Args:
             image:
-                path to an image file
+                metadata snapshot of an image file
 
         Returns:
             color space name
 
         """
-        exiv_image = py3exiv2bind.Image(image)
-        try:
-            icc = exiv_image.icc()
-        except py3exiv2bind.core.NoICCError:
+        icc = image.icc
+        if icc is None:
             raise InvalidStrategy("Unable to get ICC profile.")
 
         device_model = icc.get('device_model')
@@ -87,23 +87,21 @@ class ColorSpaceIccDeviceModelCheck(AbsColorSpaceExtractor):
 class ColorSpaceIccPrefCcmCheck(AbsColorSpaceExtractor):
     """Extract color space from reading pref_ccm in the ICC profile header."""
 
-    def check(self, image: str) -> str:
+    def check(self, image: MetadataSnapshot) -> str:
         """Check the color space of a given file.
 
         Args:
             image:
-                path to an image file
+                metadata snapshot of an image file
 
         Returns:
             color space name
 
         """
-        exiv2_image = py3exiv2bind.Image(image)
-        try:
-            icc = exiv2_image.icc()
-        except py3exiv2bind.core.NoICCError as error:
+        icc = image.icc
+        if icc is None:
             raise InvalidStrategy("Unable to get ICC profile."
-                                  "Reason: {}".format(error))
+                                  "Reason: {}".format(image.icc_error))
 
         pref_ccm = icc.get("pref_ccm")
         if not pref_ccm or pref_ccm.value.decode("ascii").rstrip(' \0') == '':
@@ -114,15 +112,85 @@ class ColorSpaceIccPrefCcmCheck(AbsColorSpaceExtractor):
 class ColorSpaceOJPCheck(AbsColorSpaceExtractor):
     """Color space extractor using openjpeg library."""
 
-    def check(self, image: str) -> str:
+    def check(self, image: MetadataSnapshot) -> str:
         """Check the color space of a given file.
 
         Args:
             image:
-                path to an image file
+                metadata snapshot of an image file
 
         Returns:
             color space name
 
         """
-        return openjp2wrap.get_colorspace(image)
+        return image.codestream.color_space
+
+
+class StrategyFailure(NamedTuple):
+    """Reason a color space extractor could not be used on a file."""
+
+    strategy: str
+    reason: str
+
+
+class ColorSpaceResolution(NamedTuple):
+    """Outcome of trying a chain of color space extractors on a file."""
+
+    color_space: Optional[str]
+    strategy: Optional[str]
+    failures: Tuple[StrategyFailure, ...]
+
+
+class ColorSpaceStrategyChain:
+    """Try color space extractors in turn until one of them succeeds.
+
+    Strategies are given in order of priority and the first one that
+    succeeds decides the color space. The chain keeps no state between
+    files, so a report never depends on which files were validated before
+    it, and one chain can be shared by any number of threads.
+    """
+
+    def __init__(self,
+                 strategies: Sequence[AbsColorSpaceExtractor]) -> None:
+        """Set the strategies to try.
+
+        Args:
+            strategies:
+                Color space extractors, highest priority first
+        """
+        self.strategies = tuple(strategies)
+
+    def resolve(self, image: MetadataSnapshot) -> ColorSpaceResolution:
+        """Determine the color space of an image.
+
+        Args:
+            image:
+                metadata snapshot of an image file
+
+        Returns:
+            The color space, the strategy that found it and why each
+            strategy tried before it failed
+
+        """
+        failures: List[StrategyFailure] = []
+        for strategy in self.strategies:
+            try:
+                color_space = strategy.check(image)
+            except InvalidStrategy as error:
+                failure = StrategyFailure(type(strategy).__name__, str(error))
+                logger.debug(
+                    "Unable to determine color space of %s using %s. "
+                    "Reason given: %s",
+                    image.filename, failure.strategy, failure.reason,
+                    extra={
+                        "image_file": image.filename,
+                        "strategy": failure.strategy,
+                        "reason": failure.reason,
+                    }
+                )
+                failures.append(failure)
+                continue
+            return ColorSpaceResolution(
+                color_space, type(strategy).__name__, tuple(failures)
+            )
+        return ColorSpaceResolution(None, None, tuple(failures))
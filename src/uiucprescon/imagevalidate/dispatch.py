@@ -0,0 +1,151 @@
+"""Choose the profile for each file from the signature at its start.
+
+Only the first few bytes of a file are read to tell TIFF and JPEG 2000
+files apart, so files in formats that no profile supports are rejected
+before the metadata or OpenJPEG libraries open them. Files are matched by
+their content, not their names, so a misnamed file still goes to the
+profile for its format.
+"""
+
+import os
+from typing import Dict, Iterable, Iterator, Optional, Set, \
+    TYPE_CHECKING, Union
+
+from uiucprescon.imagevalidate import batch, header
+from uiucprescon.imagevalidate.profile import Profile, get_profile
+from uiucprescon.imagevalidate.profiles import AbsProfile, BUILTIN_PROFILES
+from uiucprescon.imagevalidate.report import Report
+
+if TYPE_CHECKING:
+    from uiucprescon.imagevalidate.cache import ValidationCache
+
+
+class UnsupportedFormat(ValueError):
+    """No profile of the dispatcher supports the format of a file."""
+
+
+class Dispatcher:
+    """Validate files with the profile that matches their format."""
+
+    def __init__(self,
+                 profiles: Optional[Iterable[Union[str, AbsProfile]]] = None,
+                 cache: Optional["ValidationCache"] = None,
+                 header_only: bool = False,
+                 fail_fast: bool = False) -> None:
+        """Pick a profile for each format.
+
+        A profile supports a format if its valid_extensions include an
+        extension of the format. If more than one profile supports a format
+        the first one is used.
+
+        Args:
+            profiles:
+                Names of profiles, as given to get_profile, or profile
+                instances. Defaults to the profiles included with this
+                package.
+            cache:
+                Optional cache to reuse the reports of files that have not
+                changed since they were last validated
+            header_only:
+                Only read the regions of files that hold metadata
+            fail_fast:
+                Stop validating each file at its first issue
+        """
+        if profiles is None:
+            profiles = list(BUILTIN_PROFILES)
+        self._validators: Dict[str, Profile] = dict()
+        self._profiles: Dict[str, AbsProfile] = dict()
+        for profile in profiles:
+            validation_profile = get_profile(profile) \
+                if isinstance(profile, str) else profile
+            extensions = {
+                extension.lower()
+                for extension in validation_profile.valid_extensions
+            }
+            for file_format, format_extensions in \
+                    header.FORMAT_EXTENSIONS.items():
+                if file_format in self._validators or \
+                        not extensions & format_extensions:
+                    continue
+                self._profiles[file_format] = validation_profile
+                self._validators[file_format] = Profile(
+                    validation_profile,
+                    cache=cache,
+                    header_only=header_only,
+                    fail_fast=fail_fast
+                )
+        if not self._validators:
+            raise ValueError(
+                "None of the profiles support TIFF or JPEG 2000 files"
+            )
+
+    @property
+    def valid_extensions(self) -> Set[str]:
+        """Get the file extensions of the formats that are supported."""
+        return set().union(*(
+            validation_profile.valid_extensions
+            for validation_profile in self._profiles.values()
+        ))
+
+    def profile_for(self, file: str) -> AbsProfile:
+        """Get the profile for a file, reading only its signature.
+
+        Args:
+            file:
+                Path to image file
+
+        Returns:
+            Profile for the format of the file
+
+        """
+        return self._profiles[self._format_of(file)]
+
+    def validate(self, file: str) -> Report:
+        """Validate a file with the profile for its format.
+
+        Args:
+            file:
+                Path to image file to validate
+
+        Returns:
+            Report on validity of the file
+
+        """
+        return self._validators[self._format_of(file)].validate(file)
+
+    def _format_of(self, file: str) -> str:
+        if not os.path.exists(file):
+            raise FileNotFoundError(f"Unable to locate {file}")
+        file_format = header.sniff_file(file)
+        if file_format is None or file_format not in self._validators:
+            raise UnsupportedFormat(
+                f"{file} is not in a supported format. Supported formats "
+                f"are: {', '.join(sorted(self._validators))}"
+            )
+        return file_format
+
+    def validate_many(self,
+                      files: Iterable[str],
+                      workers: Optional[int] = None,
+                      executor: str = "thread") -> Iterator[Report]:
+        """Validate many image files of any supported format concurrently.
+
+        Args:
+            files:
+                Paths to image files to validate
+            workers:
+                Number of files to validate at once. Defaults to the number
+                of CPUs.
+            executor:
+                Either "thread" or "process"
+
+        Yields:
+            Reports on the validity of the files in the order they finish
+
+        """
+        yield from batch.imap_unordered(
+            self.validate,
+            files,
+            workers=workers,
+            executor=executor
+        )
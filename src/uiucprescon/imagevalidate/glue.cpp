@@ -1,6 +1,7 @@
 #include "glue.h"
 #include "exceptions.h"
 #include "opj_colorspace_checker.h"
+#include "opj_stream.h"
 
 extern "C"{
 #include <openjpeg.h>
@@ -13,10 +14,10 @@ std::string open_jpeg_version(){
 }
 
 
-std::string color_space(const std::string &file_path) {
+std::string color_space(const std::string &file_path, bool decode) {
     opj_colorspace_checker checker(file_path);
     checker.setup();
-    return checker.read();
+    return checker.read(decode);
 }
 
 int bitdepth(const std::string &file_path){
@@ -26,11 +27,7 @@ int bitdepth(const std::string &file_path){
                 opj_destroy_codec(ptr);
             });
 
-    std::shared_ptr<opj_stream_t> l_stream(
-            opj_stream_create_default_file_stream(file_path.c_str(), 1),
-            [](opj_stream_t *ptr){
-                opj_stream_destroy(ptr);
-            });
+    std::shared_ptr<opj_stream_t> l_stream = create_file_stream(file_path);
 
     opj_image_t* image = nullptr;
     opj_read_header(l_stream.get(), l_codec.get(), &image);
@@ -40,4 +37,75 @@ int bitdepth(const std::string &file_path){
     const auto bitDepth = (int)image->comps->prec;
     opj_image_destroy(image);
     return bitDepth;
-}
\ No newline at end of file
+}
+
+static std::string progression_order_name(OPJ_PROG_ORDER order){
+    switch(order){
+        case OPJ_LRCP:
+            return "LRCP";
+        case OPJ_RLCP:
+            return "RLCP";
+        case OPJ_RPCL:
+            return "RPCL";
+        case OPJ_PCRL:
+            return "PCRL";
+        case OPJ_CPRL:
+            return "CPRL";
+        default:
+            return "Unknown";
+    }
+}
+
+static codestream_info probe_stream(opj_stream_t *stream, const std::string &name){
+    std::shared_ptr<opj_codec_t> l_codec(
+            opj_create_decompress(OPJ_CODEC_JP2),
+            [](opj_codec_t *ptr){
+                opj_destroy_codec(ptr);
+            });
+    if(!l_codec){
+        throw std::bad_alloc();
+    }
+
+    opj_image_t* image = nullptr;
+    if(!opj_read_header(stream, l_codec.get(), &image) || image == nullptr){
+        throw InvalidFileException(name, "Unable to read header");
+    }
+    std::shared_ptr<opj_image_t> l_image(
+            image,
+            [](opj_image_t *ptr){
+                opj_image_destroy(ptr);
+            });
+
+    codestream_info result;
+    result.color_space = opj_colorspace_checker::convert_enum_to_string(image->color_space);
+    result.num_components = image->numcomps;
+    result.width = image->x1 - image->x0;
+    result.height = image->y1 - image->y0;
+    for(OPJ_UINT32 i = 0; i < image->numcomps; ++i){
+        result.precision.push_back(image->comps[i].prec);
+    }
+
+    opj_codestream_info_v2_t *info = opj_get_cstr_info(l_codec.get());
+    if(info != nullptr){
+        result.tile_width = info->tdx;
+        result.tile_height = info->tdy;
+        result.tiles_x = info->tw;
+        result.tiles_y = info->th;
+        result.progression_order = progression_order_name(info->m_default_tile_info.prg);
+        if(info->m_default_tile_info.tccp_info != nullptr){
+            result.resolution_levels = info->m_default_tile_info.tccp_info[0].numresolutions;
+        }
+        opj_destroy_cstr_info(&info);
+    }
+    return result;
+}
+
+codestream_info probe(const std::string &file_path){
+    std::shared_ptr<opj_stream_t> l_stream = create_file_stream(file_path);
+    return probe_stream(l_stream.get(), file_path);
+}
+
+codestream_info probe_buffer(const unsigned char *data, std::size_t size){
+    std::shared_ptr<opj_stream_t> l_stream = create_memory_stream(data, size);
+    return probe_stream(l_stream.get(), "<buffer>");
+}
@@ -1,10 +1,28 @@
 #ifndef OPENJP2WRAP_H
 #define OPENJP2WRAP_H
 
+#include <cstddef>
 #include <string>
+#include <vector>
+
+struct codestream_info {
+    std::string color_space;
+    std::vector<unsigned int> precision;
+    unsigned int num_components = 0;
+    unsigned int width = 0;
+    unsigned int height = 0;
+    unsigned int tile_width = 0;
+    unsigned int tile_height = 0;
+    unsigned int tiles_x = 0;
+    unsigned int tiles_y = 0;
+    unsigned int resolution_levels = 0;
+    std::string progression_order;
+};
 
 std::string open_jpeg_version();
-std::string color_space(const std::string &file_path);
+std::string color_space(const std::string &file_path, bool decode = false);
 int bitdepth(const std::string &file_path);
+codestream_info probe(const std::string &file_path);
+codestream_info probe_buffer(const unsigned char *data, std::size_t size);
 
 #endif /*OPENJP2WRAP*/
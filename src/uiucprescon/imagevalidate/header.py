@@ -0,0 +1,278 @@
+"""Read only the metadata regions of TIFF and JPEG 2000 files.
+
+Pixel data is never read. For TIFF files only the chain of IFDs and the
+values they point to are read. For JPEG 2000 files the boxes are read up to
+the codestream, then the main header of the codestream up to the first tile,
+then the headers of any boxes after the codestream.
+"""
+
+import os
+import struct
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple, \
+    Union
+
+TIFF_SIGNATURES = (b"II*\0", b"MM\0*", b"II+\0", b"MM\0+")
+JP2_SIGNATURE = b"\x00\x00\x00\x0cjP  \r\n\x87\n"
+
+TIFF = "tiff"
+JP2 = "jp2"
+
+# File extensions used by each format, including the leading dot
+FORMAT_EXTENSIONS: Dict[str, Set[str]] = {
+    TIFF: {".tif", ".tiff"},
+    JP2: {".jp2", ".jpf", ".jpx"},
+}
+
+# Bytes needed to tell the formats apart
+SIGNATURE_SIZE = len(JP2_SIGNATURE)
+
+# Bytes per value of each TIFF field type
+_TIFF_TYPE_SIZES: Dict[int, int] = {
+    1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4,
+    12: 8, 13: 4, 16: 8, 17: 8, 18: 8,
+}
+
+# SubIFDs, Exif IFD, GPS IFD and Interoperability IFD
+_TIFF_IFD_POINTER_TAGS = {330, 34665, 34853, 40965}
+
+MAX_IFDS = 256
+MAX_IFD_ENTRIES = 4096
+
+_SOT_MARKER = 0xFF90
+
+
+class InvalidHeader(Exception):
+    """The header of the file could not be parsed."""
+
+
+class HeaderRegion(NamedTuple):
+    """Parts of a file that were read, keyed by their offset."""
+
+    size: int
+    ranges: List[Tuple[int, bytes]]
+    bytes_read: int
+
+    def prefix(self) -> bytes:
+        """Get the bytes read from the start of the file without a gap."""
+        prefix = bytearray()
+        for offset, data in self.ranges:
+            if offset > len(prefix):
+                break
+            prefix += data[len(prefix) - offset:]
+        return bytes(prefix)
+
+
+class _RangeReader:
+    def __init__(self, read_at: Callable[[int, int], bytes],
+                 size: int) -> None:
+        self.read_at = read_at
+        self.size = size
+        self.bytes_read = 0
+        self.ranges: Dict[int, bytes] = dict()
+
+    def read(self, offset: int, length: int) -> bytes:
+        if offset < 0 or length < 0 or offset + length > self.size:
+            raise InvalidHeader(
+                f"{length} bytes at offset {offset} extends past the end of "
+                f"the file"
+            )
+        if len(self.ranges.get(offset, b"")) >= length:
+            return self.ranges[offset][:length]
+        data = self.read_at(offset, length)
+        self.bytes_read += len(data)
+        if len(data) != length:
+            raise InvalidHeader(f"Unexpected end of file at offset {offset}")
+        if len(data) > len(self.ranges.get(offset, b"")):
+            self.ranges[offset] = data
+        return data
+
+    def merged_ranges(self) -> List[Tuple[int, bytes]]:
+        merged: List[Tuple[int, bytearray]] = list()
+        for offset, data in sorted(self.ranges.items()):
+            if merged and offset <= merged[-1][0] + len(merged[-1][1]):
+                start, combined = merged[-1]
+                combined += data[start + len(combined) - offset:]
+            else:
+                merged.append((offset, bytearray(data)))
+        return [(offset, bytes(data)) for offset, data in merged]
+
+
+def sniff(data: bytes) -> Optional[str]:
+    """Identify the format of a file from the bytes at its start.
+
+    Args:
+        data:
+            at least the first SIGNATURE_SIZE bytes of the file
+
+    Returns:
+        TIFF or JP2, None if the format is not supported
+
+    """
+    if data.startswith(TIFF_SIGNATURES):
+        return TIFF
+    if data.startswith(JP2_SIGNATURE):
+        return JP2
+    return None
+
+
+def sniff_file(file: str) -> Optional[str]:
+    """Identify the format of a file by reading only its signature.
+
+    Args:
+        file:
+            path to the file
+
+    Returns:
+        TIFF or JP2, None if the format is not supported
+
+    """
+    with open(file, "rb", buffering=0) as file_handle:
+        return sniff(file_handle.read(SIGNATURE_SIZE))
+
+
+def read_header(file: str) -> HeaderRegion:
+    """Read the metadata regions of a TIFF or JPEG 2000 file.
+
+    Args:
+        file:
+            path to a TIFF or JP2 file
+
+    Returns:
+        The parts of the file read and how many bytes were read in total
+
+    """
+    with open(file, "rb", buffering=0) as file_handle:
+        def read_at(offset: int, length: int) -> bytes:
+            file_handle.seek(offset)
+            return file_handle.read(length)
+
+        return _read_regions(
+            _RangeReader(read_at, os.fstat(file_handle.fileno()).st_size),
+            file
+        )
+
+
+def read_header_buffer(data: Union[bytes, bytearray, memoryview],
+                       name: str = "<buffer>") -> HeaderRegion:
+    """Find the metadata regions of a TIFF or JPEG 2000 file in memory.
+
+    Args:
+        data:
+            content of a TIFF or JP2 file
+        name:
+            name of the file used in errors
+
+    Returns:
+        Copies of the parts of the data holding metadata
+
+    """
+    view = memoryview(data).cast("B")
+    return _read_regions(
+        _RangeReader(
+            lambda offset, length: bytes(view[offset:offset + length]),
+            len(view)
+        ),
+        name
+    )
+
+
+def _read_regions(reader: _RangeReader, name: str) -> HeaderRegion:
+    file_format = sniff(reader.read(0, min(SIGNATURE_SIZE, reader.size)))
+    if file_format == TIFF:
+        _read_tiff(reader)
+    elif file_format == JP2:
+        _read_jp2_boxes(reader)
+    else:
+        raise InvalidHeader(f"{name} is not a TIFF or JPEG 2000 file")
+    return HeaderRegion(
+        reader.size, reader.merged_ranges(), reader.bytes_read
+    )
+
+
+def _read_tiff(reader: _RangeReader) -> None:
+    header = reader.read(0, 8)
+    order = "<" if header[:2] == b"II" else ">"
+    big_tiff = struct.unpack(order + "H", header[2:4])[0] == 43
+    if big_tiff:
+        offset_format = order + "Q"
+        count_size, entry_size, inline_size = 8, 20, 8
+        first_ifd = struct.unpack(offset_format, reader.read(8, 8))[0]
+    else:
+        offset_format = order + "I"
+        count_size, entry_size, inline_size = 2, 12, 4
+        first_ifd = struct.unpack(offset_format, header[4:8])[0]
+
+    pending = [first_ifd]
+    visited: Set[int] = set()
+    while pending:
+        ifd_offset = pending.pop()
+        if ifd_offset == 0 or ifd_offset in visited:
+            continue
+        if len(visited) >= MAX_IFDS:
+            raise InvalidHeader(f"More than {MAX_IFDS} IFDs")
+        visited.add(ifd_offset)
+
+        entries = struct.unpack(
+            order + ("Q" if big_tiff else "H"),
+            reader.read(ifd_offset, count_size)
+        )[0]
+        if entries > MAX_IFD_ENTRIES:
+            raise InvalidHeader(f"IFD at {ifd_offset} has {entries} entries")
+        table = reader.read(
+            ifd_offset + count_size, entries * entry_size + inline_size
+        )
+        for index in range(entries):
+            entry = table[index * entry_size:(index + 1) * entry_size]
+            tag, field_type = struct.unpack(order + "HH", entry[:4])
+            count = struct.unpack(
+                offset_format, entry[4:4 + inline_size]
+            )[0]
+            value = entry[4 + inline_size:]
+            if field_type not in _TIFF_TYPE_SIZES:
+                continue
+            value_size = _TIFF_TYPE_SIZES[field_type] * count
+            if value_size > inline_size:
+                value = reader.read(
+                    struct.unpack(offset_format, value)[0], value_size
+                )
+            if tag in _TIFF_IFD_POINTER_TAGS and \
+                    field_type in (4, 13, 16, 18):
+                pointer_format = "Q" if field_type in (16, 18) else "I"
+                pending.extend(struct.unpack(
+                    f"{order}{count}{pointer_format}", value[:value_size]
+                ))
+        pending.append(struct.unpack(offset_format, table[-inline_size:])[0])
+
+
+def _read_jp2_boxes(reader: _RangeReader) -> None:
+    offset = 0
+    while reader.size - offset >= 8:
+        length, box_type = struct.unpack(">I4s", reader.read(offset, 8))
+        header_length = 8
+        if length == 1:
+            length = struct.unpack(">Q", reader.read(offset + 8, 8))[0]
+            header_length = 16
+        elif length == 0:
+            length = reader.size - offset
+        if length < header_length:
+            raise InvalidHeader(f"Invalid length of box at offset {offset}")
+
+        if box_type == b"jp2c":
+            _read_codestream_header(reader, offset + header_length)
+        else:
+            reader.read(offset + header_length, length - header_length)
+        offset += length
+
+
+def _read_codestream_header(reader: _RangeReader, offset: int) -> None:
+    if reader.read(offset, 2) != b"\xff\x4f":
+        raise InvalidHeader(f"No codestream found at offset {offset}")
+    position = offset + 2
+    while True:
+        marker, length = struct.unpack(">HH", reader.read(position, 4))
+        if length < 2:
+            raise InvalidHeader(f"Invalid marker segment at {position}")
+        reader.read(position + 4, length - 2)
+        if marker == _SOT_MARKER:
+            return
+        position += 2 + length
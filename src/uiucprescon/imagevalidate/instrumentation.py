@@ -0,0 +1,186 @@
+"""Optional measurement of the stages of a validation.
+
+Instrumentation is disabled until a collector is installed with
+set_collector or collecting. While it is disabled each stage costs no more
+than a check of a module variable.
+"""
+
+import abc
+import contextlib
+import threading
+import time
+from typing import ContextManager, Dict, Iterator, NamedTuple, Optional
+
+STAGES = [
+    "read_metadata",
+    "get_data_from_image",
+    "determine_color_space",
+    "analyze_data_for_issues",
+    "generate_error_msg",
+]
+
+
+class StageMetrics(NamedTuple):
+    """Resources used by one stage of validating a file.
+
+    Stages can be nested, so the measurements of get_data_from_image
+    include those of determine_color_space.
+
+    bytes_read is the number of bytes the thread received from read system
+    calls, including those made by native libraries. It is only available
+    on Linux. Files mapped into memory are not counted, and exiv2 maps TIFF
+    files, so read_metadata reports close to nothing for them.
+    """
+
+    file: Optional[str]
+    stage: str
+    seconds: float
+    bytes_read: Optional[int]
+    native_calls: int
+
+
+class Collector(metaclass=abc.ABCMeta):
+    """Receives the measurements of each stage as it finishes."""
+
+    @abc.abstractmethod
+    def record(self, metrics: StageMetrics) -> None:
+        """Store the measurements of a stage.
+
+        This is called from whichever thread validated the file.
+        """
+
+
+class StageTotals(Collector):
+    """Collector that adds up the measurements of each stage."""
+
+    def __init__(self) -> None:
+        """Start with no measurements."""
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Dict[str, float]] = dict()
+
+    def record(self, metrics: StageMetrics) -> None:
+        """Add the measurements of a stage to the totals."""
+        with self._lock:
+            totals = self._totals.setdefault(metrics.stage, {
+                "calls": 0,
+                "seconds": 0.0,
+                "bytes_read": 0,
+                "native_calls": 0,
+            })
+            totals["calls"] += 1
+            totals["seconds"] += metrics.seconds
+            totals["bytes_read"] += metrics.bytes_read or 0
+            totals["native_calls"] += metrics.native_calls
+
+    def totals(self) -> Dict[str, Dict[str, float]]:
+        """Get the totals of each stage, keyed by the name of the stage."""
+        with self._lock:
+            return {
+                stage: dict(totals) for stage, totals in self._totals.items()
+            }
+
+
+_collector: Optional[Collector] = None
+_thread_state = threading.local()
+_DISABLED: ContextManager[None] = contextlib.nullcontext()
+
+
+def set_collector(collector: Optional[Collector]) -> Optional[Collector]:
+    """Send stage measurements to a collector, or None to disable them.
+
+    Returns:
+        The collector that was previously installed
+
+    """
+    global _collector  # pylint: disable=global-statement
+    previous = _collector
+    _collector = collector
+    return previous
+
+
+def get_collector() -> Optional[Collector]:
+    """Get the installed collector, None if instrumentation is disabled."""
+    return _collector
+
+
+@contextlib.contextmanager
+def collecting(collector: Collector) -> Iterator[Collector]:
+    """Install a collector for the duration of a with block."""
+    previous = set_collector(collector)
+    try:
+        yield collector
+    finally:
+        set_collector(previous)
+
+
+def stage(name: str, file: Optional[str] = None) -> ContextManager[None]:
+    """Measure the code run inside a with block as a stage.
+
+    Args:
+        name:
+            name of the stage
+        file:
+            file being validated. Nested stages default to the file of the
+            stage around them.
+
+    """
+    collector = _collector
+    if collector is None:
+        return _DISABLED
+    return _Stage(collector, name, file)
+
+
+def count_native_call() -> None:
+    """Note a call into a native library by the current thread."""
+    if _collector is not None:
+        _thread_state.native_calls = \
+            getattr(_thread_state, "native_calls", 0) + 1
+
+
+def _bytes_read() -> Optional[int]:
+    # Counts read system calls, including those of native libraries, but
+    # not pages of memory mapped files. Only available on Linux.
+    try:
+        with open("/proc/thread-self/io", "rb") as io_stats:
+            for line in io_stats:
+                if line.startswith(b"rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class _Stage:
+    __slots__ = (
+        "collector", "name", "file", "_outer_file", "_native_calls",
+        "_bytes_read", "_start"
+    )
+
+    def __init__(self, collector: Collector, name: str,
+                 file: Optional[str]) -> None:
+        self.collector = collector
+        self.name = name
+        self.file = file
+
+    def __enter__(self) -> None:
+        self._outer_file = getattr(_thread_state, "file", None)
+        if self.file is None:
+            self.file = self._outer_file
+        _thread_state.file = self.file
+        self._native_calls = getattr(_thread_state, "native_calls", 0)
+        self._bytes_read = _bytes_read()
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc_info: object) -> None:
+        seconds = time.perf_counter() - self._start
+        bytes_read = _bytes_read()
+        _thread_state.file = self._outer_file
+        self.collector.record(StageMetrics(
+            file=self.file,
+            stage=self.name,
+            seconds=seconds,
+            bytes_read=None if bytes_read is None or self._bytes_read is None
+            else bytes_read - self._bytes_read,
+            native_calls=getattr(_thread_state, "native_calls", 0) -
+            self._native_calls
+        ))
@@ -1,22 +1,36 @@
-"""Creating messages."""
+"""Creating messages.
+
+Message strategies keep no state, so a single instance of each is shared
+for every message. Issues are stored in reports as records and only turned
+into messages when they are read.
+"""
 
 import abc
+from typing import Dict, Iterable, List, Union
 
 from uiucprescon.imagevalidate import report
+from uiucprescon.imagevalidate.issues import IssueCategory
+
+# Anything with the expected and actual values of a field
+FieldData = Union[report.Result, report.Issue]
 
 
 class AbsMessage(metaclass=abc.ABCMeta):
     """Base class for messages."""
 
+    __slots__ = ()
+
     @abc.abstractmethod
-    def generate_message(self, field: str, data: report.Result) -> str:
+    def generate_message(self, field: str, data: FieldData) -> str:
         """Generate message as a string."""
 
 
 class InvalidData(AbsMessage):
     """Invalid data."""
 
-    def generate_message(self, field: str, data: report.Result) -> str:
+    __slots__ = ()
+
+    def generate_message(self, field: str, data: FieldData) -> str:
         """Generate message as text."""
         return f'Invalid match for "{field}". ' \
                f'Expected: "{data.expected}". ' \
@@ -26,7 +40,9 @@ class InvalidData(AbsMessage):
 class EmptyData(AbsMessage):
     """Empty data."""
 
-    def generate_message(self, field: str, data: report.Result) -> str:
+    __slots__ = ()
+
+    def generate_message(self, field: str, data: FieldData) -> str:
         """Generate message as text."""
         return f'The "{field}" field exists but contains no data.'
 
@@ -34,7 +50,9 @@ class EmptyData(AbsMessage):
 class MissingField(AbsMessage):
     """Missing fields."""
 
-    def generate_message(self, field: str, data: report.Result) -> str:
+    __slots__ = ()
+
+    def generate_message(self, field: str, data: FieldData) -> str:
         """Generate message as text."""
         return f'No metadata field for "{field}" found in file.'
 
@@ -51,6 +69,42 @@ class MessageGenerator:
         """
         self._strategy = strategy
 
-    def generate_message(self, field: str, data: report.Result) -> str:
+    def generate_message(self, field: str, data: FieldData) -> str:
         """Generate a message string from the result."""
         return self._strategy.generate_message(field, data)
+
+
+MESSAGE_STRATEGIES: Dict[IssueCategory, AbsMessage] = {
+    IssueCategory.INVALID_DATA: InvalidData(),
+    IssueCategory.EMPTY_DATA: EmptyData(),
+    IssueCategory.MISSING_FIELD: MissingField()
+}
+
+
+def generate_error_message(category: IssueCategory, field: str,
+                           data: FieldData) -> str:
+    """Generate the message for a problem found with a field."""
+    strategy = MESSAGE_STRATEGIES.get(category)
+    if strategy is not None:
+        return strategy.generate_message(field, data)
+
+    return "Unknown error with {}".format(field)
+
+
+def render_issue(issue: report.Issue) -> str:
+    """Generate the message for an issue recorded in a report."""
+    return generate_error_message(issue.category, issue.field, issue)
+
+
+def render_issues(issues: Iterable[report.Issue]) -> List[str]:
+    """Generate the messages for many issues at once.
+
+    Args:
+        issues:
+            issues recorded in reports
+
+    Returns:
+        A message for each issue, in the same order
+
+    """
+    return [render_issue(issue) for issue in issues]
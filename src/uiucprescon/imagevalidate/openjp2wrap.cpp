@@ -2,14 +2,60 @@
 #include "exceptions.h"
 
 #include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
 
 //NOLINTNEXTLINE
 PYBIND11_MODULE(openjp2wrap, m, pybind11::mod_gil_not_used()){ //  cppcheck-suppress unusedFunction
     pybind11::options options;
     options.enable_function_signatures();
     m.def("open_jpeg_version", &open_jpeg_version, "Get the version of OpenJPEG built with");
-    m.def("get_colorspace", &color_space, "get color space value from an image");
-    m.def("get_bit_depth", &bitdepth, "get color bit depth from an image");
+    m.def("get_colorspace", &color_space,
+          "get color space value from an image. Only the header is read unless decode is set, in which case the "
+          "lowest resolution level of the first tile is decoded when the header does not specify a color space",
+          pybind11::arg("file_path"),
+          pybind11::arg("decode") = false,
+          pybind11::call_guard<pybind11::gil_scoped_release>());
+    m.def("get_bit_depth", &bitdepth, "get color bit depth from an image",
+          pybind11::arg("file_path"),
+          pybind11::call_guard<pybind11::gil_scoped_release>());
+
+    pybind11::class_<codestream_info>(m, "CodestreamInfo")
+            .def_readonly("color_space", &codestream_info::color_space)
+            .def_readonly("precision", &codestream_info::precision)
+            .def_readonly("num_components", &codestream_info::num_components)
+            .def_readonly("width", &codestream_info::width)
+            .def_readonly("height", &codestream_info::height)
+            .def_readonly("tile_width", &codestream_info::tile_width)
+            .def_readonly("tile_height", &codestream_info::tile_height)
+            .def_readonly("tiles_x", &codestream_info::tiles_x)
+            .def_readonly("tiles_y", &codestream_info::tiles_y)
+            .def_readonly("resolution_levels", &codestream_info::resolution_levels)
+            .def_readonly("progression_order", &codestream_info::progression_order)
+            .def("__repr__", [](const codestream_info &info){
+                return "<CodestreamInfo color_space=" + info.color_space +
+                       " size=" + std::to_string(info.width) + "x" + std::to_string(info.height) +
+                       " components=" + std::to_string(info.num_components) + ">";
+            });
+
+    m.def("probe", &probe,
+          "read the header of an image once and get the facts about its codestream",
+          pybind11::arg("file_path"),
+          pybind11::call_guard<pybind11::gil_scoped_release>());
+    m.def("probe_buffer",
+          [](const pybind11::buffer &data){
+              const pybind11::buffer_info info = data.request();
+              if(info.ndim > 1 || (info.ndim == 1 && info.strides[0] != info.itemsize)){
+                  throw pybind11::value_error("buffer must be contiguous");
+              }
+              const auto *bytes = static_cast<const unsigned char*>(info.ptr);
+              const auto size = static_cast<std::size_t>(info.size * info.itemsize);
+
+              // The buffer stays exported, and so unchanged, until this returns
+              pybind11::gil_scoped_release release;
+              return probe_buffer(bytes, size);
+          },
+          "read the header of an image held in memory, such as bytes, a memoryview or an mmap, without copying it",
+          pybind11::arg("data"));
     pybind11::register_exception<InvalidFileException>(m, "InvalidFileException");
 
 }
@@ -4,6 +4,7 @@
 
 #include "opj_colorspace_checker.h"
 #include "exceptions.h"
+#include "opj_stream.h"
 
 #include <utility>
 
@@ -47,30 +48,47 @@ void opj_colorspace_checker::setup_codec() {
 
 
 void opj_colorspace_checker::setup_stream() {
-     l_stream = std::shared_ptr<opj_stream_t>(
-            opj_stream_create_default_file_stream(filename.c_str(), 1),
-            [](opj_stream_t *ptr){
-                opj_stream_destroy(ptr);
-            });
-
-    if(!l_stream) {
-        throw InvalidFileException(filename, "Unable to load file");
-    }
-
+    l_stream = create_file_stream(filename);
 }
 
-std::string opj_colorspace_checker::read() const{
+std::string opj_colorspace_checker::read(bool decode) const{
     opj_image_t* image = nullptr;
 
-    opj_read_header(l_stream.get(), l_codec.get(), &image);
+    // The JP2 reader fills in image->color_space from the colr box while it
+    // parses the header so there is no need to decode the codestream.
+    if(!opj_read_header(l_stream.get(), l_codec.get(), &image) || image == nullptr){
+        throw InvalidFileException(filename, "Unable to read header");
+    }
+    std::shared_ptr<opj_image_t> l_image(
+            image,
+            [](opj_image_t *ptr){
+                opj_image_destroy(ptr);
+            });
 
-    opj_codestream_info_v2_t *info = opj_get_cstr_info(l_codec.get());
+    if(decode && (image->color_space == OPJ_CLRSPC_UNKNOWN || image->color_space == OPJ_CLRSPC_UNSPECIFIED)){
+        decode_lowest_resolution(image);
+    }
+    return opj_colorspace_checker::convert_enum_to_string(image->color_space);
+}
 
-    opj_decode(l_codec.get(), l_stream.get(), image );
-    std::string result = opj_colorspace_checker::convert_enum_to_string(image->color_space);
-    opj_image_destroy(image);
+void opj_colorspace_checker::decode_lowest_resolution(opj_image_t *image) const {
+    opj_codestream_info_v2_t *info = opj_get_cstr_info(l_codec.get());
+    if(info == nullptr){
+        throw InvalidFileException(filename, "Unable to read codestream information");
+    }
+    OPJ_UINT32 resolutions = 1;
+    if(info->m_default_tile_info.tccp_info != nullptr){
+        resolutions = info->m_default_tile_info.tccp_info[0].numresolutions;
+    }
     opj_destroy_cstr_info(&info);
-    return result;
+
+    // Only decode the smallest resolution level of the first tile
+    if(resolutions > 1){
+        opj_set_decoded_resolution_factor(l_codec.get(), resolutions - 1);
+    }
+    if(!opj_get_decoded_tile(l_codec.get(), l_stream.get(), image, 0)){
+        throw InvalidFileException(filename, "Unable to decode tile");
+    }
 }
 
 void opj_colorspace_checker::setup() {
@@ -23,12 +23,13 @@ private:
     std::shared_ptr<opj_stream_t> l_stream;
 
 public:
-    std::string read() const;
+    std::string read(bool decode = false) const;
     void setup();
 
 private:
     void setup_codec();
     void setup_stream();
+    void decode_lowest_resolution(opj_image_t *image) const;
 };
 
 
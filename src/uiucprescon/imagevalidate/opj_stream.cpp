@@ -0,0 +1,83 @@
+#include "opj_stream.h"
+#include "exceptions.h"
+
+#include <algorithm>
+#include <cstring>
+
+namespace {
+struct memory_source {
+    const unsigned char *data;
+    std::size_t size;
+    std::size_t offset;
+};
+
+OPJ_SIZE_T memory_read(void *buffer, OPJ_SIZE_T bytes, void *user_data){
+    auto *source = static_cast<memory_source*>(user_data);
+    if(source->offset >= source->size){
+        return static_cast<OPJ_SIZE_T>(-1);
+    }
+    const std::size_t count = std::min<std::size_t>(bytes, source->size - source->offset);
+    std::memcpy(buffer, source->data + source->offset, count);
+    source->offset += count;
+    return count;
+}
+
+OPJ_OFF_T memory_skip(OPJ_OFF_T bytes, void *user_data){
+    auto *source = static_cast<memory_source*>(user_data);
+    if(bytes < 0){
+        const auto back = static_cast<std::size_t>(-bytes);
+        if(back > source->offset){
+            return -1;
+        }
+        source->offset -= back;
+        return bytes;
+    }
+    const std::size_t count = std::min<std::size_t>(static_cast<std::size_t>(bytes), source->size - source->offset);
+    source->offset += count;
+    return static_cast<OPJ_OFF_T>(count);
+}
+
+OPJ_BOOL memory_seek(OPJ_OFF_T position, void *user_data){
+    auto *source = static_cast<memory_source*>(user_data);
+    if(position < 0 || static_cast<std::size_t>(position) > source->size){
+        return OPJ_FALSE;
+    }
+    source->offset = static_cast<std::size_t>(position);
+    return OPJ_TRUE;
+}
+
+void memory_free(void *user_data){
+    delete static_cast<memory_source*>(user_data);
+}
+
+void destroy_stream(opj_stream_t *ptr){
+    if(ptr != nullptr){
+        opj_stream_destroy(ptr);
+    }
+}
+}
+
+std::shared_ptr<opj_stream_t> create_file_stream(const std::string &file_path){
+    std::shared_ptr<opj_stream_t> stream(
+            opj_stream_create_file_stream(file_path.c_str(), HEADER_CHUNK_SIZE, 1),
+            destroy_stream);
+    if(!stream){
+        throw InvalidFileException(file_path, "Unable to load file");
+    }
+    return stream;
+}
+
+std::shared_ptr<opj_stream_t> create_memory_stream(const unsigned char *data, std::size_t size){
+    std::shared_ptr<opj_stream_t> stream(
+            opj_stream_create(HEADER_CHUNK_SIZE, 1),
+            destroy_stream);
+    if(!stream){
+        throw std::bad_alloc();
+    }
+    opj_stream_set_user_data(stream.get(), new memory_source{data, size, 0}, memory_free);
+    opj_stream_set_user_data_length(stream.get(), size);
+    opj_stream_set_read_function(stream.get(), memory_read);
+    opj_stream_set_skip_function(stream.get(), memory_skip);
+    opj_stream_set_seek_function(stream.get(), memory_seek);
+    return stream;
+}
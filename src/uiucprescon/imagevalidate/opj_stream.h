@@ -0,0 +1,21 @@
+#ifndef OPENJPEGWRAPPER_OPJ_STREAM_H
+#define OPENJPEGWRAPPER_OPJ_STREAM_H
+
+extern "C"{
+#include <openjpeg.h>
+}
+
+#include <cstddef>
+#include <memory>
+#include <string>
+
+// Only the headers are read so a small chunk avoids pulling in the
+// first megabyte of the codestream, which is OpenJPEG's default.
+const OPJ_SIZE_T HEADER_CHUNK_SIZE = 64 * 1024;
+
+std::shared_ptr<opj_stream_t> create_file_stream(const std::string &file_path);
+
+// The data is not copied and must outlive the stream.
+std::shared_ptr<opj_stream_t> create_memory_stream(const unsigned char *data, std::size_t size);
+
+#endif //OPENJPEGWRAPPER_OPJ_STREAM_H
@@ -1,24 +1,56 @@
 """Profile for validating images."""
 
+import concurrent.futures
+import functools
 import os
-import inspect
-from typing import Type, Set, Dict
+import threading
+import time
+import types
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Type, Set, \
+    Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, \
+    TYPE_CHECKING, Union
 from uiucprescon import imagevalidate
+from . import batch, instrumentation
+from .snapshot import Buffer, MetadataSnapshot
 from . import profiles as profile_pkg
 
-known_profiles: Dict[str, Type[profile_pkg.AbsProfile]] = {}
+if TYPE_CHECKING:
+    import importlib.metadata
+    from .cache import ValidationCache
+
+_registry: Optional[Mapping[str, "importlib.metadata.EntryPoint"]] = None
+_instances: Mapping[str, profile_pkg.AbsProfile] = types.MappingProxyType({})
+_registry_lock = threading.Lock()
 
 
 class Profile:
     """Profile loader for validating embedded metadata in image files."""
 
-    def __init__(self, validation_profile: profile_pkg.AbsProfile) -> None:
+    def __init__(self,
+                 validation_profile: profile_pkg.AbsProfile,
+                 cache: Optional["ValidationCache"] = None,
+                 header_only: bool = False,
+                 fail_fast: bool = False) -> None:
         """Set the profile to validate against.
 
         Args:
             validation_profile:
+            cache:
+                Optional cache to reuse the reports of files that have not
+                changed since they were last validated
+            header_only:
+                Only read the regions of files that hold metadata and
+                record the number of bytes read in each report. Where
+                sparse files are not available, such as on Windows, whole
+                files are parsed and no number is recorded.
+            fail_fast:
+                Stop validating each file at its first issue. Reports only
+                record that issue, so they are not stored in the cache.
         """
         self._profile = validation_profile
+        self.cache = cache
+        self.header_only = header_only
+        self.fail_fast = fail_fast
 
     def validate(self, file: str) -> imagevalidate.Report:
         """Validate the image file.
@@ -27,12 +59,243 @@ class Profile:
             file:
                 Path to image file to validate
         Returns:
-            Report on validity of the file
+            Report on validity of the file, with the seconds it took
 
         """
+        start = time.perf_counter()
+        report = self._validate(file)
+        report.seconds = time.perf_counter() - start
+        return report
+
+    def _validate(self, file: str) -> imagevalidate.Report:
         if not os.path.exists(file):
             raise FileNotFoundError(f"Unable to locate {file}")
-        return self._profile.validate(file)
+        validate: Callable[..., imagevalidate.Report] = \
+            self._profile.validate_header if self.header_only \
+            else self._profile.validate
+        if self.fail_fast:
+            # Profiles that override validate may not take fail_fast
+            validate = functools.partial(validate, fail_fast=True)
+        if self.cache is None:
+            return validate(file)
+
+        cache_key = self._profile.cache_key()
+        # Taken before validating so a file changed meanwhile is not cached
+        # under its new status with a report about its old content
+        file_stat = os.stat(file)
+        report = self.cache.get(file, cache_key, file_stat)
+        if report is None:
+            report = validate(file)
+            if not self.fail_fast:
+                self.cache.put(file, cache_key, report, file_stat)
+        return report
+
+    def validate_buffer(self, data: Buffer,
+                        filename: str = "<buffer>") -> imagevalidate.Report:
+        """Validate an image file held in memory.
+
+        Use this for files fetched from storage without saving them first.
+        The cache is not used because it is keyed on files on disk.
+
+        Args:
+            data:
+                Content of the image file, such as bytes or a memoryview
+            filename:
+                Name of the file used in the report
+
+        Returns:
+            Report on validity of the file, with the seconds it took
+
+        """
+        start = time.perf_counter()
+        if self.fail_fast:
+            report = self._profile.validate_buffer(data, filename,
+                                                   fail_fast=True)
+        else:
+            report = self._profile.validate_buffer(data, filename)
+        report.seconds = time.perf_counter() - start
+        return report
+
+    def validate_many(self,
+                      files: Iterable[str],
+                      workers: Optional[int] = None,
+                      executor: str = "thread") \
+            -> Iterator[imagevalidate.Report]:
+        """Validate many image files concurrently.
+
+        Files are read from the iterable lazily and no more than the number
+        of workers are being validated at any one time.
+
+        Args:
+            files:
+                Paths to image files to validate
+            workers:
+                Number of files to validate at once. Defaults to the number
+                of CPUs.
+            executor:
+                Either "thread" or "process"
+
+        Yields:
+            Reports on the validity of the files in the order they finish
+
+        """
+        yield from batch.imap_unordered(
+            self.validate,
+            files,
+            workers=workers,
+            executor=executor
+        )
+
+    def validate_archive(self,
+                         archive: str,
+                         workers: Optional[int] = None,
+                         return_exceptions: bool = False) \
+            -> Iterator[Union[imagevalidate.Report, BaseException]]:
+        """Validate the image files inside a zip or tar archive.
+
+        Members are validated from memory without extracting them. See
+        archive.validate_archive.
+
+        Args:
+            archive:
+                Path to a zip or tar archive
+            workers:
+                Number of members to validate at once. Defaults to the
+                number of CPUs.
+            return_exceptions:
+                Yield an ArchiveMemberError for each member that could not
+                be validated instead of raising it
+
+        Yields:
+            Reports on the validity of each member in the order they finish
+
+        """
+        # The archive modules are only loaded when archives are used.
+        # pylint: disable=import-outside-toplevel
+        from . import archive as archive_module
+        yield from archive_module.validate_archive(
+            self._profile,
+            archive,
+            workers=workers,
+            return_exceptions=return_exceptions,
+            fail_fast=self.fail_fast
+        )
+
+    async def validate_async(
+            self,
+            file: str,
+            timeout: Optional[float] = None,
+            executor: Optional[concurrent.futures.Executor] = None
+    ) -> imagevalidate.Report:
+        """Validate the image file without blocking the event loop.
+
+        The file is parsed in a worker thread. The timeout starts once a
+        worker picks the file up, so time spent waiting for a free worker
+        does not count. A validation that times out is abandoned but the
+        worker is only freed once the native parser returns.
+
+        Args:
+            file:
+                Path to image file to validate
+            timeout:
+                Seconds to wait for the validation, once it has started,
+                before raising TimeoutError
+            executor:
+                Executor to validate the file with. Defaults to the default
+                executor of the event loop.
+
+        Returns:
+            Report on validity of the file
+
+        """
+        # Only loaded by programs that use asyncio.
+        # pylint: disable=import-outside-toplevel
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        if timeout is None:
+            return await loop.run_in_executor(executor, self.validate, file)
+
+        started = loop.create_future()
+
+        def mark_started() -> None:
+            if not started.done():
+                started.set_result(None)
+
+        def validate_once_started() -> imagevalidate.Report:
+            try:
+                loop.call_soon_threadsafe(mark_started)
+            except RuntimeError:
+                # The event loop closed while the file waited for a worker
+                pass
+            return self.validate(file)
+
+        validation = loop.run_in_executor(executor, validate_once_started)
+        try:
+            await asyncio.wait(
+                {started, validation},
+                return_when=asyncio.FIRST_COMPLETED
+            )
+        except asyncio.CancelledError:
+            validation.cancel()
+            raise
+        try:
+            return await asyncio.wait_for(validation, timeout)
+        except asyncio.TimeoutError as error:
+            raise TimeoutError(
+                f"Validating {file} took longer than {timeout} seconds"
+            ) from error
+
+    async def validate_stream(
+            self,
+            files: Union[Iterable[str], AsyncIterable[str]],
+            concurrency: Optional[int] = None,
+            timeout: Optional[float] = None,
+            return_exceptions: bool = False,
+            executor: Optional[concurrent.futures.Executor] = None
+    ) -> AsyncIterator[Union[imagevalidate.Report, BaseException]]:
+        """Validate many image files from asyncio code.
+
+        No more than concurrency files are validated at once and files are
+        read from the iterable only as fast as reports are consumed.
+        Closing the generator cancels the files that have not started.
+
+        Args:
+            files:
+                Paths to image files to validate. May be an async iterable.
+            concurrency:
+                Number of files to validate at once. Defaults to the number
+                of CPUs.
+            timeout:
+                Seconds allowed to validate each file, counted from when a
+                worker starts on it
+            return_exceptions:
+                Yield the exceptions raised while validating a file instead
+                of raising them. The message of the exception names the file.
+            executor:
+                Executor to validate the files with. Defaults to a thread
+                pool of concurrency workers, shut down when the generator
+                finishes.
+
+        Yields:
+            Reports on the validity of the files in the order they finish
+
+        """
+        concurrency = concurrency or batch.default_workers()
+        pool = executor or \
+            concurrent.futures.ThreadPoolExecutor(max_workers=concurrency)
+        try:
+            async for result in batch.amap_unordered(
+                    functools.partial(
+                        self.validate_async, timeout=timeout, executor=pool
+                    ),
+                    files,
+                    concurrency=concurrency,
+                    return_exceptions=return_exceptions):
+                yield result
+        finally:
+            if executor is None:
+                pool.shutdown(wait=False, cancel_futures=True)
 
 
 def available_profiles() -> Set[str]:
@@ -42,28 +305,122 @@ def available_profiles() -> Set[str]:
         List of available profiles accessible in this version
 
     """
-    known_package_profiles: Dict[str, Type[profile_pkg.AbsProfile]] = \
-        get_profile_classes()
-
-    return set(known_package_profiles.keys())
+    return set(_get_registry().keys())
 
 
 def get_profile(name: str) -> profile_pkg.AbsProfile:
-    """Locate a profile based on the name of the class."""
-    profiles = get_profile_classes()
-    return profiles[name]()
+    """Locate a profile based on the name of the class.
 
+    The profile is imported the first time it is requested. After that the
+    same profile instance is shared by every caller. Profiles do not keep
+    any state between validations so they are safe to use from multiple
+    threads.
+    """
+    global _instances  # pylint: disable=global-statement
+    try:
+        return _instances[name]
+    except KeyError:
+        entry_point = _get_registry()[name]
 
-def get_profile_classes():
-    known_package_profiles: Dict[str, Type[profile_pkg.AbsProfile]] = {}
-    profiles = \
-        inspect.getmembers(
-            profile_pkg,
-            lambda m: inspect.isclass(m) and not inspect.isabstract(m)
-        )
+    with _registry_lock:
+        if name not in _instances:
+            _instances = types.MappingProxyType(
+                {**_instances, name: entry_point.load()()}
+            )
+        return _instances[name]
+
+
+def get_profile_classes() -> Dict[str, Type[profile_pkg.AbsProfile]]:
+    """Get the classes of all available profiles keyed by profile name.
+
+    This imports every profile.
+    """
+    return {
+        name: type(get_profile(name))
+        for name in _get_registry()
+    }
+
+
+def validate_against(
+        file: str,
+        profiles: Iterable[Union[str, profile_pkg.AbsProfile]],
+        header_only: bool = False) \
+        -> Dict[str, Union[imagevalidate.Report, Exception]]:
+    """Validate a file against several profiles, reading it only once.
+
+    The metadata of the file is parsed into a single snapshot that every
+    profile is evaluated against. Values that are expensive to get, such as
+    the JPEG 2000 codestream header, are read once and shared by the
+    profiles.
+
+    Args:
+        file:
+            Path to image file to validate
+        profiles:
+            Names of profiles, as given to get_profile, or profile instances
+        header_only:
+            Only read the regions of the file that hold metadata and record
+            the number of bytes read in each report. Where sparse files are
+            not available, such as on Windows, the whole file is parsed and
+            no number is recorded.
+
+    Returns:
+        A report for each profile in the order the profiles were given,
+        keyed by the name the profile was requested with, or by its
+        profile_name if an instance was given. If a profile could not
+        validate the file, such as a JPEG 2000 profile given a TIFF file,
+        the exception it raised is returned in place of its report.
+
+    """
+    validation_profiles: List[Tuple[str, profile_pkg.AbsProfile]] = [
+        (profile, get_profile(profile)) if isinstance(profile, str)
+        else (profile.profile_name(), profile)
+        for profile in profiles
+    ]
+    if not os.path.exists(file):
+        raise FileNotFoundError(f"Unable to locate {file}")
+
+    with instrumentation.stage("read_metadata", file):
+        image = MetadataSnapshot.from_header(file) if header_only \
+            else MetadataSnapshot.from_file(file)
+
+    results: Dict[str, Union[imagevalidate.Report, Exception]] = dict()
+    for name, validation_profile in validation_profiles:
+        try:
+            report = validation_profile.validate_snapshot(image)
+        except Exception as error:  # pylint: disable=broad-except
+            results[name] = error
+            continue
+        report.bytes_read = image.bytes_read
+        results[name] = report
+    return results
+
+
+def invalidate_profile_registry() -> None:
+    """Discard the discovered profiles so they are located again when needed.
+
+    Use this after installing profiles at runtime.
+    """
+    global _registry, _instances  # pylint: disable=global-statement
+    with _registry_lock:
+        _registry = None
+        _instances = types.MappingProxyType({})
+
+
+def _get_registry() -> Mapping[str, "importlib.metadata.EntryPoint"]:
+    global _registry  # pylint: disable=global-statement
+    registry = _registry
+    if registry is not None:
+        return registry
+
+    with _registry_lock:
+        if _registry is None:
+            _registry = \
+                types.MappingProxyType(profile_pkg.discover_profiles())
+        return _registry
 
-    for profile in profiles:
-        known_package_profiles[profile[1].profile_name()] = profile[1]
-    return known_package_profiles
 
-known_profiles = get_profile_classes()
+def __getattr__(name: str) -> Any:
+    if name == "known_profiles":
+        return get_profile_classes()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
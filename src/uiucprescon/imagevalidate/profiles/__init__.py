@@ -1,42 +1,73 @@
-"""Profiles for testing images against."""
+"""Profiles for testing images against.
 
-import inspect
-import abc
+Profiles are only imported when they are first used. Other packages can
+provide more profiles by declaring an entry point in the
+``uiucprescon.imagevalidate.profiles`` group, named after the profile and
+pointing to an AbsProfile subclass.
+"""
 
 import importlib
-import importlib.util
-import pkgutil
+from typing import Any, Dict, TYPE_CHECKING
+
 from .absProfile import AbsProfile
 
+if TYPE_CHECKING:
+    import importlib.metadata
+
+ENTRY_POINT_GROUP = "uiucprescon.imagevalidate.profiles"
+
+# Profiles included with this package. profile name: module:class
+BUILTIN_PROFILES: Dict[str, str] = {
+    "HathiTrust JPEG 2000":
+        "uiucprescon.imagevalidate.profiles.hathi_jp2000:HathiJP2000",
+    "HathiTrust Tiff":
+        "uiucprescon.imagevalidate.profiles.hathi_tiff:HathiTiff",
+}
+
+_BUILTIN_CLASSES: Dict[str, str] = {
+    target.split(":")[1]: target.split(":")[0]
+    for target in BUILTIN_PROFILES.values()
+}
+
+valid_profiles = tuple(sorted(_BUILTIN_CLASSES))
+
 __all__ = [
     "AbsProfile",
+    "discover_profiles",
+    *valid_profiles,
 ]
 
-valid_profiles = []
-
-
-def _load() -> None:
-    """Dynamically load profiles with AbsProfile in the profiles namespace."""
 
-    def is_profile(i: abc.ABCMeta) -> bool:
-        if not inspect.isclass(i):
-            return False
-        if inspect.isabstract(i):
-            return False
-        return True
+def discover_profiles() -> Dict[str, "importlib.metadata.EntryPoint"]:
+    """Locate the available profiles without importing them.
 
-    module_path = __path__  # type: ignore
+    Returns:
+        Entry points to the profile classes keyed by profile name. Profiles
+        included with this package take priority over third party profiles
+        of the same name.
 
-    for _, module_name, _ in \
-            pkgutil.walk_packages(module_path):
+    """
+    # Only needed once profiles are looked up and slow to import.
+    # pylint: disable=import-outside-toplevel
+    import importlib.metadata
 
-        mod = importlib.import_module(f".{module_name}", __package__)
-        for _, module_class in inspect.getmembers(mod, is_profile):
-            if issubclass(module_class, AbsProfile):
-                globals()[module_class.__name__] = module_class
-                # __all__.append(module_class.__name__)
-                valid_profiles.append(module_class.__name__)
+    profiles = {
+        entry_point.name: entry_point
+        for entry_point in
+        importlib.metadata.entry_points(group=ENTRY_POINT_GROUP)
+    }
+    for name, target in BUILTIN_PROFILES.items():
+        profiles[name] = importlib.metadata.EntryPoint(
+            name=name,
+            value=target,
+            group=ENTRY_POINT_GROUP
+        )
+    return profiles
 
 
-_load()
-__all__ += valid_profiles
+def __getattr__(name: str) -> Any:
+    """Import the profiles included with this package on first access."""
+    if name in _BUILTIN_CLASSES:
+        module = importlib.import_module(_BUILTIN_CLASSES[name])
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
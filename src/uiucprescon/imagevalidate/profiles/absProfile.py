@@ -1,104 +1,273 @@
 """Abstract class for creating a profile."""
 
 import abc
+import threading
 
-from typing import Dict, List, Optional, Set
-import py3exiv2bind
-from uiucprescon.imagevalidate import Report, IssueCategory, messages
-from uiucprescon.imagevalidate.report import Result, ResultCategory
+from typing import Dict, List, Optional, Sequence, Set, TYPE_CHECKING
+from uiucprescon.imagevalidate import Report, IssueCategory, messages, \
+    instrumentation, rules as profile_rules
+from uiucprescon.imagevalidate.report import Result
+from uiucprescon.imagevalidate.rules import Rule, RuleTable
+from uiucprescon.imagevalidate.snapshot import Buffer, MetadataSnapshot
+
+if TYPE_CHECKING:
+    from uiucprescon.imagevalidate import common
+
+_rule_table_lock = threading.Lock()
 
 
 class AbsProfile(metaclass=abc.ABCMeta):
     """Base class for metadata validation.
 
-    Implement the validate method when creating new profile
+    Implement the profile_name method when creating new profile and list
+    the fields to check as rules. Values that are not read directly from the
+    embedded metadata are derived by the methods named in the rules. The
+    rules are compiled into a table the first time the profile is used.
+
+    Profiles written before rules existed can still list
+    expected_metadata_constants and expected_metadata_any_value and extend
+    get_data_from_image or analyze_data_for_issues instead.
+
+    Profile instances are shared between threads, so they must not keep any
+    state about the file being validated.
     """
 
     expected_metadata_constants: Dict[str, str] = dict()
     expected_metadata_any_value: List[str] = list()
     valid_extensions: Set[str] = set()
+    rules: Optional[Sequence[Rule]] = None
+    color_space_strategies: Optional["common.ColorSpaceStrategyChain"] = None
+
+    # Relative cost of each method used to derive values. Values that are
+    # cheaper to get are checked first when stopping at the first issue.
+    derived_value_costs: Dict[str, int] = {
+        "longest_side": 0,
+        "determine_color_space": 1,
+        "bit_depth": 2,
+    }
+    _rule_table: Optional[RuleTable] = None
 
     @staticmethod
     @abc.abstractmethod
     def profile_name() -> str:
         """Get the name of the profile."""
 
-    @abc.abstractmethod
-    def validate(self, file: str) -> Report:
+    @classmethod
+    def cache_key(cls) -> str:
+        """Get the key that cached reports of this profile are stored under.
+
+        Profiles whose checks can change without changing their name should
+        include something in the key that changes with the checks.
+        """
+        return cls.profile_name()
+
+    def validate(self, file: str, fail_fast: bool = False) -> Report:
         """Validate a file.
 
+        Each stage is measured if a collector is installed with
+        instrumentation.set_collector.
+
         Args:
             file: file path to the file to be validate
+            fail_fast: stop at the first issue, see validate_snapshot
 
         Returns:
             Returns a report object
         """
+        with instrumentation.stage("read_metadata", file):
+            image = MetadataSnapshot.from_file(file, defer_icc=fail_fast)
+        return self.validate_snapshot(image, fail_fast)
+
+    def validate_header(self, file: str, fail_fast: bool = False) -> Report:
+        """Validate a file, reading only the regions that hold metadata.
+
+        Args:
+            file: file path to the file to be validate
+            fail_fast: stop at the first issue, see validate_snapshot
+
+        Returns:
+            Returns a report object, including the number of bytes read
+            where sparse files are available and None elsewhere
+        """
+        with instrumentation.stage("read_metadata", file):
+            image = MetadataSnapshot.from_header(file)
+        report = self.validate_snapshot(image, fail_fast)
+        report.bytes_read = image.bytes_read
+        return report
+
+    def validate_buffer(self, data: Buffer,
+                        filename: str = "<buffer>",
+                        fail_fast: bool = False) -> Report:
+        """Validate an image file held in memory.
+
+        Args:
+            data: content of the file, such as bytes or a memoryview
+            filename: name of the file used in the report
+            fail_fast: stop at the first issue, see validate_snapshot
+
+        Returns:
+            Returns a report object
+        """
+        with instrumentation.stage("read_metadata", filename):
+            image = MetadataSnapshot.from_buffer(data, filename)
+        return self.validate_snapshot(image, fail_fast)
+
+    def validate_snapshot(self, image: MetadataSnapshot,
+                          fail_fast: bool = False) -> Report:
+        """Validate metadata that has already been parsed.
+
+        Args:
+            image: metadata snapshot of the file
+            fail_fast:
+                stop at the first issue, checking the fields that are
+                cheapest to get first. The report only records that issue
+                and none of the properties. Use this when only the validity
+                of the file matters. Profiles that extend
+                get_data_from_image or analyze_data_for_issues check every
+                field anyway.
+
+        Returns:
+            Returns a report object
+        """
+        table = self.compiled_rules()
+        if table is None:
+            return self._validate_with_hooks(image)
+
+        report = Report()
+        report.filename = image.filename
+        if fail_fast:
+            with instrumentation.stage("analyze_data_for_issues",
+                                       image.filename):
+                issue = table.first_issue(image)
+            if issue is not None:
+                report._issues.append(issue)
+            return report
+
+        with instrumentation.stage("get_data_from_image", image.filename):
+            values = table.values(image)
+        with instrumentation.stage("analyze_data_for_issues",
+                                   image.filename):
+            report._properties = table.results(values)
+            report._issues = table.evaluate(values)
+        return report
+
+    def _validate_with_hooks(self, image: MetadataSnapshot) -> Report:
+        report = Report()
+        report.filename = image.filename
+        with instrumentation.stage("get_data_from_image", image.filename):
+            report_data = self.get_data_from_image(image)
+        report._properties = report_data
+
+        with instrumentation.stage("analyze_data_for_issues",
+                                   image.filename):
+            for key, result in report_data.items():
+                issue_category = self.analyze_data_for_issues(result)
+                if issue_category:
+                    report.add_issue(key, issue_category, result)
+
+        return report
 
     @classmethod
-    def _get_metadata_static_values(cls, image: py3exiv2bind.Image) \
-            -> Dict[str, Result]:
+    def rule_table(cls) -> RuleTable:
+        """Get the rules of the profile, compiled into a table.
+
+        The table is compiled the first time it is requested and shared by
+        every instance of the profile, even when several threads request it
+        at once.
+        """
+        table = cls.__dict__.get("_rule_table")
+        if table is not None:
+            return table
 
-        data = dict()
-        for key, value in cls.expected_metadata_constants.items():
-            data[key] = Result(
-                expected=value,
-                actual=image.metadata.get(key)
-            )
-        return data
+        with _rule_table_lock:
+            table = cls.__dict__.get("_rule_table")
+            if table is None:
+                table = RuleTable(
+                    cls._profile_rules(),
+                    lambda name: getattr(cls, name),
+                    lambda name: cls.derived_value_costs.get(
+                        name,
+                        max(cls.derived_value_costs.values(), default=0) + 1
+                    )
+                )
+                cls._rule_table = table
+            return table
 
     @classmethod
-    def _get_metadata_has_values(cls, image: py3exiv2bind.Image) -> \
-            Dict[str, Result]:
+    def compiled_rules(cls) -> Optional[RuleTable]:
+        """Get the rule table, unless the profile replaces the rule hooks.
+
+        Returns:
+            The compiled rules, or None if the profile extends
+            get_data_from_image or analyze_data_for_issues
 
-        data = dict()
-        for key in cls.expected_metadata_any_value:
-            data[key] = Result(
-                expected=ResultCategory.ANY,
-                actual=image.metadata.get(key)
-            )
-        return data
+        """
+        if cls._extends("get_data_from_image") or \
+                cls._extends("analyze_data_for_issues"):
+            return None
+        return cls.rule_table()
 
-    @staticmethod
-    def generate_error_msg(category: IssueCategory, field: str,
-                           report_data: Result) -> str:
-        """Generate error message."""
-        message_types: Dict[IssueCategory, messages.AbsMessage] = {
-            IssueCategory.INVALID_DATA: messages.InvalidData(),
-            IssueCategory.EMPTY_DATA: messages.EmptyData(),
-            IssueCategory.MISSING_FIELD: messages.MissingField()
-        }
+    @classmethod
+    def _extends(cls, method: str) -> bool:
+        for base in cls.__mro__:
+            if method in base.__dict__:
+                return base is not AbsProfile
+        return False
+
+    @classmethod
+    def _profile_rules(cls) -> List[Rule]:
+        if cls.rules is not None:
+            return list(cls.rules)
+        return [
+            Rule(key) for key in cls.expected_metadata_any_value
+        ] + [
+            Rule(key, value)
+            for key, value in cls.expected_metadata_constants.items()
+        ]
 
-        if category in message_types:
+    @classmethod
+    def determine_color_space(cls, image: MetadataSnapshot) \
+            -> Optional[str]:
+        """Determine the color space of a given file.
 
-            message_generator = \
-                messages.MessageGenerator(message_types[category])
+        Args:
+            image:
+                metadata snapshot of the image
 
-            return message_generator.generate_message(field, report_data)
+        Returns:
+            color space name, None if the profile has no color space
+            strategies or none of them could determine it
 
-        return "Unknown error with {}".format(field)
+        """
+        if cls.color_space_strategies is None:
+            return None
+        with instrumentation.stage("determine_color_space"):
+            return cls.color_space_strategies.resolve(image).color_space
 
     @staticmethod
-    def analyze_data_for_issues(result: Result) -> Optional[IssueCategory]:
-        """Parse data for issues."""
-        if result.actual is None:
-            return IssueCategory.MISSING_FIELD
-
-        if result.actual == "":
-            return IssueCategory.EMPTY_DATA
+    def longest_side(image: MetadataSnapshot) -> str:
+        """Get the length in pixels of the longest side of an image."""
+        return str(max(image.pixel_height, image.pixel_width))
 
-        if result.actual != result.expected and \
-                result.expected is not ResultCategory.ANY:
+    @staticmethod
+    def bit_depth(image: MetadataSnapshot) -> str:
+        """Get the bit depth of the first component of a JPEG 2000 image."""
+        return str(image.codestream.precision[0])
 
-            return IssueCategory.INVALID_DATA
+    @staticmethod
+    def generate_error_msg(category: IssueCategory, field: str,
+                           report_data: Result) -> str:
+        """Generate error message."""
+        return messages.generate_error_message(category, field, report_data)
 
-        return None
+    @staticmethod
+    def analyze_data_for_issues(result: Result) -> Optional[IssueCategory]:
+        """Parse data for issues."""
+        return profile_rules.find_issue(result.expected, result.actual)
 
     @classmethod
-    def get_data_from_image(cls, filename: str) \
+    def get_data_from_image(cls, image: MetadataSnapshot) \
             -> Dict[str, Result]:
         """Access data from image."""
-        image = py3exiv2bind.Image(filename)
-        data: Dict[str, Result] = dict()
-        data.update(cls._get_metadata_has_values(image))
-        data.update(cls._get_metadata_static_values(image))
-        return data
+        table = cls.rule_table()
+        return table.results(table.values(image))
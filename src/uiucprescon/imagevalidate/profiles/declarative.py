@@ -0,0 +1,411 @@
+"""Profiles defined in TOML or YAML files instead of Python code.
+
+A definition file lists one or more profiles. Each profile has a name, the
+file extensions it accepts and the rules it checks. A profile can extend
+another profile in the same file, replacing the rules for the fields it
+lists and keeping the rest.
+
+.. code-block:: toml
+
+    [[profiles]]
+    name = "Example 400 ppi"
+    extensions = [".tif"]
+    color_space_strategies = ["icc_device_model", "icc_pref_ccm"]
+
+    [[profiles.rules]]
+    field = "Xmp.dc.creator"
+
+    [[profiles.rules]]
+    field = "Exif.Image.XResolution"
+    equals = "400/1"
+
+    [[profiles.rules]]
+    field = "Color Space"
+    derive = "color_space"
+    one_of = ["sRGB", "Adobe RGB"]
+
+    [[profiles.rules]]
+    field = "Pixel on longest angle"
+    derive = "longest_side"
+    range = {min = 3000}
+
+    [[profiles]]
+    name = "Example 300 ppi"
+    extends = "Example 400 ppi"
+
+    [[profiles.rules]]
+    field = "Exif.Image.XResolution"
+    equals = "300/1"
+
+Each rule checks its value with at most one of equals, range (a table with
+min and max), matches (a regular expression) or one_of (a list of values).
+A rule without a check only requires the field to have a value. Instead of
+reading a metadata key, a rule can derive a value with one of the names in
+DERIVED_VALUES.
+
+Definitions are compiled into profile classes when they are loaded. Loaded
+files and compiled definitions are cached, and matchers with the same
+check are shared between profiles.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, \
+    Type
+
+from uiucprescon.imagevalidate import common
+from uiucprescon.imagevalidate.report import ResultCategory
+from uiucprescon.imagevalidate.rules import InRange, Matcher, OneOf, \
+    Pattern, Rule
+from .absProfile import AbsProfile
+
+# Name used in definitions: method of AbsProfile that derives the value
+DERIVED_VALUES: Dict[str, str] = {
+    "color_space": "determine_color_space",
+    "longest_side": "longest_side",
+    "bit_depth": "bit_depth",
+}
+
+COLOR_SPACE_STRATEGIES: Dict[
+    str, Callable[[], common.AbsColorSpaceExtractor]
+] = {
+    "icc_device_model": common.ColorSpaceIccDeviceModelCheck,
+    "icc_pref_ccm": common.ColorSpaceIccPrefCcmCheck,
+    "openjpeg": common.ColorSpaceOJPCheck,
+}
+
+_CHECKS = ("equals", "range", "matches", "one_of")
+_RULE_KEYS = {"field", "derive", "default"}.union(_CHECKS)
+_PROFILE_KEYS = {
+    "name", "extends", "extensions", "color_space_strategies", "rules"
+}
+
+_file_cache: Dict[
+    str, Tuple[Tuple[int, int], Dict[str, Type[AbsProfile]]]
+] = dict()
+_file_cache_lock = threading.Lock()
+
+# Held while compiling so each definition only ever creates one class
+_compile_lock = threading.Lock()
+
+
+class ProfileDefinitionError(ValueError):
+    """A profile definition is not valid."""
+
+
+class DeclarativeProfile(AbsProfile):
+    """Base class of the profiles compiled from definitions."""
+
+    definition: Dict[str, Any] = dict()
+
+    @classmethod
+    def profile_name(cls) -> str:  # type: ignore[override]
+        """Get the name of the profile."""
+        return str(cls.definition["name"])
+
+    @classmethod
+    def cache_key(cls) -> str:
+        """Get the name of the profile with a digest of its definition.
+
+        Editing a definition file changes the key, so reports cached with
+        the old checks are not used.
+        """
+        digest = hashlib.sha256(
+            json.dumps(cls.definition, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        return f"{cls.profile_name()} {digest}"
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """Pickle the profile as its definition.
+
+        The classes are created at runtime so they are compiled again, from
+        the cache, when unpickled.
+        """
+        return _create_instance, (json.dumps(self.definition),)
+
+
+def _create_instance(definition: str) -> DeclarativeProfile:
+    return compile_profile(json.loads(definition))()
+
+
+def load_profiles(path: str) -> Dict[str, Type[AbsProfile]]:
+    """Load the profiles defined in a TOML or YAML file.
+
+    The file is only read again if it has changed since it was last loaded.
+
+    Args:
+        path:
+            path to a file ending in .toml, .yaml or .yml
+
+    Returns:
+        Profile classes keyed by profile name
+
+    """
+    path = os.path.abspath(path)
+    stat_result = os.stat(path)
+    signature = (stat_result.st_mtime_ns, stat_result.st_size)
+    with _file_cache_lock:
+        cached = _file_cache.get(path)
+        if cached is not None and cached[0] == signature:
+            return dict(cached[1])
+
+    with open(path, "rb") as file_handle:
+        content = file_handle.read()
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".toml":
+        profiles = loads_toml(content.decode("utf-8"))
+    elif extension in (".yaml", ".yml"):
+        profiles = loads_yaml(content.decode("utf-8"))
+    else:
+        raise ProfileDefinitionError(
+            f"{path} is not a .toml, .yaml or .yml file"
+        )
+
+    with _file_cache_lock:
+        _file_cache[path] = (signature, profiles)
+    return dict(profiles)
+
+
+def loads_toml(text: str) -> Dict[str, Type[AbsProfile]]:
+    """Compile the profiles defined in a TOML document.
+
+    This requires tomli on Python 3.10.
+    """
+    # pylint: disable=import-outside-toplevel
+    try:
+        import tomllib
+    except ImportError:  # Python 3.10
+        try:
+            import tomli as tomllib  # type: ignore[no-redef]
+        except ImportError as error:
+            raise ProfileDefinitionError(
+                "tomli is required to load profiles from TOML on Python "
+                "3.10"
+            ) from error
+    try:
+        document = tomllib.loads(text)
+    except tomllib.TOMLDecodeError as error:
+        raise ProfileDefinitionError(str(error)) from error
+    return compile_profiles(document)
+
+
+def loads_yaml(text: str) -> Dict[str, Type[AbsProfile]]:
+    """Compile the profiles defined in a YAML document.
+
+    This requires PyYAML.
+    """
+    try:
+        import yaml  # pylint: disable=import-outside-toplevel
+    except ImportError as error:
+        raise ProfileDefinitionError(
+            "PyYAML is required to load profiles from YAML"
+        ) from error
+    try:
+        document = yaml.safe_load(text)
+    except yaml.YAMLError as error:
+        raise ProfileDefinitionError(str(error)) from error
+    return compile_profiles(document)
+
+
+def compile_profiles(document: Mapping[str, Any]) \
+        -> Dict[str, Type[AbsProfile]]:
+    """Compile the profiles listed in a parsed definition file.
+
+    Args:
+        document:
+            mapping with a list of profile definitions under "profiles"
+
+    Returns:
+        Profile classes keyed by profile name
+
+    """
+    if not isinstance(document, Mapping) or \
+            not isinstance(document.get("profiles"), list):
+        raise ProfileDefinitionError("Expected a list of profiles")
+
+    definitions: Dict[str, Dict[str, Any]] = dict()
+    for definition in document["profiles"]:
+        if not isinstance(definition, Mapping) or \
+                not isinstance(definition.get("name"), str):
+            raise ProfileDefinitionError("Each profile needs a name")
+        if definition["name"] in definitions:
+            raise ProfileDefinitionError(
+                f"Profile \"{definition['name']}\" is defined more than once"
+            )
+        definitions[definition["name"]] = dict(definition)
+
+    return {
+        name: compile_profile(_resolve_extends(name, definitions, []))
+        for name in definitions
+    }
+
+
+def _resolve_extends(name: str,
+                     definitions: Mapping[str, Dict[str, Any]],
+                     chain: List[str]) -> Dict[str, Any]:
+    if name in chain:
+        raise ProfileDefinitionError(
+            f"Profile \"{name}\" extends itself: {' -> '.join(chain)}"
+        )
+    if name not in definitions:
+        raise ProfileDefinitionError(
+            f"Profile \"{chain[-1]}\" extends unknown profile \"{name}\""
+        )
+    definition = dict(definitions[name])
+    parent_name = definition.pop("extends", None)
+    if parent_name is None:
+        return definition
+
+    parent = _resolve_extends(parent_name, definitions, chain + [name])
+    rules = {
+        _rule_field(parent["name"], rule): rule
+        for rule in parent.get("rules", [])
+    }
+    for rule in definition.get("rules", []):
+        rules[_rule_field(name, rule)] = rule
+    return {**parent, **definition, "rules": list(rules.values())}
+
+
+def _rule_field(profile: str, rule: Any) -> str:
+    if not isinstance(rule, Mapping) or not isinstance(rule.get("field"),
+                                                       str):
+        raise ProfileDefinitionError(
+            f"Each rule of profile \"{profile}\" needs a field"
+        )
+    return rule["field"]
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_profile(definition: str) -> Type[DeclarativeProfile]:
+    profile = json.loads(definition)
+    unknown = set(profile) - _PROFILE_KEYS
+    if unknown:
+        raise ProfileDefinitionError(
+            f"Unknown keys for profile \"{profile.get('name')}\": "
+            f"{', '.join(sorted(unknown))}"
+        )
+    name = profile["name"]
+    strategies = []
+    for strategy in profile.get("color_space_strategies", []):
+        if strategy not in COLOR_SPACE_STRATEGIES:
+            raise ProfileDefinitionError(
+                f"Unknown color space strategy \"{strategy}\" in profile "
+                f"\"{name}\""
+            )
+        strategies.append(COLOR_SPACE_STRATEGIES[strategy]())
+
+    attributes = {
+        "__doc__": f"Profile for validating {name}.",
+        "__module__": __name__,
+        "definition": profile,
+        "rules": [_compile_rule(name, rule) for rule in profile["rules"]],
+        "valid_extensions": {
+            extension.lower() for extension in profile.get("extensions", [])
+        },
+        "color_space_strategies":
+            common.ColorSpaceStrategyChain(strategies)
+            if strategies else None,
+    }
+    class_name = re.sub(r"\W", "", name.title()) or "Profile"
+    return type(class_name, (DeclarativeProfile,), attributes)
+
+
+def compile_profile(definition: Mapping[str, Any]) \
+        -> Type[DeclarativeProfile]:
+    """Compile a single profile definition into a profile class.
+
+    The same definition always compiles to the same class, even when it is
+    compiled by several threads at once.
+
+    Args:
+        definition:
+            profile definition that does not extend another profile
+
+    Returns:
+        Profile class
+
+    """
+    if "extends" in definition:
+        raise ProfileDefinitionError(
+            "Use compile_profiles to compile profiles that extend others"
+        )
+    if not isinstance(definition.get("rules"), list):
+        raise ProfileDefinitionError(
+            f"Profile \"{definition.get('name')}\" needs a list of rules"
+        )
+    try:
+        key = json.dumps(definition, sort_keys=True)
+    except TypeError as error:
+        raise ProfileDefinitionError(str(error)) from error
+    with _compile_lock:
+        return _compile_profile(key)
+
+
+def _compile_rule(profile: str, rule: Mapping[str, Any]) -> Rule:
+    field = _rule_field(profile, rule)
+    unknown = set(rule) - _RULE_KEYS
+    if unknown:
+        raise ProfileDefinitionError(
+            f"Unknown keys for \"{field}\" in profile \"{profile}\": "
+            f"{', '.join(sorted(unknown))}"
+        )
+    checks = [check for check in _CHECKS if check in rule]
+    if len(checks) > 1:
+        raise ProfileDefinitionError(
+            f"\"{field}\" in profile \"{profile}\" has more than one check: "
+            f"{', '.join(checks)}"
+        )
+
+    derive: Optional[str] = None
+    if "derive" in rule:
+        if rule["derive"] not in DERIVED_VALUES:
+            raise ProfileDefinitionError(
+                f"Unknown derived value \"{rule['derive']}\" for \"{field}\" "
+                f"in profile \"{profile}\". Valid values are: "
+                f"{', '.join(sorted(DERIVED_VALUES))}"
+            )
+        derive = DERIVED_VALUES[rule["derive"]]
+
+    default = rule.get("default")
+    if "equals" in rule:
+        return Rule(field, str(rule["equals"]), derive, default)
+    if not checks:
+        return Rule(field, ResultCategory.ANY, derive, default)
+    try:
+        matcher = _compile_matcher(checks[0], _freeze(rule[checks[0]]))
+    except (ValueError, TypeError, re.error) as error:
+        raise ProfileDefinitionError(
+            f"Invalid {checks[0]} for \"{field}\" in profile \"{profile}\": "
+            f"{error}"
+        ) from error
+    return Rule(field, ResultCategory.ANY, derive, default, matcher)
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return tuple(sorted((key, _freeze(item)) for key, item in
+                            value.items()))
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_matcher(check: str, value: Any) -> Matcher:
+    if check == "range":
+        limits = dict(value)
+        unknown = set(limits) - {"min", "max"}
+        if unknown:
+            raise ValueError(f"unknown keys {', '.join(sorted(unknown))}")
+        return InRange(limits.get("min"), limits.get("max"))
+    if check == "matches":
+        if not isinstance(value, str):
+            raise TypeError("expected a regular expression")
+        return Pattern(value)
+    if not isinstance(value, tuple):
+        raise TypeError("expected a list of values")
+    return OneOf(str(item) for item in value)
@@ -1,8 +1,9 @@
 """Report generated from validation."""
 
-from typing import NamedTuple, Optional, Dict, List, Union
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
 from enum import Enum
-from uiucprescon import imagevalidate
+from uiucprescon.imagevalidate import instrumentation
+from uiucprescon.imagevalidate.issues import IssueCategory
 
 
 class ResultCategory(Enum):
@@ -15,15 +16,54 @@ class Result(NamedTuple):
     actual: Optional[str]
 
 
+class Issue(NamedTuple):
+    """Problem found with a metadata field."""
+
+    field: str
+    category: IssueCategory
+    expected: Union[str, ResultCategory]
+    actual: Optional[str]
+
+    @property
+    def message(self) -> str:
+        """Describe the issue in a human readable sentence."""
+        # pylint: disable=import-outside-toplevel
+        from uiucprescon.imagevalidate import messages
+        return messages.render_issue(self)
+
+
+def _encode_expected(expected: Union[str, ResultCategory]) -> Any:
+    if isinstance(expected, ResultCategory):
+        return {"category": expected.name}
+    return expected
+
+
+def _decode_expected(expected: Any) -> Union[str, ResultCategory]:
+    if isinstance(expected, dict):
+        return ResultCategory[expected["category"]]
+    return expected
+
+
 class Report:
-    """Validation report."""
+    """Validation report.
+
+    Issues are kept as structured records and only turned into messages
+    when they are asked for.
+    """
+
+    __slots__ = (
+        "filename", "bytes_read", "seconds", "_properties", "_issues"
+    )
 
     def __init__(self) -> None:
         """Access the results."""
         self._properties: Dict[str, Result] = dict()
         self.filename: Optional[str] = None
-
-        self._data: Dict[imagevalidate.IssueCategory, List[str]] = dict()
+        self.bytes_read: Optional[int] = None
+        # How long the file took to validate. Not stored with the results
+        # since it changes from one run to the next.
+        self.seconds: Optional[float] = None
+        self._issues: List[Issue] = list()
 
     @property
     def valid(self) -> bool:
@@ -33,18 +73,127 @@ class Report:
             Returns true if valid, else returns false
 
         """
-        return len(self._data.items()) == 0
+        return len(self._issues) == 0
+
+    def add_issue(self, field: str, category: IssueCategory,
+                  result: Result) -> None:
+        """Record a problem found with a field.
+
+        Args:
+            field:
+                name of the metadata field
+            category:
+                kind of problem
+            result:
+                expected and actual values of the field
+        """
+        self._issues.append(
+            Issue(field, category, result.expected, result.actual)
+        )
+
+    def issue_records(self,
+                      issue_type: Optional[IssueCategory] = None) \
+            -> List[Issue]:
+        """Issues discovered, as structured records."""
+        if issue_type is not None:
+            return [
+                issue for issue in self._issues
+                if issue.category == issue_type
+            ]
+        return list(self._issues)
 
     def issues(self,
-               issue_type: Optional[imagevalidate.IssueCategory] = None) \
+               issue_type: Optional[IssueCategory] = None) \
             -> List[str]:
         """Issues or problems discovered."""
-        if issue_type is not None:
-            return self._data.get(issue_type, list())
-
-        # In issue category is selected, return all
-        return [issue for issues in
-                self._data.values() for issue in issues]
+        # pylint: disable=import-outside-toplevel
+        from uiucprescon.imagevalidate import messages
+        with instrumentation.stage("generate_error_msg", self.filename):
+            return messages.render_issues(self.issue_records(issue_type))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the report into JSON compatible values."""
+        return {
+            "filename": self.filename,
+            "bytes_read": self.bytes_read,
+            "properties": {
+                key: [_encode_expected(result.expected), result.actual]
+                for key, result in self._properties.items()
+            },
+            "issues": [
+                [
+                    issue.field,
+                    issue.category.name,
+                    _encode_expected(issue.expected),
+                    issue.actual
+                ] for issue in self._issues
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Report":
+        """Create a report from the values generated by to_dict."""
+        report = cls()
+        report.filename = data["filename"]
+        report.bytes_read = data.get("bytes_read")
+        report._properties = {
+            key: Result(_decode_expected(expected), actual)
+            for key, (expected, actual) in data["properties"].items()
+        }
+        report._issues = [
+            Issue(
+                field,
+                IssueCategory[category],
+                _decode_expected(expected),
+                actual
+            ) for field, category, expected, actual in data["issues"]
+        ]
+        return report
+
+    def to_json(self) -> str:
+        """Serialize the report as compact JSON."""
+        # Only needed when reports are stored
+        # pylint: disable=import-outside-toplevel
+        import json
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, data: Union[str, bytes]) -> "Report":
+        """Create a report from JSON generated by to_json."""
+        # pylint: disable=import-outside-toplevel
+        import json
+        return cls.from_dict(json.loads(data))
+
+    def __getstate__(self) -> Tuple[Any, ...]:
+        """Reduce the report to plain tuples when pickled."""
+        return (
+            self.filename,
+            self.bytes_read,
+            self.seconds,
+            tuple(
+                (key, result.expected, result.actual)
+                for key, result in self._properties.items()
+            ),
+            tuple(
+                (field, category.value, expected, actual)
+                for field, category, expected, actual in self._issues
+            ),
+        )
+
+    def __setstate__(self, state: Tuple[Any, ...]) -> None:
+        """Restore a pickled report."""
+        filename, bytes_read, seconds, properties, issues = state
+        self.filename = filename
+        self.bytes_read = bytes_read
+        self.seconds = seconds
+        self._properties = {
+            key: Result(expected, actual)
+            for key, expected, actual in properties
+        }
+        self._issues = [
+            Issue(field, IssueCategory(category), expected, actual)
+            for field, category, expected, actual in issues
+        ]
 
     def __str__(self) -> str:
         """Provide summary of the report."""
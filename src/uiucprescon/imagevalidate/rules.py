@@ -0,0 +1,455 @@
+"""Profile rules compiled into a table that is evaluated in a single pass.
+
+A profile is described by a sequence of rules, each naming a field and the
+value it is expected to have. The rules are compiled once per profile. For
+each file every metadata field is looked up in one bulk call and the whole
+table is compared against the values with builtin functions, so Python code
+only runs for the fields that have a problem.
+
+Checks other than equality, such as ranges, patterns and sets of values, are
+done by matchers. Matchers are compiled when they are created and can be
+shared by any number of rules.
+"""
+
+import abc
+import itertools
+import operator
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, \
+    Optional, Sequence, Tuple, Union
+
+from uiucprescon.imagevalidate.issues import IssueCategory
+from uiucprescon.imagevalidate.report import Issue, Result, ResultCategory
+from uiucprescon.imagevalidate.snapshot import MetadataSnapshot
+
+DerivedValue = Callable[[MetadataSnapshot], Optional[str]]
+
+
+class Matcher(metaclass=abc.ABCMeta):
+    """Check whether the value of a field is acceptable."""
+
+    __slots__ = ()
+
+    @property
+    @abc.abstractmethod
+    def description(self) -> str:
+        """Describe the values accepted, used as the expected value."""
+
+    @abc.abstractmethod
+    def __call__(self, actual: str) -> bool:
+        """Check a value that is not empty.
+
+        Args:
+            actual:
+                value found in the file
+
+        Returns:
+            True if the value is acceptable
+
+        """
+
+
+def parse_number(value: str) -> Optional[float]:
+    """Read a number such as 400, 8.5 or a rational such as 400/1.
+
+    Returns:
+        The number, or None if the value is not a number
+
+    """
+    numerator, _, denominator = value.partition("/")
+    try:
+        if denominator:
+            return float(numerator) / float(denominator)
+        return float(numerator)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+class InRange(Matcher):
+    """Accept numbers between a minimum and maximum, inclusive."""
+
+    __slots__ = ("minimum", "maximum", "_description")
+
+    def __init__(self,
+                 minimum: Optional[float] = None,
+                 maximum: Optional[float] = None) -> None:
+        """Set the limits of the range.
+
+        Args:
+            minimum:
+                smallest number accepted, no limit if None
+            maximum:
+                largest number accepted, no limit if None
+        """
+        if minimum is None and maximum is None:
+            raise ValueError("A range needs a minimum or maximum")
+        if minimum is not None and maximum is not None and minimum > maximum:
+            raise ValueError(f"Minimum {minimum} is more than {maximum}")
+        self.minimum = minimum
+        self.maximum = maximum
+        if maximum is None:
+            self._description = f"at least {minimum:g}"
+        elif minimum is None:
+            self._description = f"at most {maximum:g}"
+        else:
+            self._description = f"{minimum:g} to {maximum:g}"
+
+    @property
+    def description(self) -> str:
+        """Describe the values accepted, used as the expected value."""
+        return self._description
+
+    def __call__(self, actual: str) -> bool:
+        """Check if the value is a number within the range."""
+        number = parse_number(actual)
+        if number is None:
+            return False
+        if self.minimum is not None and number < self.minimum:
+            return False
+        return self.maximum is None or number <= self.maximum
+
+
+class Pattern(Matcher):
+    """Accept values that entirely match a regular expression."""
+
+    __slots__ = ("pattern", "_match")
+
+    def __init__(self, pattern: str) -> None:
+        """Compile the regular expression.
+
+        Args:
+            pattern:
+                regular expression the whole value must match
+        """
+        self.pattern = pattern
+        self._match = re.compile(pattern).fullmatch
+
+    @property
+    def description(self) -> str:
+        """Describe the values accepted, used as the expected value."""
+        return f"matching {self.pattern}"
+
+    def __call__(self, actual: str) -> bool:
+        """Check if the value matches the pattern."""
+        return self._match(actual) is not None
+
+
+class OneOf(Matcher):
+    """Accept any value from a set of values."""
+
+    __slots__ = ("values", "_description")
+
+    def __init__(self, values: Iterable[str]) -> None:
+        """Set the values accepted.
+
+        Args:
+            values:
+                values accepted, in the order they are described
+        """
+        ordered = list(dict.fromkeys(values))
+        if not ordered:
+            raise ValueError("At least one value is required")
+        self.values = frozenset(ordered)
+        self._description = "one of " + ", ".join(ordered)
+
+    @property
+    def description(self) -> str:
+        """Describe the values accepted, used as the expected value."""
+        return self._description
+
+    def __call__(self, actual: str) -> bool:
+        """Check if the value is one of the values accepted."""
+        return actual in self.values
+
+
+class Rule(NamedTuple):
+    """Expected value of a single field.
+
+    Attributes:
+        field:
+            name of the field. Unless derive is set, this is the metadata key
+            to read, such as Exif.Image.XResolution.
+        expected:
+            value the field must have, or ResultCategory.ANY if the field
+            only needs to have a value
+        derive:
+            name of a method of the profile that takes the metadata snapshot
+            and returns the value of the field, for values that are not read
+            directly from the embedded metadata
+        default:
+            value used when the field has no value or an empty one
+        matcher:
+            check values with a matcher instead of comparing them with
+            expected. The description of the matcher is reported as the
+            expected value.
+
+    """
+
+    field: str
+    expected: Union[str, ResultCategory] = ResultCategory.ANY
+    derive: Optional[str] = None
+    default: Optional[str] = None
+    matcher: Optional[Matcher] = None
+
+
+def find_issue(expected: Union[str, ResultCategory],
+               actual: Optional[str],
+               matcher: Optional[Matcher] = None) -> Optional[IssueCategory]:
+    """Compare the actual value of a field with the expected one.
+
+    Args:
+        expected:
+            expected value or ResultCategory.ANY
+        actual:
+            value found in the file
+        matcher:
+            check the value with this instead of comparing it with expected
+
+    Returns:
+        The kind of problem found, None if the value is valid
+
+    """
+    if actual is None:
+        return IssueCategory.MISSING_FIELD
+
+    if actual == "":
+        return IssueCategory.EMPTY_DATA
+
+    if matcher is not None:
+        return None if matcher(actual) else IssueCategory.INVALID_DATA
+
+    if actual != expected and expected is not ResultCategory.ANY:
+        return IssueCategory.INVALID_DATA
+
+    return None
+
+
+class _Checks(NamedTuple):
+    """Positions of a group of rules, split by how they are checked."""
+
+    # A field that only needs a value is valid if it is not None or empty.
+    # A field with a matcher is valid if the matcher accepts it. Any other
+    # field is valid if it equals the expected value.
+    any_positions: Tuple[int, ...]
+    equal_positions: Tuple[int, ...]
+    equal_expected: Tuple[Union[str, ResultCategory], ...]
+    matched: Tuple[Tuple[int, Matcher], ...]
+
+    @classmethod
+    def compile(cls, rules: Sequence[Rule],
+                positions: Iterable[int]) -> "_Checks":
+        positions = list(positions)
+        any_positions = tuple(
+            position for position in positions
+            if rules[position].matcher is None and
+            rules[position].expected is ResultCategory.ANY
+        )
+        equal_positions = tuple(
+            position for position in positions
+            if rules[position].matcher is None and
+            rules[position].expected is not ResultCategory.ANY
+        )
+        matched = tuple(
+            (position, matcher) for position, matcher in (
+                (position, rules[position].matcher)
+                for position in positions
+            ) if matcher is not None
+        )
+        return cls(
+            any_positions,
+            equal_positions,
+            tuple(rules[position].expected for position in equal_positions),
+            matched
+        )
+
+    def failed(self, values: Sequence[Optional[str]]) -> Iterator[int]:
+        """Get the positions of the values that have a problem, unsorted."""
+        get = values.__getitem__
+        return itertools.chain(
+            itertools.compress(
+                self.any_positions,
+                map(operator.not_, map(get, self.any_positions))
+            ),
+            itertools.compress(
+                self.equal_positions,
+                map(operator.ne, map(get, self.equal_positions),
+                    self.equal_expected)
+            ),
+            (
+                position for position, matcher in self.matched
+                if not (value := values[position]) or not matcher(value)
+            )
+        )
+
+
+class RuleTable:
+    """Rules of a profile, compiled for evaluating many files."""
+
+    __slots__ = (
+        "fields",
+        "expected",
+        "_keys",
+        "_derived",
+        "_defaults",
+        "_matchers",
+        "_checks",
+        "_metadata_checks",
+        "_derived_by_cost",
+    )
+
+    def __init__(self,
+                 rules: Sequence[Rule],
+                 resolve: Callable[[str], DerivedValue],
+                 cost: Optional[Callable[[str], int]] = None) -> None:
+        """Compile the rules.
+
+        Args:
+            rules:
+                rules in the order their results are reported
+            resolve:
+                look up the function for the derive name of a rule
+            cost:
+                relative cost of getting each derived value, by derive name.
+                Used to get the cheapest values first when stopping at the
+                first issue. Derived values are equally costly by default.
+        """
+        self.fields: Tuple[str, ...] = tuple(rule.field for rule in rules)
+        self.expected: Tuple[Union[str, ResultCategory], ...] = tuple(
+            rule.expected if rule.matcher is None
+            else rule.matcher.description
+            for rule in rules
+        )
+        self._matchers: Tuple[Optional[Matcher], ...] = \
+            tuple(rule.matcher for rule in rules)
+
+        # Derived fields are looked up with an empty key, which is never in
+        # the metadata, and filled in afterwards.
+        self._keys: Tuple[str, ...] = tuple(
+            rule.field if rule.derive is None else "" for rule in rules
+        )
+        self._derived: Tuple[Tuple[int, DerivedValue], ...] = tuple(
+            (position, resolve(rule.derive))
+            for position, rule in enumerate(rules)
+            if rule.derive is not None
+        )
+        self._defaults: Tuple[Tuple[int, str], ...] = tuple(
+            (position, rule.default)
+            for position, rule in enumerate(rules)
+            if rule.default is not None
+        )
+
+        self._checks = _Checks.compile(rules, range(len(rules)))
+        self._metadata_checks = _Checks.compile(
+            rules,
+            (
+                position for position, rule in enumerate(rules)
+                if rule.derive is None
+            )
+        )
+        costs = {
+            position: 0 if cost is None else cost(derive)
+            for position, rule in enumerate(rules)
+            if (derive := rule.derive) is not None
+        }
+        self._derived_by_cost: Tuple[Tuple[int, DerivedValue], ...] = \
+            tuple(sorted(self._derived, key=lambda item: costs[item[0]]))
+
+    def __len__(self) -> int:
+        """Get the number of rules."""
+        return len(self.fields)
+
+    def values(self, image: MetadataSnapshot) -> List[Optional[str]]:
+        """Get the actual value of each field of a file.
+
+        Args:
+            image:
+                metadata snapshot of the file
+
+        Returns:
+            Values in the same order as the fields
+
+        """
+        values = list(map(image.metadata.get, self._keys))
+        for position, derive in self._derived:
+            values[position] = derive(image)
+        self._apply_defaults(values)
+        return values
+
+    def _apply_defaults(self, values: List[Optional[str]]) -> None:
+        for position, default in self._defaults:
+            if not values[position]:
+                values[position] = default
+
+    def results(self, values: Sequence[Optional[str]]) -> Dict[str, Result]:
+        """Pair the values of a file with the expected values.
+
+        Args:
+            values:
+                values returned by the values method
+
+        Returns:
+            The result of every field
+
+        """
+        return {
+            field: Result(expected, value)
+            for field, expected, value
+            in zip(self.fields, self.expected, values)
+        }
+
+    def evaluate(self, values: Sequence[Optional[str]]) -> List[Issue]:
+        """Compare the values of a file against every rule.
+
+        Args:
+            values:
+                values returned by the values method
+
+        Returns:
+            The problems found, in the order of the fields
+
+        """
+        issues = list()
+        for position in sorted(self._checks.failed(values)):
+            issue = self._issue(position, values[position])
+            if issue is not None:
+                issues.append(issue)
+        return issues
+
+    def first_issue(self, image: MetadataSnapshot) -> Optional[Issue]:
+        """Find a problem with a file, doing as little work as possible.
+
+        The fields read directly from the metadata are checked first, then
+        the derived values from the cheapest to the most costly. Nothing
+        more is read once a problem is found.
+
+        Args:
+            image:
+                metadata snapshot of the file
+
+        Returns:
+            The first problem found, None if the file is valid
+
+        """
+        values = list(map(image.metadata.get, self._keys))
+        self._apply_defaults(values)
+        for position in self._metadata_checks.failed(values):
+            issue = self._issue(position, values[position])
+            if issue is not None:
+                return issue
+
+        for position, derive in self._derived_by_cost:
+            value = derive(image)
+            # Derived fields only hold their default so far
+            if not value and values[position] is not None:
+                value = values[position]
+            issue = self._issue(position, value)
+            if issue is not None:
+                return issue
+        return None
+
+    def _issue(self, position: int, actual: Optional[str]) -> Optional[Issue]:
+        expected = self.expected[position]
+        category = find_issue(expected, actual, self._matchers[position])
+        if category is None:
+            return None
+        return Issue(self.fields[position], category, expected, actual)
@@ -0,0 +1,250 @@
+"""Metadata parsed from an image file."""
+
+import functools
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, \
+    Tuple, TYPE_CHECKING, Union
+
+from uiucprescon.imagevalidate import instrumentation
+
+if TYPE_CHECKING:
+    # Imported as a module because the package resolves missing attributes
+    # with __getattr__, which would hide that the extension has no stubs
+    # pylint: disable=consider-using-from-import
+    import uiucprescon.imagevalidate.openjp2wrap as openjp2wrap
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# Most POSIX filesystems store the gaps of a sparse file as holes. NTFS
+# fills a gap with zeros when data is written past it, which for a large
+# image costs more than reading the file, so whole files are parsed there.
+SPARSE_FILES = os.name != "nt"
+IccReader = Callable[[], Tuple[Optional[Dict[str, Any]], Optional[str]]]
+
+
+class MetadataSnapshot:
+    """Embedded metadata of an image file, parsed a single time.
+
+    Profiles and color space extractors share a snapshot so that validating
+    a file only requires one pass of the metadata parser over it.
+    """
+
+    def __init__(self,
+                 filename: str,
+                 metadata: Dict[str, str],
+                 pixel_width: int,
+                 pixel_height: int,
+                 icc: Optional[Dict[str, Any]] = None,
+                 icc_error: Optional[str] = None,
+                 buffer: Optional[Buffer] = None,
+                 icc_reader: Optional[IccReader] = None) -> None:
+        """Store the parsed metadata.
+
+        Args:
+            filename:
+                path to the image file the metadata was read from
+            metadata:
+                key/value map of the embedded metadata
+            pixel_width:
+                width of the image in pixels
+            pixel_height:
+                height of the image in pixels
+            icc:
+                tags of the embedded ICC profile, None if there is no profile
+            icc_error:
+                reason why the ICC profile could not be read
+            buffer:
+                content of the file, if it is held in memory
+            icc_reader:
+                read the ICC profile and the reason it could not be read the
+                first time either is needed, instead of using icc and
+                icc_error
+        """
+        self.filename = filename
+        self.metadata = metadata
+        self.pixel_width = pixel_width
+        self.pixel_height = pixel_height
+        self._icc = icc
+        self._icc_error = icc_error
+        self._icc_reader = icc_reader
+        self._icc_lock = threading.Lock() if icc_reader is not None else None
+        self.buffer = buffer
+        self.bytes_read: Optional[int] = None
+
+    @property
+    def icc(self) -> Optional[Dict[str, Any]]:
+        """Tags of the embedded ICC profile, None if there is no profile."""
+        self._read_icc()
+        return self._icc
+
+    @property
+    def icc_error(self) -> Optional[str]:
+        """Reason why the ICC profile could not be read."""
+        self._read_icc()
+        return self._icc_error
+
+    def _read_icc(self) -> None:
+        if self._icc_reader is None or self._icc_lock is None:
+            return
+        # A snapshot may be shared by threads. The reader is only cleared
+        # once its results are stored so no thread sees them half set.
+        with self._icc_lock:
+            icc_reader = self._icc_reader
+            if icc_reader is not None:
+                self._icc, self._icc_error = icc_reader()
+                self._icc_reader = None
+
+    @functools.cached_property
+    def codestream(self) -> "openjp2wrap.CodestreamInfo":
+        """Facts about the JPEG 2000 codestream, read from its header once."""
+        # pylint: disable=import-outside-toplevel,consider-using-from-import
+        import uiucprescon.imagevalidate.openjp2wrap as openjp2wrap
+        instrumentation.count_native_call()
+        if self.buffer is not None:
+            return openjp2wrap.probe_buffer(self.buffer)
+        return openjp2wrap.probe(self.filename)
+
+    @classmethod
+    def from_file(cls, filename: str,
+                  defer_icc: bool = False) -> "MetadataSnapshot":
+        """Parse the metadata of an image file.
+
+        Args:
+            filename:
+                path to an image file
+            defer_icc:
+                only read the ICC profile if it is needed
+
+        Returns:
+            Snapshot of the metadata found in the file
+
+        """
+        # Imported here so that the metadata library is only loaded when a
+        # file is actually parsed.
+        # pylint: disable=import-outside-toplevel
+        import py3exiv2bind
+        import py3exiv2bind.core
+
+        instrumentation.count_native_call()
+        image = py3exiv2bind.Image(filename)
+
+        def read_icc() -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+            try:
+                instrumentation.count_native_call()
+                return image.icc(), None
+            except py3exiv2bind.core.NoICCError as error:
+                return None, str(error)
+
+        if defer_icc:
+            return cls(
+                filename=filename,
+                metadata=image.metadata,
+                pixel_width=image.pixelWidth,
+                pixel_height=image.pixelHeight,
+                icc_reader=read_icc
+            )
+
+        icc, icc_error = read_icc()
+        return cls(
+            filename=filename,
+            metadata=image.metadata,
+            pixel_width=image.pixelWidth,
+            pixel_height=image.pixelHeight,
+            icc=icc,
+            icc_error=icc_error
+        )
+
+    @classmethod
+    def from_buffer(cls, data: Buffer,
+                    filename: str = "<buffer>") -> "MetadataSnapshot":
+        """Parse the metadata of an image file held in memory.
+
+        The OpenJPEG header is read straight from the buffer without copying
+        it. The metadata library only reads files from disk, so only the
+        regions of the file that hold metadata are written for it, to a
+        sparse temporary file. Buffers that are not TIFF or JPEG 2000 files,
+        or whose headers cannot be followed, are written in full, as are all
+        buffers where sparse files are not available.
+
+        Args:
+            data:
+                content of an image file
+            filename:
+                name to give the file in reports
+
+        Returns:
+            Snapshot of the metadata found in the file
+
+        """
+        # pylint: disable=import-outside-toplevel
+        from uiucprescon.imagevalidate import header
+
+        size = memoryview(data).nbytes
+        ranges: Sequence[Tuple[int, Buffer]] = [(0, data)]
+        if SPARSE_FILES:
+            try:
+                region = header.read_header_buffer(data, filename)
+                size, ranges = region.size, region.ranges
+            except header.InvalidHeader:
+                # Let the metadata library decide what the file is
+                pass
+        snapshot = cls._from_sparse_copy(
+            size, ranges, os.path.splitext(filename)[1]
+        )
+        snapshot.filename = filename
+        snapshot.buffer = data
+        return snapshot
+
+    @classmethod
+    def from_header(cls, filename: str) -> "MetadataSnapshot":
+        """Parse the metadata of an image file without reading pixel data.
+
+        Only the regions of the file that hold metadata are read. They are
+        copied into a sparse temporary file of the same size for the
+        metadata library, and the codestream header is read from memory.
+        Where sparse files are not available, such as on Windows, the
+        metadata library parses the file itself. Its reads are not limited to
+        the metadata and cannot be counted, so bytes_read is left as None.
+
+        Args:
+            filename:
+                path to a TIFF or JPEG 2000 file
+
+        Returns:
+            Snapshot of the metadata found in the file, with the number of
+            bytes read from it when that is known
+
+        """
+        # pylint: disable=import-outside-toplevel
+        from uiucprescon.imagevalidate import header
+
+        region = header.read_header(filename)
+        if SPARSE_FILES:
+            snapshot = cls._from_sparse_copy(
+                region.size, region.ranges, os.path.splitext(filename)[1]
+            )
+            snapshot.bytes_read = region.bytes_read
+        else:
+            snapshot = cls.from_file(filename)
+        snapshot.filename = filename
+        snapshot.buffer = region.prefix()
+        return snapshot
+
+    @classmethod
+    def _from_sparse_copy(cls, size: int,
+                          ranges: Iterable[Tuple[int, Buffer]],
+                          extension: str) -> "MetadataSnapshot":
+        # Parse a temporary file of the given size holding only the ranges.
+        # The gaps between them are left as holes.
+        handle, temp_file = tempfile.mkstemp(suffix=extension)
+        try:
+            with os.fdopen(handle, "wb") as file_handle:
+                file_handle.truncate(size)
+                for offset, data in ranges:
+                    file_handle.seek(offset)
+                    file_handle.write(data)
+            return cls.from_file(temp_file)
+        finally:
+            os.unlink(temp_file)
@@ -0,0 +1,243 @@
+"""Running totals of the results of validating many files."""
+
+import heapq
+import threading
+from typing import Any, Dict, Generic, Hashable, Iterable, Iterator, List, \
+    Optional, Tuple, TypeVar
+
+from uiucprescon.imagevalidate.issues import IssueCategory
+from uiucprescon.imagevalidate.report import Report, ResultCategory
+
+K = TypeVar("K", bound=Hashable)
+
+
+class BoundedCounter(Generic[K]):
+    """Count the most common keys using a fixed amount of memory.
+
+    Uses the Space-Saving algorithm. Counts are exact until more than
+    capacity different keys have been seen. After that the least common key
+    is replaced by each new key, which inherits its count, so counts may be
+    overestimated by up to the value reported by error().
+
+    The least common key is found with a heap, so adding a key takes
+    O(log capacity) time however many different keys are seen.
+    """
+
+    def __init__(self, capacity: int = 1000) -> None:
+        """Set the number of keys to keep.
+
+        Args:
+            capacity:
+                Maximum number of keys counted at once
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._counts: Dict[K, int] = dict()
+        self._errors: Dict[K, int] = dict()
+
+        # Entries of (count, order added, key). Entries are not removed when
+        # the count of a key goes up, so only those matching the current
+        # count are valid. The order keeps keys from being compared.
+        self._heap: List[Tuple[int, int, K]] = list()
+        self._pushed = 0
+
+    def add(self, key: K, count: int = 1) -> None:
+        """Count a key."""
+        if key in self._counts or len(self._counts) < self.capacity:
+            total = self._counts.get(key, 0) + count
+            self._errors.setdefault(key, 0)
+        else:
+            floor, least_common = self._pop_least_common()
+            del self._counts[least_common]
+            del self._errors[least_common]
+            total = floor + count
+            self._errors[key] = floor
+        self._counts[key] = total
+        self._push(total, key)
+
+    def _push(self, count: int, key: K) -> None:
+        self._pushed += 1
+        heapq.heappush(self._heap, (count, self._pushed, key))
+        if len(self._heap) > 2 * self.capacity + 16:
+            # Drop the entries that are out of date
+            self._heap = [
+                (key_count, order, counted_key)
+                for order, (counted_key, key_count)
+                in enumerate(self._counts.items(), start=self._pushed)
+            ]
+            self._pushed += len(self._heap)
+            heapq.heapify(self._heap)
+
+    def _pop_least_common(self) -> Tuple[int, K]:
+        while True:
+            count, _, key = heapq.heappop(self._heap)
+            if self._counts.get(key) == count:
+                return count, key
+
+    def error(self, key: K) -> int:
+        """Get the most that the count of a key may be overestimated by."""
+        return self._errors.get(key, 0)
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[K, int]]:
+        """Get the keys with the highest counts, most common first."""
+        ranked = sorted(
+            self._counts.items(), key=lambda item: item[1], reverse=True
+        )
+        return ranked if n is None else ranked[:n]
+
+    def __len__(self) -> int:
+        """Get the number of keys being counted."""
+        return len(self._counts)
+
+
+class ValidationSummary:
+    """Totals of the reports of a validation run, in constant memory.
+
+    Add reports as they are produced and read the totals at any time. Safe
+    to update from multiple threads.
+    """
+
+    def __init__(self, slowest: int = 10, capacity: int = 1000) -> None:
+        """Start with empty totals.
+
+        Args:
+            slowest:
+                Number of slowest files to keep
+            capacity:
+                Number of distinct fields and values to count exactly
+        """
+        self.slowest = slowest
+        self._lock = threading.Lock()
+        self.files = 0
+        self.valid = 0
+        self.invalid = 0
+        self.errors = 0
+        self._categories: Dict[IssueCategory, int] = dict()
+        self._fields: BoundedCounter[str] = BoundedCounter(capacity)
+        self._values: BoundedCounter[Tuple[str, str, Optional[str]]] = \
+            BoundedCounter(capacity)
+        self._slowest: List[Tuple[float, str]] = list()
+
+    def add(self, report: Report, seconds: Optional[float] = None) -> None:
+        """Include the report of a file in the totals.
+
+        Args:
+            report:
+                Report of the file
+            seconds:
+                How long the file took to validate, if known
+        """
+        with self._lock:
+            self.files += 1
+            if report.valid:
+                self.valid += 1
+            else:
+                self.invalid += 1
+            for issue in report.issue_records():
+                self._categories[issue.category] = \
+                    self._categories.get(issue.category, 0) + 1
+                self._fields.add(issue.field)
+                self._values.add(
+                    (issue.field, _format_value(issue.expected), issue.actual)
+                )
+            self._add_time(report.filename or "", seconds)
+
+    def add_error(self, file: str, seconds: Optional[float] = None) -> None:
+        """Count a file that could not be validated."""
+        with self._lock:
+            self.files += 1
+            self.errors += 1
+            self._add_time(file, seconds)
+
+    def track(self, reports: Iterable[Report]) -> Iterator[Report]:
+        """Pass reports through unchanged, adding each one to the totals.
+
+        The time recorded on each report by Profile is used for the slowest
+        files.
+        """
+        for report in reports:
+            self.add(report, report.seconds)
+            yield report
+
+    def slowest_files(self) -> List[Tuple[str, float]]:
+        """Get the files that took longest to validate, slowest first."""
+        with self._lock:
+            return [
+                (file, seconds)
+                for seconds, file in sorted(self._slowest, reverse=True)
+            ]
+
+    def summary(self, most_common: int = 10) -> Dict[str, Any]:
+        """Get the current totals as JSON compatible values.
+
+        Args:
+            most_common:
+                Number of fields and values to include
+        """
+        slowest_files = self.slowest_files()
+        with self._lock:
+            return {
+                "files": self.files,
+                "valid": self.valid,
+                "invalid": self.invalid,
+                "errors": self.errors,
+                "issues_by_category": {
+                    category.name: count
+                    for category, count in self._categories.items()
+                },
+                "issues_by_field": dict(
+                    self._fields.most_common(most_common)
+                ),
+                "issues_by_value": [
+                    {
+                        "field": field,
+                        "expected": expected,
+                        "actual": actual,
+                        "count": count
+                    }
+                    for (field, expected, actual), count in
+                    self._values.most_common(most_common)
+                ],
+                "slowest_files": [
+                    {"filename": file, "seconds": seconds}
+                    for file, seconds in slowest_files
+                ],
+            }
+
+    def _add_time(self, file: str, seconds: Optional[float]) -> None:
+        if seconds is None or self.slowest < 1:
+            return
+        if len(self._slowest) < self.slowest:
+            heapq.heappush(self._slowest, (seconds, file))
+        else:
+            heapq.heappushpop(self._slowest, (seconds, file))
+
+    def __str__(self) -> str:
+        """Provide summary of the totals."""
+        summary = self.summary()
+        lines = [
+            f"Files: {summary['files']}",
+            f"Valid: {summary['valid']}",
+            f"Invalid: {summary['invalid']}",
+            f"Errors: {summary['errors']}",
+        ]
+        sections = [
+            ("Issues by category", summary["issues_by_category"].items()),
+            ("Issues by field", summary["issues_by_field"].items()),
+            ("Slowest files", [
+                (slow["filename"], f"{slow['seconds']:.3f}s")
+                for slow in summary["slowest_files"]
+            ]),
+        ]
+        for title, rows in sections:
+            if rows:
+                lines.append(f"{title}:")
+                lines.extend(f"  {name}: {value}" for name, value in rows)
+        return "\n".join(lines)
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, ResultCategory):
+        return value.name
+    return str(value)
@@ -8,17 +8,23 @@ def pytest_addoption(parser):
         default=False,
         help="run integration tests"
     )
+    parser.addoption(
+        "--performance",
+        action="store_true",
+        default=False,
+        help="run performance benchmarks"
+    )
 
 
 def pytest_collection_modifyitems(config, items):
-    if config.getoption("--integration"):
-        # --integration given in cli: do not skip integration tests
-        return
-
-    skip_integration = pytest.mark.skip(
-        reason="skipped integration tests. Use --integration option to run")
+    for marker in ["integration", "performance"]:
+        if config.getoption(f"--{marker}"):
+            # --<marker> given in cli: do not skip these tests
+            continue
 
-    for item in items:
-        if "integration" in item.keywords:
-            item.add_marker(skip_integration)
+        skip_marked = pytest.mark.skip(
+            reason=f"skipped {marker} tests. Use --{marker} option to run")
 
+        for item in items:
+            if marker in item.keywords:
+                item.add_marker(skip_marked)
@@ -2,6 +2,10 @@
 #include "exceptions.h"
 #include <catch2/catch_test_macros.hpp>
 
+#include <fstream>
+#include <iterator>
+#include <vector>
+
 
 TEST_CASE("utils"){
     open_jpeg_version();
@@ -13,6 +17,9 @@ SCENARIO("Color space"){ // NOLINT
             THEN("I get the value sRGB"){
                 REQUIRE(color_space(valid_srgb_jp2) == "sRGB");
             }
+            THEN("opting in to decoding gives the same value"){
+                REQUIRE(color_space(valid_srgb_jp2, true) == "sRGB");
+            }
         }
         WHEN("the file is valid"){
             std::string invalid_image = TEST_IMAGE_PATH "/colorspace/nosuchfile.jp2";
@@ -39,4 +46,55 @@ SCENARIO("Bitdepth")
     }
 
 
-}
\ No newline at end of file
+}
+
+SCENARIO("Probe")
+{
+    GIVEN("A jp2 file encoded in sRGB with 8 bit color depth") {
+        const std::string valid_srgb_jp2 = TEST_IMAGE_PATH "/colorspace/0000001.jp2";
+        WHEN("the codestream is probed") {
+            const codestream_info info = probe(valid_srgb_jp2);
+            THEN("all the values are read from the one header"){
+                REQUIRE(info.color_space == "sRGB");
+                REQUIRE(info.num_components == info.precision.size());
+                REQUIRE(info.precision.at(0) == 8);
+                REQUIRE(info.width > 0);
+                REQUIRE(info.height > 0);
+                REQUIRE(info.resolution_levels > 0);
+            }
+        }
+    }
+    GIVEN("A file that does not exist") {
+        const std::string invalid_image = TEST_IMAGE_PATH "/colorspace/nosuchfile.jp2";
+        THEN("I get an error"){
+            REQUIRE_THROWS_AS(probe(invalid_image), InvalidFileException);
+        }
+    }
+}
+
+SCENARIO("Probe a buffer")
+{
+    GIVEN("A jp2 file read into memory") {
+        const std::string valid_srgb_jp2 = TEST_IMAGE_PATH "/colorspace/0000001.jp2";
+        std::ifstream file(valid_srgb_jp2, std::ios::binary);
+        const std::vector<unsigned char> data(
+                (std::istreambuf_iterator<char>(file)),
+                std::istreambuf_iterator<char>());
+        WHEN("the codestream is probed from the buffer") {
+            const codestream_info info = probe_buffer(data.data(), data.size());
+            THEN("the values match probing the file"){
+                const codestream_info expected = probe(valid_srgb_jp2);
+                REQUIRE(info.color_space == expected.color_space);
+                REQUIRE(info.precision == expected.precision);
+                REQUIRE(info.width == expected.width);
+                REQUIRE(info.height == expected.height);
+            }
+        }
+    }
+    GIVEN("A buffer that does not hold a jp2 file") {
+        const std::vector<unsigned char> data(64, 0);
+        THEN("I get an error"){
+            REQUIRE_THROWS_AS(probe_buffer(data.data(), data.size()), InvalidFileException);
+        }
+    }
+}
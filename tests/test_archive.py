@@ -0,0 +1,163 @@
+import io
+import struct
+import tarfile
+import threading
+import zipfile
+
+from unittest.mock import Mock
+
+import py3exiv2bind
+import pytest
+
+from uiucprescon import imagevalidate
+from uiucprescon.imagevalidate import archive, header, profiles
+from uiucprescon.imagevalidate.rules import Rule
+
+
+class RecordingProfile(profiles.AbsProfile):
+    valid_extensions = {".tif"}
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.seen = {}
+
+    @staticmethod
+    def profile_name() -> str:
+        return "Recording"
+
+    def validate_buffer(self, data, filename="<buffer>"):
+        if data == b"broken":
+            raise ValueError("unable to read")
+        with self.lock:
+            self.seen[filename] = bytes(data)
+        report = imagevalidate.Report()
+        report.filename = filename
+        return report
+
+
+MEMBERS = {
+    "package/00000001.tif": b"first",
+    "package/00000002.TIF": b"second",
+    "package/checksum.md5": b"not an image",
+}
+
+
+def create_zip(path, members):
+    with zipfile.ZipFile(path, "w") as zip_file:
+        for name, data in members.items():
+            zip_file.writestr(name, data)
+    return str(path)
+
+
+def create_tar(path, members):
+    with tarfile.open(path, "w:gz") as tar_file:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar_file.addfile(info, io.BytesIO(data))
+    return str(path)
+
+
+@pytest.mark.parametrize("create", [create_zip, create_tar])
+def test_validate_archive(tmp_path, create):
+    archive_file = create(tmp_path / "package.archive", MEMBERS)
+    validation_profile = RecordingProfile()
+    profile = imagevalidate.Profile(validation_profile)
+    reports = list(profile.validate_archive(archive_file, workers=2))
+    expected = {
+        f"{archive_file}/package/00000001.tif": b"first",
+        f"{archive_file}/package/00000002.TIF": b"second",
+    }
+    assert sorted(report.filename for report in reports) == sorted(expected)
+    assert validation_profile.seen == expected
+
+
+@pytest.mark.parametrize("create", [create_zip, create_tar])
+def test_member_errors(tmp_path, create):
+    archive_file = create(
+        tmp_path / "package.archive",
+        {**MEMBERS, "package/00000003.tif": b"broken"}
+    )
+    profile = imagevalidate.Profile(RecordingProfile())
+    with pytest.raises(archive.ArchiveMemberError) as error:
+        list(profile.validate_archive(archive_file))
+    assert error.value.member == "package/00000003.tif"
+
+    results = list(
+        profile.validate_archive(archive_file, return_exceptions=True)
+    )
+    errors = [
+        result for result in results
+        if isinstance(result, archive.ArchiveMemberError)
+    ]
+    assert len(results) == 3
+    assert len(errors) == 1
+    assert "unable to read" in str(errors[0])
+
+
+@pytest.mark.parametrize("create", [create_zip, create_tar])
+def test_fail_fast(tmp_path, create):
+    class FailFastProfile(RecordingProfile):
+        def validate_buffer(self, data, filename="<buffer>",
+                            fail_fast=False):
+            with self.lock:
+                self.seen[filename] = fail_fast
+            report = imagevalidate.Report()
+            report.filename = filename
+            return report
+
+    archive_file = create(tmp_path / "package.archive", MEMBERS)
+    validation_profile = FailFastProfile()
+    profile = imagevalidate.Profile(validation_profile, fail_fast=True)
+    list(profile.validate_archive(archive_file))
+    assert set(validation_profile.seen.values()) == {True}
+    assert len(validation_profile.seen) == 2
+
+
+def test_not_an_archive(tmp_path):
+    not_archive = tmp_path / "00000001.tif"
+    not_archive.write_bytes(b"image")
+    assert not archive.is_archive(str(not_archive))
+    profile = imagevalidate.Profile(RecordingProfile())
+    with pytest.raises(ValueError):
+        list(profile.validate_archive(str(not_archive)))
+
+
+class CreatorProfile(profiles.AbsProfile):
+    valid_extensions = {".tif"}
+    rules = [Rule("Xmp.dc.creator")]
+
+    @staticmethod
+    def profile_name() -> str:
+        return "Creator"
+
+
+def test_pixels_are_not_written_to_disk(tmp_path, monkeypatch):
+    xmp = b"<x:xmpmeta>creator</x:xmpmeta>"
+    pixels = b"\xaa" * 10000
+    tiff = b"II*\0" + struct.pack("<I", 8 + len(pixels) + len(xmp)) + \
+        pixels + xmp + struct.pack("<H", 1) + \
+        struct.pack("<HHII", 700, 1, len(xmp), 8 + len(pixels)) + \
+        struct.pack("<I", 0)
+    archive_file = create_zip(
+        tmp_path / "package.zip", {"package/00000001.tif": tiff}
+    )
+    written = []
+
+    def parse(filename):
+        with open(filename, "rb") as file_handle:
+            written.append(file_handle.read())
+        return Mock(
+            metadata={"Xmp.dc.creator": "someone"},
+            pixelWidth=1,
+            pixelHeight=1,
+            icc=Mock(return_value={})
+        )
+
+    monkeypatch.setattr(py3exiv2bind, "Image", parse)
+    profile = imagevalidate.Profile(CreatorProfile())
+    reports = list(profile.validate_archive(archive_file))
+    assert [report.valid for report in reports] == [True]
+    assert len(written) == 1
+    assert xmp in written[0]
+    assert b"\xaa" not in written[0][header.SIGNATURE_SIZE:]
@@ -0,0 +1,206 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from uiucprescon import imagevalidate
+from uiucprescon.imagevalidate import batch, profiles
+
+
+class NamedReportProfile(profiles.AbsProfile):
+    @staticmethod
+    def profile_name() -> str:
+        return "Named report"
+
+    def validate(self, file):
+        report = imagevalidate.Report()
+        report.filename = file
+        return report
+
+
+class BlockingProfile(NamedReportProfile):
+    def __init__(self):
+        self.release = threading.Event()
+
+    def validate(self, file):
+        self.release.wait(5)
+        return super().validate(file)
+
+
+def square(value):
+    return value * value
+
+
+async def square_async(value):
+    await asyncio.sleep(0)
+    return value * value
+
+
+def create_files(path, count):
+    files = []
+    for i in range(count):
+        image = path / f"{i}.tif"
+        image.write_bytes(b"")
+        files.append(str(image))
+    return files
+
+
+async def collect(results):
+    return [result async for result in results]
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_imap_unordered_all_results(executor):
+    results = batch.imap_unordered(square, range(10), workers=2,
+                                   executor=executor)
+    assert sorted(results) == [value * value for value in range(10)]
+
+
+def test_imap_unordered_invalid_executor():
+    with pytest.raises(ValueError):
+        list(batch.imap_unordered(square, range(3), executor="spam"))
+
+
+def test_imap_unordered_limits_items_in_flight():
+    pulled = []
+
+    def items():
+        for value in range(100):
+            pulled.append(value)
+            yield value
+
+    results = batch.imap_unordered(square, items(), workers=2)
+    next(results)
+    assert len(pulled) <= 3
+    results.close()
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_validate_many(tmp_path, executor):
+    files = create_files(tmp_path, 5)
+
+    profile = imagevalidate.Profile(NamedReportProfile())
+    reports = list(profile.validate_many(files, workers=2, executor=executor))
+    assert sorted(report.filename for report in reports) == files
+    assert all(report.valid for report in reports)
+
+
+def test_validate_many_missing_file():
+    profile = imagevalidate.Profile(NamedReportProfile())
+    with pytest.raises(FileNotFoundError):
+        list(profile.validate_many(["invalid_file.tif"]))
+
+
+def test_amap_unordered_all_results():
+    results = batch.amap_unordered(square_async, range(10), concurrency=3)
+    assert sorted(asyncio.run(collect(results))) == \
+        [value * value for value in range(10)]
+
+
+def test_amap_unordered_async_items():
+    async def items():
+        for value in range(5):
+            yield value
+
+    results = batch.amap_unordered(square_async, items(), concurrency=2)
+    assert sorted(asyncio.run(collect(results))) == [0, 1, 4, 9, 16]
+
+
+def test_amap_unordered_limits_calls_in_flight():
+    running = 0
+    most_running = 0
+
+    async def track(value):
+        nonlocal running, most_running
+        running += 1
+        most_running = max(most_running, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+        return value
+
+    asyncio.run(collect(
+        batch.amap_unordered(track, range(20), concurrency=4)
+    ))
+    assert most_running == 4
+
+
+def test_validate_async(tmp_path):
+    file = create_files(tmp_path, 1)[0]
+    profile = imagevalidate.Profile(NamedReportProfile())
+    report = asyncio.run(profile.validate_async(file))
+    assert report.filename == file
+
+
+def test_validate_async_timeout(tmp_path):
+    file = create_files(tmp_path, 1)[0]
+    validation_profile = BlockingProfile()
+    profile = imagevalidate.Profile(validation_profile)
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    try:
+        with pytest.raises(TimeoutError, match="0.tif"):
+            asyncio.run(
+                profile.validate_async(file, timeout=0.01, executor=pool)
+            )
+    finally:
+        validation_profile.release.set()
+        pool.shutdown()
+
+
+def test_validate_stream_timeout_starts_with_the_worker(tmp_path):
+    slow, fast = create_files(tmp_path, 2)
+    validated = []
+
+    class SlowProfile(NamedReportProfile):
+        def validate(self, file):
+            validated.append(file)
+            if file == slow:
+                time.sleep(1)
+            return super().validate(file)
+
+    profile = imagevalidate.Profile(SlowProfile())
+    results = asyncio.run(collect(profile.validate_stream(
+        [slow, fast], concurrency=1, timeout=0.3, return_exceptions=True
+    )))
+    assert isinstance(results[0], TimeoutError)
+    assert results[1].filename == fast
+    assert validated == [slow, fast]
+
+
+def test_validate_stream(tmp_path):
+    files = create_files(tmp_path, 8)
+    profile = imagevalidate.Profile(NamedReportProfile())
+    reports = asyncio.run(
+        collect(profile.validate_stream(files, concurrency=3))
+    )
+    assert sorted(report.filename for report in reports) == files
+
+
+def test_validate_stream_return_exceptions(tmp_path):
+    files = create_files(tmp_path, 2) + ["invalid_file.tif"]
+    profile = imagevalidate.Profile(NamedReportProfile())
+    results = asyncio.run(collect(profile.validate_stream(
+        files, concurrency=2, return_exceptions=True
+    )))
+    errors = [
+        result for result in results if isinstance(result, Exception)
+    ]
+    assert len(results) == 3
+    assert len(errors) == 1
+    assert isinstance(errors[0], FileNotFoundError)
+
+
+def test_validate_stream_cancels_when_closed(tmp_path):
+    files = create_files(tmp_path, 4)
+    validation_profile = BlockingProfile()
+    profile = imagevalidate.Profile(validation_profile)
+
+    async def first_report():
+        stream = profile.validate_stream(files, concurrency=1)
+        validation_profile.release.set()
+        report = await stream.__anext__()
+        await stream.aclose()
+        return report
+
+    assert asyncio.run(first_report()).filename in files
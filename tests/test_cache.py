@@ -0,0 +1,139 @@
+import os
+import pickle
+import subprocess
+import sys
+from unittest.mock import Mock
+
+import pytest
+
+from uiucprescon import imagevalidate
+from uiucprescon.imagevalidate import IssueCategory
+from uiucprescon.imagevalidate.cache import ValidationCache
+from uiucprescon.imagevalidate.report import Result, ResultCategory
+
+
+@pytest.fixture
+def image_file(tmp_path):
+    image = tmp_path / "0000001.tif"
+    image.write_bytes(b"spam")
+    return str(image)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    validation_cache = ValidationCache(str(tmp_path / "cache.sqlite"))
+    yield validation_cache
+    validation_cache.close()
+
+
+def create_report(filename):
+    report = imagevalidate.Report()
+    report.filename = filename
+    report._properties = {
+        "Xmp.dc.creator": Result(expected=ResultCategory.ANY, actual=None),
+        "Exif.Image.XResolution": Result(expected="400/1", actual="300/1"),
+    }
+    for key, result in report._properties.items():
+        category = IssueCategory.MISSING_FIELD if result.actual is None \
+            else IssueCategory.INVALID_DATA
+        report.add_issue(key, category, result)
+    return report
+
+
+def test_round_trip(cache, image_file):
+    cache.put(image_file, "spam", create_report(image_file))
+    report = cache.get(image_file, "spam")
+    assert report.filename == image_file
+    assert not report.valid
+    assert report.issue_records(IssueCategory.INVALID_DATA) == \
+        create_report(image_file).issue_records(IssueCategory.INVALID_DATA)
+    assert report._properties["Xmp.dc.creator"].expected is \
+        ResultCategory.ANY
+
+
+def test_miss_for_other_profile(cache, image_file):
+    cache.put(image_file, "spam", create_report(image_file))
+    assert cache.get(image_file, "eggs") is None
+
+
+def test_miss_after_file_changes(cache, image_file):
+    cache.put(image_file, "spam", create_report(image_file))
+    with open(image_file, "ab") as file_handle:
+        file_handle.write(b"eggs")
+    assert cache.get(image_file, "spam") is None
+
+
+def test_verify_content_detects_same_size_change(tmp_path, image_file):
+    cache = ValidationCache(str(tmp_path / "cache.sqlite"),
+                            verify_content=True)
+    cache.put(image_file, "spam", create_report(image_file))
+    stat = os.stat(image_file)
+    with open(image_file, "wb") as file_handle:
+        file_handle.write(b"eggs")
+    os.utime(image_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert cache.get(image_file, "spam") is None
+    cache.close()
+
+
+def test_eviction_keeps_size_under_limit(tmp_path):
+    cache = ValidationCache(str(tmp_path / "cache.sqlite"), max_size=1000)
+    for i in range(20):
+        image = tmp_path / f"{i}.tif"
+        image.write_bytes(b"spam")
+        cache.put(str(image), "spam", create_report(str(image)))
+    assert 0 < cache.size() <= 1000
+    assert cache.get(str(tmp_path / "19.tif"), "spam") is not None
+    assert cache.get(str(tmp_path / "0.tif"), "spam") is None
+    cache.close()
+
+
+def test_can_be_pickled(cache, image_file):
+    cache.put(image_file, "spam", create_report(image_file))
+    restored = pickle.loads(pickle.dumps(cache))
+    assert restored.get(image_file, "spam") is not None
+    restored.close()
+
+
+def test_profile_uses_cache(cache, image_file):
+    validation_profile = Mock(
+        cache_key=Mock(return_value="spam"),
+        validate=Mock(side_effect=create_report)
+    )
+    profile = imagevalidate.Profile(validation_profile, cache=cache)
+    first = profile.validate(image_file)
+    second = profile.validate(image_file)
+    validation_profile.validate.assert_called_once_with(image_file)
+    assert first.issues() == second.issues()
+
+
+def test_file_changed_while_validating_is_not_reused(cache, image_file):
+    def change_then_validate(file):
+        with open(file, "ab") as file_handle:
+            file_handle.write(b"eggs")
+        return create_report(file)
+
+    validation_profile = Mock(
+        cache_key=Mock(return_value="spam"),
+        validate=Mock(side_effect=change_then_validate)
+    )
+    profile = imagevalidate.Profile(validation_profile, cache=cache)
+    profile.validate(image_file)
+    validation_profile.validate.side_effect = create_report
+    profile.validate(image_file)
+    assert validation_profile.validate.call_count == 2
+
+
+def test_import_does_not_load_cache():
+    result = subprocess.run(
+        [
+            sys.executable, "-c",
+            "import sys\n"
+            "import uiucprescon.imagevalidate\n"
+            "print('sqlite3' in sys.modules, "
+            "'uiucprescon.imagevalidate.cache' in sys.modules)"
+        ],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    assert result.stdout.strip() == "False False"
@@ -0,0 +1,92 @@
+import io
+
+import pytest
+
+from uiucprescon import imagevalidate
+from uiucprescon.imagevalidate import cli
+from uiucprescon.imagevalidate.report import Result
+
+
+def test_walk_files(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "b").mkdir()
+    (tmp_path / "1.tif").write_bytes(b"")
+    (tmp_path / "a" / "2.tif").write_bytes(b"")
+    (tmp_path / "a" / "b" / "3.jp2").write_bytes(b"")
+    found = sorted(cli.walk_files(str(tmp_path)))
+    assert found == sorted([
+        str(tmp_path / "1.tif"),
+        str(tmp_path / "a" / "2.tif"),
+        str(tmp_path / "a" / "b" / "3.jp2"),
+    ])
+
+
+def test_locate_files_filters_directories_by_extension(tmp_path):
+    (tmp_path / "1.tif").write_bytes(b"")
+    (tmp_path / "2.TIF").write_bytes(b"")
+    (tmp_path / "notes.txt").write_bytes(b"")
+    found = cli.locate_files(
+        [str(tmp_path)], extensions={".tif"}, stdin=io.StringIO()
+    )
+    assert sorted(found) == [str(tmp_path / "1.tif"), str(tmp_path / "2.TIF")]
+
+
+def test_locate_files_reads_stdin():
+    stdin = io.StringIO("spam.tif\n\neggs.tif\n")
+    found = cli.locate_files(["-"], extensions={".tif"}, stdin=stdin)
+    assert list(found) == ["spam.tif", "eggs.tif"]
+
+
+def test_list_profiles(capsys):
+    assert cli.main(["--list-profiles"]) == 0
+    printed = capsys.readouterr().out.splitlines()
+    assert set(printed) == imagevalidate.available_profiles()
+
+
+def test_unknown_profile():
+    with pytest.raises(SystemExit) as error:
+        cli.main(["spam", "image.tif"])
+    assert error.value.code == 2
+
+
+def test_invalid_file_sets_exit_status(monkeypatch, capsys):
+    invalid = imagevalidate.Report()
+    invalid.filename = "image.tif"
+    invalid.add_issue(
+        "spam",
+        imagevalidate.IssueCategory.MISSING_FIELD,
+        Result(expected="eggs", actual=None)
+    )
+    monkeypatch.setattr(
+        cli, "validate_file", lambda profile, file: (file, invalid, None)
+    )
+    assert cli.main(["HathiTrust Tiff", "image.tif"]) == 1
+    assert capsys.readouterr().out == \
+        'invalid\timage.tif\tNo metadata field for "spam" found in file.\n'
+
+
+def test_json_output(monkeypatch, capsys):
+    valid = imagevalidate.Report()
+    valid.filename = "image.tif"
+    monkeypatch.setattr(
+        cli, "validate_file", lambda profile, file: (file, valid, None)
+    )
+    assert cli.main(["--json", "HathiTrust Tiff", "image.tif"]) == 0
+    line = capsys.readouterr().out.strip()
+    assert imagevalidate.Report.from_json(line).filename == "image.tif"
+
+
+def test_missing_file_is_reported_as_error(capsys):
+    assert cli.main(["HathiTrust Tiff", "invalid_file.tif"]) == 1
+    assert capsys.readouterr().out.startswith("error\tinvalid_file.tif\t")
+
+
+def test_summary(monkeypatch, capsys):
+    valid = imagevalidate.Report()
+    monkeypatch.setattr(
+        cli, "validate_file", lambda profile, file: (file, valid, None)
+    )
+    assert cli.main(
+        ["--summary", "HathiTrust Tiff", "1.tif", "2.tif"]
+    ) == 0
+    assert "Files: 2" in capsys.readouterr().err
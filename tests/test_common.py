@@ -1,47 +1,114 @@
-from unittest.mock import MagicMock, Mock
+from unittest.mock import Mock
 
 import pytest
 
 from uiucprescon.imagevalidate import common
-import py3exiv2bind
+from uiucprescon.imagevalidate.snapshot import MetadataSnapshot
+
+
+def create_snapshot(icc):
+    return MetadataSnapshot(
+        filename="dummy.tif",
+        metadata={},
+        pixel_width=0,
+        pixel_height=0,
+        icc=icc
+    )
 
 
 class TestColorSpaceIccPrefCcmCheck:
 
-    def test_no_pref_ccm_raises(self, monkeypatch):
+    def test_no_pref_ccm_raises(self):
         tester = common.ColorSpaceIccPrefCcmCheck()
-        monkeypatch.setattr(
-            py3exiv2bind,
-            "Image",
-            Mock(return_value=Mock(icc=Mock(return_value={})))
-        )
         with pytest.raises(common.InvalidStrategy) as e:
-            tester.check("dummy.tif")
-            assert "No pref_ccm key found" in str(e)
+            tester.check(create_snapshot(icc={}))
+        assert "No pref_ccm key found" in str(e.value)
 
-    def test_valid_pref_ccm(self, monkeypatch):
+    def test_valid_pref_ccm(self):
         tester = common.ColorSpaceIccPrefCcmCheck()
-        monkeypatch.setattr(
-            py3exiv2bind,
-            "Image",
-            Mock(
-                return_value=Mock(
-                    icc=Mock(return_value={'pref_ccm': Mock(value=b'spam')})
-                )
-            )
-        )
-        tester.check("dummy.tif")
+        snapshot = create_snapshot(icc={'pref_ccm': Mock(value=b'spam')})
+        assert tester.check(snapshot) == "spam"
+
+    def test_no_icc_raises(self):
+        tester = common.ColorSpaceIccPrefCcmCheck()
+        with pytest.raises(common.InvalidStrategy):
+            tester.check(create_snapshot(icc=None))
 
 
 class TestColorSpaceIccDeviceModelCheck:
-    def test_no_device_model_raises(self, monkeypatch):
+    def test_no_device_model_raises(self):
         tester = common.ColorSpaceIccDeviceModelCheck()
+        with pytest.raises(common.InvalidStrategy) as e:
+            tester.check(create_snapshot(icc={}))
+        assert "No device_model key found" in str(e.value)
+
+
+class TestColorSpaceOJPCheck:
+    def test_uses_codestream_probe(self):
+        tester = common.ColorSpaceOJPCheck()
+        snapshot = create_snapshot(icc=None)
+        snapshot.codestream = Mock(color_space="sRGB")
+        assert tester.check(snapshot) == "sRGB"
+
 
-        monkeypatch.setattr(
-            py3exiv2bind,
-            "Image",
-            Mock(return_value=Mock(icc=Mock(return_value={})))
+class FailingCheck(common.AbsColorSpaceExtractor):
+    def __init__(self):
+        self.calls = 0
+
+    def check(self, image):
+        self.calls += 1
+        raise common.InvalidStrategy("nothing to read")
+
+
+class FixedCheck(common.AbsColorSpaceExtractor):
+    def __init__(self, color_space):
+        self.color_space = color_space
+        self.calls = 0
+
+    def check(self, image):
+        self.calls += 1
+        return self.color_space
+
+
+class TestColorSpaceStrategyChain:
+    def test_reports_failures_of_higher_priority(self, capsys):
+        chain = common.ColorSpaceStrategyChain([
+            FailingCheck(), FixedCheck("sRGB")
+        ])
+        resolution = chain.resolve(create_snapshot(icc=None))
+        assert resolution.color_space == "sRGB"
+        assert resolution.strategy == "FixedCheck"
+        assert resolution.failures == (
+            common.StrategyFailure("FailingCheck", "nothing to read"),
         )
-        with pytest.raises(common.InvalidStrategy) as e:
-            tester.check("dummy.tif")
-            assert "No device_model key found" in str(e)
+        assert capsys.readouterr().err == ""
+
+    def test_no_strategy_succeeds(self):
+        chain = common.ColorSpaceStrategyChain([FailingCheck()])
+        resolution = chain.resolve(create_snapshot(icc=None))
+        assert resolution.color_space is None
+        assert len(resolution.failures) == 1
+
+    def test_stops_after_highest_priority_success(self):
+        preferred = FixedCheck("sRGB")
+        fallback = FixedCheck("Adobe RGB")
+        chain = common.ColorSpaceStrategyChain([preferred, fallback])
+        chain.resolve(create_snapshot(icc=None))
+        assert fallback.calls == 0
+
+    def test_result_does_not_depend_on_earlier_files(self):
+        chain = common.ColorSpaceStrategyChain([
+            common.ColorSpaceIccDeviceModelCheck(),
+            common.ColorSpaceIccPrefCcmCheck(),
+        ])
+        snapshot = create_snapshot(icc={
+            "device_model": Mock(value=b"sRGB"),
+            "pref_ccm": Mock(value=b"Lino"),
+        })
+        first = chain.resolve(snapshot)
+        for _ in range(20):
+            chain.resolve(
+                create_snapshot(icc={"pref_ccm": Mock(value=b"Lino")})
+            )
+        assert chain.resolve(snapshot) == first
+        assert first.color_space == "sRGB"
@@ -0,0 +1,204 @@
+import concurrent.futures
+import pickle
+import textwrap
+import time
+
+import pytest
+
+from uiucprescon.imagevalidate import IssueCategory, cli
+from uiucprescon.imagevalidate.profiles import declarative
+from uiucprescon.imagevalidate.snapshot import MetadataSnapshot
+
+DEFINITIONS = textwrap.dedent("""
+    [[profiles]]
+    name = "Example 400 ppi"
+    extensions = [".TIF"]
+
+    [[profiles.rules]]
+    field = "Xmp.dc.creator"
+
+    [[profiles.rules]]
+    field = "Exif.Image.XResolution"
+    equals = "400/1"
+
+    [[profiles.rules]]
+    field = "Exif.Image.Model"
+    matches = "Scanner [0-9]+"
+
+    [[profiles.rules]]
+    field = "Exif.Image.Compression"
+    one_of = ["1", "5"]
+
+    [[profiles.rules]]
+    field = "Pixel on longest angle"
+    derive = "longest_side"
+    range = {min = 3000, max = 6000}
+
+    [[profiles]]
+    name = "Example 300 ppi"
+    extends = "Example 400 ppi"
+
+    [[profiles.rules]]
+    field = "Exif.Image.XResolution"
+    equals = "300/1"
+""")
+
+VALID_METADATA = {
+    "Xmp.dc.creator": "someone",
+    "Exif.Image.XResolution": "400/1",
+    "Exif.Image.Model": "Scanner 9000",
+    "Exif.Image.Compression": "5",
+}
+
+
+@pytest.fixture
+def definition_file(tmp_path):
+    path = tmp_path / "profiles.toml"
+    path.write_text(DEFINITIONS)
+    return str(path)
+
+
+def validate(profile_class, metadata, width=4000, height=3000):
+    return profile_class().validate_snapshot(
+        MetadataSnapshot("dummy.tif", metadata, width, height)
+    )
+
+
+def test_load_profiles(definition_file):
+    profiles = declarative.load_profiles(definition_file)
+    assert set(profiles) == {"Example 400 ppi", "Example 300 ppi"}
+    profile = profiles["Example 300 ppi"]
+    assert profile.profile_name() == "Example 300 ppi"
+    assert profile.valid_extensions == {".tif"}
+    assert [rule.field for rule in profile.rules] == [
+        "Xmp.dc.creator",
+        "Exif.Image.XResolution",
+        "Exif.Image.Model",
+        "Exif.Image.Compression",
+        "Pixel on longest angle",
+    ]
+
+
+def test_compiled_checks(definition_file):
+    profile = declarative.load_profiles(definition_file)["Example 400 ppi"]
+    assert validate(profile, VALID_METADATA).valid
+
+    report = validate(
+        profile,
+        {
+            **VALID_METADATA,
+            "Exif.Image.Model": "Camera 9000",
+            "Exif.Image.Compression": "7",
+        },
+        width=2000,
+        height=1000
+    )
+    issues = {issue.field: issue for issue in report.issue_records()}
+    assert set(issues) == {
+        "Exif.Image.Model",
+        "Exif.Image.Compression",
+        "Pixel on longest angle",
+    }
+    assert all(
+        issue.category == IssueCategory.INVALID_DATA
+        for issue in issues.values()
+    )
+    assert issues["Pixel on longest angle"].expected == "3000 to 6000"
+    assert issues["Exif.Image.Compression"].expected == "one of 1, 5"
+
+
+def test_loaded_profiles_are_cached(definition_file):
+    first = declarative.load_profiles(definition_file)
+    second = declarative.load_profiles(definition_file)
+    assert first == second
+    assert first["Example 400 ppi"].rules[2].matcher is \
+        first["Example 300 ppi"].rules[2].matcher
+
+
+def test_profiles_can_be_pickled(definition_file):
+    profile = declarative.load_profiles(definition_file)["Example 300 ppi"]
+    restored = pickle.loads(pickle.dumps(profile()))
+    assert type(restored) is profile
+
+
+def test_cache_key_changes_with_definition():
+    def compile_with_resolution(resolution):
+        return declarative.compile_profiles({"profiles": [{
+            "name": "Example",
+            "rules": [
+                {"field": "Exif.Image.XResolution", "equals": resolution},
+            ],
+        }]})["Example"]
+
+    first = compile_with_resolution("400/1")
+    edited = compile_with_resolution("300/1")
+    assert first.profile_name() == edited.profile_name()
+    assert first.cache_key() != edited.cache_key()
+    assert compile_with_resolution("400/1").cache_key() == first.cache_key()
+
+
+def test_compiled_once_by_threads(monkeypatch):
+    compile_rule = declarative._compile_rule
+
+    def slow_compile_rule(profile, rule):
+        time.sleep(0.01)
+        return compile_rule(profile, rule)
+
+    monkeypatch.setattr(declarative, "_compile_rule", slow_compile_rule)
+    definition = {
+        "name": "Compiled by threads",
+        "rules": [{"field": "Xmp.dc.creator"}],
+    }
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        classes = set(pool.map(
+            lambda _: declarative.compile_profile(definition), range(8)
+        ))
+    assert len(classes) == 1
+
+
+def test_yaml_definitions():
+    pytest.importorskip("yaml")
+    profiles = declarative.loads_yaml(textwrap.dedent("""
+        profiles:
+          - name: Example
+            extensions: [.jp2]
+            rules:
+              - field: Exif.Image.XResolution
+                equals: 400/1
+              - field: Pixel on longest angle
+                derive: longest_side
+                range: {min: 3000}
+    """))
+    assert validate(profiles["Example"], {
+        "Exif.Image.XResolution": "400/1"
+    }).valid
+
+
+@pytest.mark.parametrize("rule", [
+    '{field = "Exif.Image.Model", equals = "a", matches = "b"}',
+    '{field = "Exif.Image.Model", unknown = "a"}',
+    '{field = "Exif.Image.Model", derive = "unknown"}',
+    '{field = "Exif.Image.Model", matches = "("}',
+    '{field = "Exif.Image.Model", range = {}}',
+    '{equals = "a"}',
+])
+def test_invalid_rules(rule):
+    with pytest.raises(declarative.ProfileDefinitionError):
+        declarative.loads_toml(
+            f'[[profiles]]\nname = "Invalid"\nrules = [{rule}]\n'
+        )
+
+
+def test_extending_itself():
+    with pytest.raises(declarative.ProfileDefinitionError):
+        declarative.compile_profiles({"profiles": [
+            {"name": "a", "extends": "b", "rules": []},
+            {"name": "b", "extends": "a", "rules": []},
+        ]})
+
+
+def test_cli_profile_file(definition_file, capsys):
+    assert cli.main(
+        ["--profile-file", definition_file, "--list-profiles"]
+    ) == 0
+    assert "Example 300 ppi" in capsys.readouterr().out.splitlines()
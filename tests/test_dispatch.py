@@ -0,0 +1,119 @@
+import subprocess
+import sys
+
+import pytest
+
+from uiucprescon import imagevalidate
+from uiucprescon.imagevalidate import cli, dispatch, header, profiles
+
+TIFF_DATA = b"II*\0\x08\0\0\0"
+JP2_DATA = header.JP2_SIGNATURE + b"\0\0\0\x14ftypjp2 "
+
+
+class RecordingProfile(profiles.AbsProfile):
+    def __init__(self, name, extensions):
+        self.name = name
+        self.valid_extensions = extensions
+        self.validated = []
+
+    def profile_name(self) -> str:
+        return self.name
+
+    def validate(self, file):
+        self.validated.append(file)
+        report = imagevalidate.Report()
+        report.filename = file
+        return report
+
+
+@pytest.fixture
+def tiff_profile():
+    return RecordingProfile("Tiff", {".tif"})
+
+
+@pytest.fixture
+def jp2_profile():
+    return RecordingProfile("JP2", {".JP2"})
+
+
+@pytest.mark.parametrize("data, file_format", [
+    (b"II*\0", header.TIFF),
+    (b"MM\0*", header.TIFF),
+    (b"II+\0", header.TIFF),
+    (JP2_DATA, header.JP2),
+    (b"\xff\xd8\xff\xe0", None),
+    (b"", None),
+])
+def test_sniff(data, file_format):
+    assert header.sniff(data) == file_format
+
+
+def test_files_are_routed_by_signature(tmp_path, tiff_profile,
+                                       jp2_profile):
+    tiff_file = tmp_path / "0000001.tif"
+    tiff_file.write_bytes(TIFF_DATA)
+    misnamed_jp2 = tmp_path / "0000002.tif"
+    misnamed_jp2.write_bytes(JP2_DATA)
+
+    dispatcher = imagevalidate.Dispatcher([tiff_profile, jp2_profile])
+    assert dispatcher.profile_for(str(misnamed_jp2)) is jp2_profile
+    reports = list(dispatcher.validate_many(
+        [str(tiff_file), str(misnamed_jp2)], workers=2
+    ))
+    assert len(reports) == 2
+    assert tiff_profile.validated == [str(tiff_file)]
+    assert jp2_profile.validated == [str(misnamed_jp2)]
+    assert dispatcher.valid_extensions == {".tif", ".JP2"}
+
+
+def test_unsupported_files_are_rejected(tmp_path, tiff_profile):
+    jpeg_file = tmp_path / "0000001.tif"
+    jpeg_file.write_bytes(b"\xff\xd8\xff\xe0" + bytes(16))
+    jp2_file = tmp_path / "0000002.jp2"
+    jp2_file.write_bytes(JP2_DATA)
+
+    dispatcher = imagevalidate.Dispatcher([tiff_profile])
+    for unsupported in (jpeg_file, jp2_file):
+        with pytest.raises(dispatch.UnsupportedFormat):
+            dispatcher.validate(str(unsupported))
+    with pytest.raises(FileNotFoundError):
+        dispatcher.validate(str(tmp_path / "missing.tif"))
+    assert tiff_profile.validated == []
+
+
+def test_first_profile_for_a_format_is_used(tiff_profile):
+    other = RecordingProfile("Other Tiff", {".tiff"})
+    dispatcher = imagevalidate.Dispatcher([tiff_profile, other])
+    assert dispatcher.valid_extensions == {".tif"}
+
+
+def test_default_profiles():
+    dispatcher = imagevalidate.Dispatcher()
+    assert dispatcher.valid_extensions == {".tif", ".jp2"}
+
+
+def test_profiles_without_a_supported_format():
+    with pytest.raises(ValueError):
+        imagevalidate.Dispatcher([RecordingProfile("PNG", {".png"})])
+
+
+def test_cli_auto_rejects_unsupported_files(tmp_path, capsys):
+    (tmp_path / "0000001.tif").write_bytes(b"not an image")
+    assert cli.main(["auto", str(tmp_path)]) == 1
+    assert "not in a supported format" in capsys.readouterr().out
+
+
+def test_dispatcher_is_imported_when_used():
+    result = subprocess.run(
+        [
+            sys.executable, "-c",
+            "import sys\n"
+            "from uiucprescon import imagevalidate\n"
+            "print('uiucprescon.imagevalidate.dispatch' in sys.modules)\n"
+            "print(imagevalidate.Dispatcher.__name__)"
+        ],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    assert result.stdout.split() == ["False", "Dispatcher"]
@@ -1,3 +1,8 @@
+import os
+import subprocess
+import sys
+import sysconfig
+
 from uiucprescon.imagevalidate import openjp2wrap
 import pytest
 
@@ -12,3 +17,54 @@ def test_invalid_get_bitdeph_throws_exception():
     with pytest.raises(openjp2wrap.InvalidFileException) as excinfo:
         openjp2wrap.get_bit_depth(source)
     assert source in str(excinfo.value)
+
+
+def test_invalid_get_colorspace_throws_exception():
+    source = "fakefile.jp2"
+    with pytest.raises(openjp2wrap.InvalidFileException) as excinfo:
+        openjp2wrap.get_colorspace(source)
+    assert source in str(excinfo.value)
+
+
+def test_invalid_probe_throws_exception():
+    source = "fakefile.jp2"
+    with pytest.raises(openjp2wrap.InvalidFileException) as excinfo:
+        openjp2wrap.probe(source)
+    assert source in str(excinfo.value)
+
+
+def test_invalid_probe_buffer_throws_exception():
+    with pytest.raises(openjp2wrap.InvalidFileException):
+        openjp2wrap.probe_buffer(b"not a jpeg 2000 file")
+
+
+def test_probe_buffer_must_be_contiguous():
+    with pytest.raises(ValueError):
+        openjp2wrap.probe_buffer(memoryview(b"0123456789")[::2])
+
+
+@pytest.mark.skipif(
+    not sysconfig.get_config_var("Py_GIL_DISABLED"),
+    reason="requires a free-threaded build of Python"
+)
+def test_import_keeps_gil_disabled():
+    # Importing a module that does not support free-threading turns the GIL
+    # back on for the whole interpreter
+    environment = {
+        key: value for key, value in os.environ.items()
+        if key != "PYTHON_GIL"
+    }
+    result = subprocess.run(
+        [
+            sys.executable, "-c",
+            "import sys\n"
+            "from uiucprescon import imagevalidate\n"
+            "from uiucprescon.imagevalidate import openjp2wrap\n"
+            "print(sys._is_gil_enabled())"
+        ],
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,110 @@
+import struct
+
+import pytest
+
+from uiucprescon.imagevalidate import header
+
+PIXEL_DATA_SIZE = 100000
+XMP = b"<x:xmpmeta>creator</x:xmpmeta>"
+
+
+def sparse_contents(region):
+    contents = bytearray(region.size)
+    for offset, data in region.ranges:
+        contents[offset:offset + len(data)] = data
+    return contents
+
+
+def tiff_entry(tag, field_type, count, value):
+    return struct.pack("<HHI", tag, field_type, count) + value
+
+
+def create_tiff(path, loop=False):
+    pixel_offset = 8
+    xmp_offset = pixel_offset + PIXEL_DATA_SIZE
+    ifd_offset = xmp_offset + len(XMP)
+    entries = [
+        tiff_entry(256, 3, 1, struct.pack("<HH", 10, 0)),
+        tiff_entry(273, 4, 1, struct.pack("<I", pixel_offset)),
+        tiff_entry(700, 1, len(XMP), struct.pack("<I", xmp_offset)),
+    ]
+    next_ifd = ifd_offset if loop else 0
+    ifd = struct.pack("<H", len(entries)) + b"".join(entries) + \
+        struct.pack("<I", next_ifd)
+    path.write_bytes(
+        b"II*\0" + struct.pack("<I", ifd_offset) +
+        b"\xaa" * PIXEL_DATA_SIZE + XMP + ifd
+    )
+    return xmp_offset
+
+
+def box(box_type, content):
+    return struct.pack(">I", 8 + len(content)) + box_type + content
+
+
+def create_jp2(path):
+    main_header = b"\xff\x4f" + \
+        b"\xff\x51" + struct.pack(">H", 10) + b"\0" * 8 + \
+        b"\xff\x90" + struct.pack(">H", 10) + b"\0" * 8
+    codestream = main_header + b"\xaa" * PIXEL_DATA_SIZE
+    data = header.JP2_SIGNATURE + \
+        box(b"ftyp", b"jp2 \0\0\0\0jp2 ") + \
+        box(b"jp2h", box(b"ihdr", b"\0" * 14)) + \
+        box(b"jp2c", codestream) + \
+        box(b"uuid", b"\0" * 16 + XMP)
+    path.write_bytes(data)
+    return len(data) - len(codestream) - len(box(b"uuid", b"\0" * 16 + XMP))
+
+
+def test_tiff_reads_only_the_ifds(tmp_path):
+    image = tmp_path / "image.tif"
+    xmp_offset = create_tiff(image)
+    region = header.read_header(str(image))
+    assert region.size == image.stat().st_size
+    assert region.bytes_read < 200
+    contents = sparse_contents(region)
+    assert contents[xmp_offset:xmp_offset + len(XMP)] == XMP
+    assert b"\xaa" not in contents[12:xmp_offset]
+
+
+def test_tiff_ifd_loop_stops(tmp_path):
+    image = tmp_path / "image.tif"
+    create_tiff(image, loop=True)
+    assert header.read_header(str(image)).bytes_read < 200
+
+
+def test_jp2_reads_boxes_and_main_header(tmp_path):
+    image = tmp_path / "image.jp2"
+    codestream_offset = create_jp2(image)
+    region = header.read_header(str(image))
+    assert region.bytes_read < 300
+    assert len(region.prefix()) == codestream_offset + 26
+    contents = sparse_contents(region)
+    assert contents.endswith(XMP)
+    assert b"\xaa" not in contents
+
+
+@pytest.mark.parametrize("create, name", [
+    (create_tiff, "image.tif"),
+    (create_jp2, "image.jp2"),
+])
+def test_buffer_matches_file(tmp_path, create, name):
+    image = tmp_path / name
+    create(image)
+    assert header.read_header_buffer(bytearray(image.read_bytes())) == \
+        header.read_header(str(image))
+
+
+def test_not_an_image(tmp_path):
+    image = tmp_path / "image.tif"
+    image.write_bytes(b"not an image")
+    with pytest.raises(header.InvalidHeader):
+        header.read_header(str(image))
+
+
+def test_truncated_file(tmp_path):
+    image = tmp_path / "image.tif"
+    create_tiff(image)
+    image.write_bytes(image.read_bytes()[:PIXEL_DATA_SIZE])
+    with pytest.raises(header.InvalidHeader):
+        header.read_header(str(image))
@@ -1,6 +1,9 @@
+from unittest.mock import Mock
+
 import pytest
 from uiucprescon.imagevalidate import profiles
 from uiucprescon import imagevalidate
+from uiucprescon.imagevalidate.rules import Rule
 
 
 def test_loaded():
@@ -17,3 +20,115 @@ def test_missing_file():
     with pytest.raises(FileNotFoundError):
         report = hathi_tiff_profile .validate(file="invalid_file.tif")
 
+
+
+class Tiff300(profiles.HathiTiff):
+    rules = [
+        Rule(rule.field, "300/1") if rule.field.endswith("Resolution")
+        else rule
+        for rule in profiles.HathiTiff.rules
+    ]
+
+    @staticmethod
+    def profile_name() -> str:
+        return "300 ppi Tiff"
+
+
+def test_validate_against_reads_the_file_once(monkeypatch, tmp_path):
+    py3exiv2bind = pytest.importorskip("py3exiv2bind")
+    image_file = tmp_path / "dummy.tif"
+    image_file.write_bytes(b"")
+    exiv_image = Mock(
+        metadata={"Exif.Image.XResolution": "400/1"},
+        pixelWidth=3000,
+        pixelHeight=2000,
+        icc=Mock(return_value={'device_model': Mock(value=b'sRGB')})
+    )
+    open_image = Mock(return_value=exiv_image)
+    monkeypatch.setattr(py3exiv2bind, "Image", open_image)
+
+    reports = imagevalidate.validate_against(
+        str(image_file),
+        profiles=["HathiTrust Tiff", Tiff300()]
+    )
+
+    open_image.assert_called_once_with(str(image_file))
+    assert list(reports) == ["HathiTrust Tiff", "300 ppi Tiff"]
+    assert all(
+        report.filename == str(image_file) for report in reports.values()
+    )
+    tiff_issues = {
+        issue.field for issue in reports["HathiTrust Tiff"].issue_records()
+    }
+    assert "Exif.Image.BitsPerSample" in tiff_issues
+    assert "Exif.Image.XResolution" not in tiff_issues
+    assert "Exif.Image.XResolution" in {
+        issue.field for issue in reports["300 ppi Tiff"].issue_records()
+    }
+
+
+class UnreadableProfile(Tiff300):
+    def validate_snapshot(self, image, fail_fast=False):
+        raise ValueError("not a file for this profile")
+
+    @staticmethod
+    def profile_name() -> str:
+        return "Unreadable"
+
+
+def test_validate_against_keeps_reports_of_other_profiles(monkeypatch,
+                                                          tmp_path):
+    py3exiv2bind = pytest.importorskip("py3exiv2bind")
+    image_file = tmp_path / "dummy.tif"
+    image_file.write_bytes(b"")
+    monkeypatch.setattr(py3exiv2bind, "Image", Mock(return_value=Mock(
+        metadata={"Exif.Image.XResolution": "300/1"},
+        pixelWidth=3000,
+        pixelHeight=2000,
+        icc=Mock(return_value={})
+    )))
+    # Requested under a name other than its profile_name
+    monkeypatch.setattr(
+        imagevalidate.profile, "get_profile", {"Local": Tiff300()}.get
+    )
+
+    reports = imagevalidate.validate_against(
+        str(image_file), profiles=["Local", UnreadableProfile()]
+    )
+
+    assert list(reports) == ["Local", "Unreadable"]
+    assert isinstance(reports["Local"], imagevalidate.Report)
+    assert isinstance(reports["Unreadable"], ValueError)
+
+
+def test_validate_against_missing_file():
+    with pytest.raises(FileNotFoundError):
+        imagevalidate.validate_against(
+            "invalid_file.tif", profiles=["HathiTrust Tiff"]
+        )
+
+
+def test_fail_fast_stops_before_reading_the_codestream(monkeypatch,
+                                                       tmp_path):
+    py3exiv2bind = pytest.importorskip("py3exiv2bind")
+    image_file = tmp_path / "dummy.jp2"
+    image_file.write_bytes(b"")
+    exiv_image = Mock(
+        metadata={"Exif.Image.XResolution": "300/1"},
+        pixelWidth=3000,
+        pixelHeight=2000,
+    )
+    monkeypatch.setattr(py3exiv2bind, "Image", Mock(return_value=exiv_image))
+    probe = Mock()
+    monkeypatch.setattr(
+        "uiucprescon.imagevalidate.snapshot.MetadataSnapshot.codestream",
+        property(probe)
+    )
+
+    profile = imagevalidate.Profile(profiles.HathiJP2000(), fail_fast=True)
+    report = profile.validate(str(image_file))
+
+    assert not report.valid
+    assert len(report.issue_records()) == 1
+    exiv_image.icc.assert_not_called()
+    probe.assert_not_called()
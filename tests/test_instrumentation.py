@@ -0,0 +1,73 @@
+from unittest.mock import Mock
+
+import py3exiv2bind
+import pytest
+
+from uiucprescon.imagevalidate import instrumentation, profiles
+from uiucprescon.imagevalidate.report import Report, Result
+from uiucprescon.imagevalidate.issues import IssueCategory
+
+
+@pytest.fixture
+def tiff_image(monkeypatch):
+    image = Mock(
+        metadata={"Exif.Image.XResolution": "400/1"},
+        pixelWidth=3000,
+        pixelHeight=2000,
+        icc=Mock(return_value={'device_model': Mock(value=b'sRGB')})
+    )
+    monkeypatch.setattr(py3exiv2bind, "Image", Mock(return_value=image))
+    return image
+
+
+def test_disabled_by_default():
+    assert instrumentation.get_collector() is None
+    assert instrumentation.stage("validate") is \
+        instrumentation.stage("other")
+
+
+def test_validate_records_each_stage(tiff_image):
+    profile = profiles.HathiTiff()
+    with instrumentation.collecting(Mock()) as collector:
+        report = profile.validate("dummy.tif")
+        report.issues()
+
+    assert instrumentation.get_collector() is None
+    recorded = {
+        call.args[0].stage: call.args[0]
+        for call in collector.record.call_args_list
+    }
+    assert set(recorded) == set(instrumentation.STAGES)
+    assert all(
+        metrics.file == "dummy.tif" for metrics in recorded.values()
+    )
+    assert recorded["read_metadata"].native_calls == 2
+    assert recorded["analyze_data_for_issues"].native_calls == 0
+    assert recorded["get_data_from_image"].seconds >= \
+        recorded["determine_color_space"].seconds
+
+
+def test_stage_totals():
+    totals = instrumentation.StageTotals()
+    with instrumentation.collecting(totals):
+        for _ in range(3):
+            with instrumentation.stage("read_metadata", "dummy.tif"):
+                instrumentation.count_native_call()
+    read_metadata = totals.totals()["read_metadata"]
+    assert read_metadata["calls"] == 3
+    assert read_metadata["native_calls"] == 3
+
+
+def test_messages_are_measured_with_the_report_file():
+    report = Report()
+    report.filename = "dummy.tif"
+    report.add_issue(
+        "Exif.Image.XResolution",
+        IssueCategory.INVALID_DATA,
+        Result(expected="400/1", actual="300/1")
+    )
+    with instrumentation.collecting(Mock()) as collector:
+        report.issues()
+    metrics = collector.record.call_args.args[0]
+    assert metrics.stage == "generate_error_msg"
+    assert metrics.file == "dummy.tif"
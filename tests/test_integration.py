@@ -4,7 +4,8 @@ import shutil
 import pytest
 
 from uiucprescon import imagevalidate
-from uiucprescon.imagevalidate import IssueCategory
+from uiucprescon.imagevalidate import IssueCategory, snapshot
+from uiucprescon.imagevalidate.profiles import declarative
 import os
 import tarfile
 import urllib.request
@@ -291,3 +292,75 @@ def test_pixelarray(sample_data, test_file, profile_name):
     assert len(report.issues(issue_type=IssueCategory.EMPTY_DATA)) == 0
     assert len(report.issues(issue_type=IssueCategory.MISSING_FIELD)) == 0
     assert not report.valid
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("test_file,profile_name", [
+    (os.path.join("correct", "0000001.tif"), "HathiTrust Tiff"),
+    (os.path.join("correct", "0000001.jp2"), "HathiTrust JPEG 2000"),
+    (os.path.join("bitdepth", "0000001.jp2"), "HathiTrust JPEG 2000"),
+])
+@pytest.mark.filterwarnings('ignore:.*Reading non-standard UUID-EXIF_bad box in*:Warning')
+def test_validate_buffer_matches_file(sample_data, test_file, profile_name):
+    test_image = os.path.join(sample_data, test_file)
+    validation_profile = imagevalidate.Profile(
+        imagevalidate.get_profile(profile_name)
+    )
+    with open(test_image, "rb") as f:
+        data = f.read()
+    from_buffer = validation_profile.validate_buffer(
+        memoryview(data), filename=test_image
+    )
+    from_file = validation_profile.validate(file=test_image)
+    assert from_buffer.to_dict() == from_file.to_dict()
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("test_file,profile_name", [
+    (os.path.join("correct", "0000001.tif"), "HathiTrust Tiff"),
+    (os.path.join("correct", "0000001.jp2"), "HathiTrust JPEG 2000"),
+    (os.path.join("colorspace", "0000001.tif"), "HathiTrust Tiff"),
+])
+@pytest.mark.filterwarnings('ignore:.*Reading non-standard UUID-EXIF_bad box in*:Warning')
+def test_header_only_matches_file(sample_data, test_file, profile_name):
+    test_image = os.path.join(sample_data, test_file)
+    profile_type = imagevalidate.get_profile(profile_name)
+    header_only = imagevalidate.Profile(profile_type, header_only=True)
+    report = header_only.validate(file=test_image)
+    full = imagevalidate.Profile(profile_type).validate(file=test_image)
+    if snapshot.SPARSE_FILES:
+        assert report.bytes_read < os.path.getsize(test_image)
+    else:
+        assert report.bytes_read is None
+    assert report._properties == full._properties
+    assert report.issue_records() == full.issue_records()
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("test_file,profile_name", [
+    (os.path.join("correct", "0000001.tif"), "HathiTrust Tiff"),
+    (os.path.join("correct", "0000001.jp2"), "HathiTrust JPEG 2000"),
+])
+@pytest.mark.filterwarnings('ignore:.*Reading non-standard UUID-EXIF_bad box in*:Warning')
+def test_validate_against_matches_each_profile(sample_data, test_file,
+                                               profile_name):
+    test_image = os.path.join(sample_data, test_file)
+    local_profile = declarative.compile_profile({
+        "name": "Local 300 ppi",
+        "rules": [
+            {"field": "Exif.Image.XResolution", "equals": "300/1"},
+            {"field": "Pixel on longest angle", "derive": "longest_side",
+             "range": {"min": 3000}},
+        ],
+    })()
+    reports = imagevalidate.validate_against(
+        test_image, [profile_name, local_profile]
+    )
+    assert list(reports) == [profile_name, "Local 300 ppi"]
+    for validation_profile in [imagevalidate.get_profile(profile_name),
+                               local_profile]:
+        expected = imagevalidate.Profile(validation_profile).validate(
+            file=test_image
+        )
+        assert reports[validation_profile.profile_name()].issue_records() \
+            == expected.issue_records()
@@ -1,4 +1,6 @@
-from uiucprescon.imagevalidate import messages, report
+from unittest.mock import Mock
+
+from uiucprescon.imagevalidate import IssueCategory, messages, report
 
 
 def test_invalid_data():
@@ -33,3 +35,34 @@ def test_missing_field():
         data=report.Result(expected="bacon", actual=None)
     )
     assert new_message == 'No metadata field for "spam" found in file.'
+
+
+def test_strategies_are_shared(monkeypatch):
+    for name in ("InvalidData", "EmptyData", "MissingField",
+                 "MessageGenerator"):
+        monkeypatch.setattr(
+            messages, name, Mock(side_effect=AssertionError(name))
+        )
+    assert messages.generate_error_message(
+        IssueCategory.INVALID_DATA,
+        "spam",
+        report.Result(expected="bacon", actual="eggs")
+    ).startswith("Invalid match")
+
+
+def test_render_issues():
+    issues = [
+        report.Issue("spam", IssueCategory.INVALID_DATA, "bacon", "eggs"),
+        report.Issue("spam", IssueCategory.EMPTY_DATA, "bacon", ""),
+        report.Issue("spam", IssueCategory.MISSING_FIELD, "bacon", None),
+    ]
+    assert messages.render_issues(issues) == [
+        messages.render_issue(issue) for issue in issues
+    ]
+    assert messages.render_issues(issues)[0] == \
+        'Invalid match for "spam". Expected: "bacon". Got: "eggs".'
+
+
+def test_strategies_have_no_instance_dict():
+    for strategy in messages.MESSAGE_STRATEGIES.values():
+        assert not hasattr(strategy, "__dict__")
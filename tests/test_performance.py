@@ -0,0 +1,342 @@
+import collections
+import concurrent.futures
+import multiprocessing
+import os
+import shutil
+import sys
+import sysconfig
+import time
+
+import pytest
+
+from uiucprescon import imagevalidate
+from uiucprescon.imagevalidate import common, openjp2wrap
+from uiucprescon.imagevalidate.snapshot import MetadataSnapshot
+
+Image = pytest.importorskip("PIL.Image")
+ImageCms = pytest.importorskip("PIL.ImageCms")
+resource = pytest.importorskip("resource")
+
+SAMPLE_FILES = 64
+MAX_THREADS = min(4, os.cpu_count() or 1)
+
+# Files and threads of the stress test
+STRESS_FILES = 2000
+STRESS_THREADS = 32
+STRESS_PROFILES = {
+    ".tif": "HathiTrust Tiff",
+    ".jp2": "HathiTrust JPEG 2000",
+}
+
+FIXTURE_SIZES = {
+    "small": (600, 900),
+    "large": (2000, 3000),
+}
+
+NATIVE_READERS = [
+    "get_colorspace",
+    "get_bit_depth",
+    "probe",
+]
+
+
+def create_image(size):
+    # Noise does not compress so the files are as large as real masters
+    return Image.frombytes("RGB", size, os.urandom(size[0] * size[1] * 3))
+
+
+def srgb_icc_profile():
+    return ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+
+
+@pytest.fixture(scope="session")
+def synthetic_images(tmp_path_factory):
+    path = tmp_path_factory.mktemp("synthetic_images")
+    images = {}
+    for size_name, size in FIXTURE_SIZES.items():
+        image = create_image(size)
+        tiff = path / f"{size_name}.tif"
+        image.save(tiff, dpi=(400, 400), icc_profile=srgb_icc_profile())
+        jp2 = path / f"{size_name}.jp2"
+        image.save(jp2, tile_size=(1024, 1024), num_resolutions=6)
+        images[("tif", size_name)] = str(tiff)
+        images[("jp2", size_name)] = str(jp2)
+    return images
+
+
+def validate_with(profile_name, **options):
+    def validate(snapshot):
+        return imagevalidate.get_profile(profile_name).validate(
+            snapshot.filename, **options
+        )
+    return validate
+
+
+def check_color_space(strategy):
+    def check(snapshot):
+        try:
+            return strategy.check(snapshot)
+        except common.InvalidStrategy:
+            return None
+    return check
+
+
+def call_native(function_name):
+    def call(snapshot):
+        return getattr(openjp2wrap, function_name)(snapshot.filename)
+    return call
+
+
+# name: (file format, function, native file opens allowed per file)
+# Each function is given a snapshot parsed before the timer starts, so only
+# validate itself parses the metadata.
+BENCHMARKS = {
+    "HathiTiff.validate": ("tif", validate_with("HathiTrust Tiff"), 1),
+    "HathiJP2000.validate":
+        ("jp2", validate_with("HathiTrust JPEG 2000"), 2),
+    # The synthetic images have no XMP, so these stop at the first field
+    # without reading the ICC profile or the codestream.
+    "HathiTiff.validate fail_fast":
+        ("tif", validate_with("HathiTrust Tiff", fail_fast=True), 1),
+    "HathiJP2000.validate fail_fast":
+        ("jp2", validate_with("HathiTrust JPEG 2000", fail_fast=True), 1),
+    "ColorSpaceIccDeviceModelCheck": (
+        "tif", check_color_space(common.ColorSpaceIccDeviceModelCheck()), 0
+    ),
+    "ColorSpaceIccPrefCcmCheck": (
+        "tif", check_color_space(common.ColorSpaceIccPrefCcmCheck()), 0
+    ),
+    "ColorSpaceOJPCheck": (
+        "jp2", check_color_space(common.ColorSpaceOJPCheck()), 1
+    ),
+    **{
+        f"openjp2wrap.{function_name}":
+            ("jp2", call_native(function_name), 1)
+        for function_name in NATIVE_READERS
+    },
+}
+
+
+def bytes_read():
+    # Counts reads made by native code too. Only available on Linux.
+    try:
+        with open("/proc/self/io") as io_stats:
+            for line in io_stats:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss():
+    # Linux keeps the peak of the parent process across fork and exec
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_kb():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_rss //= 1024
+    return peak_rss
+
+
+def count_native_opens(counter):
+    import py3exiv2bind
+
+    def counted(name, function):
+        def wrapper(*args, **kwargs):
+            counter[name] += 1
+            return function(*args, **kwargs)
+        return wrapper
+
+    py3exiv2bind.Image = counted("exiv2", py3exiv2bind.Image)
+    for function_name in NATIVE_READERS:
+        setattr(
+            openjp2wrap,
+            function_name,
+            counted("openjpeg", getattr(openjp2wrap, function_name))
+        )
+
+
+def measure(benchmark_name, file, rounds):
+    """Run in a fresh process so that peak RSS belongs to the benchmark."""
+    _, benchmark, _ = BENCHMARKS[benchmark_name]
+    opens = collections.Counter()
+    count_native_opens(opens)
+
+    reset_peak_rss()
+    elapsed = 0.0
+    total_opens = 0
+    total_read = 0
+    for _ in range(rounds):
+        snapshot = MetadataSnapshot.from_file(file)
+        opens.clear()
+        read_before = bytes_read()
+        start = time.perf_counter()
+        benchmark(snapshot)
+        elapsed += time.perf_counter() - start
+        read_after = bytes_read()
+        total_opens += sum(opens.values())
+        if read_before is not None:
+            total_read += read_after - read_before
+
+    return {
+        "files_per_second": rounds / elapsed,
+        "peak_rss_kb": peak_rss_kb(),
+        "native_opens_per_file": total_opens / rounds,
+        "bytes_read_per_file":
+            total_read / rounds if bytes_read() is not None else None,
+    }
+
+
+def run_isolated(benchmark_name, file, rounds=10):
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=1, mp_context=context) as pool:
+        return pool.submit(measure, benchmark_name, file, rounds).result()
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("size_name", list(FIXTURE_SIZES))
+@pytest.mark.parametrize("benchmark_name", list(BENCHMARKS))
+def test_benchmark(synthetic_images, benchmark_name, size_name,
+                   record_property):
+    file_format, _, max_opens = BENCHMARKS[benchmark_name]
+    file = synthetic_images[(file_format, size_name)]
+    results = run_isolated(benchmark_name, file)
+    for key, value in results.items():
+        record_property(key, value)
+    print(f"{benchmark_name} [{size_name}] {results}")
+
+    assert results["native_opens_per_file"] <= max_opens
+
+    # Only the headers are needed. A full decode reads the whole codestream.
+    # OpenJPEG reads in 1 MB chunks, so this is only telling for large files.
+    if file_format == "jp2" and size_name == "large" \
+            and results["bytes_read_per_file"] is not None:
+        assert results["bytes_read_per_file"] < os.path.getsize(file) / 2
+
+
+@pytest.fixture(scope="module")
+def jp2_directory(tmp_path_factory):
+    path = tmp_path_factory.mktemp("jp2")
+    first = path / "0000001.jp2"
+    Image.new("RGB", (3000, 2000), (128, 64, 32)).save(
+        first, tile_size=(512, 512), num_resolutions=6
+    )
+    for i in range(2, SAMPLE_FILES + 1):
+        shutil.copyfile(first, path / f"{i:07d}.jp2")
+    return path
+
+
+def files_per_second(function, files, threads, rounds=5):
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as pool:
+        for _ in range(rounds):
+            list(pool.map(function, files))
+    return len(files) * rounds / (time.perf_counter() - start)
+
+
+@pytest.mark.performance
+@pytest.mark.skipif(MAX_THREADS < 2, reason="requires more than one CPU")
+@pytest.mark.parametrize("function", [
+    openjp2wrap.probe,
+    openjp2wrap.get_colorspace,
+    openjp2wrap.get_bit_depth,
+], ids=lambda function: function.__name__)
+def test_openjp2wrap_thread_scaling(jp2_directory, function):
+    files = [str(f) for f in sorted(jp2_directory.iterdir())]
+    files_per_second(function, files, threads=1, rounds=1)
+
+    rates = {
+        threads: files_per_second(function, files, threads)
+        for threads in range(1, MAX_THREADS + 1)
+    }
+    for threads, rate in rates.items():
+        print(f"{function.__name__}: {threads} thread(s) "
+              f"{rate:.0f} files/sec "
+              f"speedup {rate / rates[1]:.2f}x")
+
+    # Serializing on the GIL would keep the speedup close to 1x
+    assert rates[MAX_THREADS] / rates[1] > 0.6 * MAX_THREADS
+
+
+def gil_enabled():
+    # sys._is_gil_enabled only exists on Python 3.13 and newer
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+
+@pytest.fixture(scope="module")
+def stress_files(tmp_path_factory):
+    path = tmp_path_factory.mktemp("stress")
+    image = create_image((300, 200))
+    originals = [path / "original.tif", path / "original.jp2"]
+    image.save(originals[0], dpi=(400, 400), icc_profile=srgb_icc_profile())
+    image.save(originals[1])
+    files = []
+    for i in range(STRESS_FILES):
+        original = originals[i % len(originals)]
+        file = path / f"{i:07d}{original.suffix}"
+        shutil.copyfile(original, file)
+        files.append(str(file))
+    return files
+
+
+def report_contents(report):
+    contents = report.to_dict()
+    del contents["filename"]
+    return contents, report.issues()
+
+
+def validate_stress_file(file):
+    profile = imagevalidate.get_profile(
+        STRESS_PROFILES[os.path.splitext(file)[1]]
+    )
+    return imagevalidate.Profile(profile).validate(file)
+
+
+@pytest.mark.performance
+def test_free_threaded_stress(stress_files, record_property):
+    # Forget the loaded profiles so that the workers discover and load them
+    # concurrently on their first files
+    imagevalidate.profile.invalidate_profile_registry()
+
+    def validate(file):
+        report = validate_stress_file(file)
+        return file, report.filename, report_contents(report)
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=STRESS_THREADS) as pool:
+        results = list(pool.map(validate, stress_files))
+    rate = len(stress_files) / (time.perf_counter() - start)
+
+    free_threaded = bool(sysconfig.get_config_var("Py_GIL_DISABLED"))
+    record_property("files_per_second", rate)
+    record_property("free_threaded_build", free_threaded)
+    record_property("gil_enabled", gil_enabled())
+    print(f"{len(stress_files)} files with {STRESS_THREADS} threads: "
+          f"{rate:.0f} files/sec, free-threaded build: {free_threaded}, "
+          f"GIL enabled: {gil_enabled()}")
+
+    expected = {
+        os.path.splitext(file)[1]:
+            report_contents(validate_stress_file(file))
+        for file in stress_files[:len(STRESS_PROFILES)]
+    }
+    for file, filename, contents in results:
+        assert filename == file
+        assert contents == expected[os.path.splitext(file)[1]]
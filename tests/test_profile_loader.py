@@ -1,3 +1,9 @@
+import concurrent.futures
+import importlib.metadata
+import subprocess
+import sys
+from unittest.mock import Mock
+
 from uiucprescon import imagevalidate
 
 
@@ -14,3 +20,74 @@ def test_get_all_profiles_is_not_empty():
 def test_get_hathi_tiff_profile():
     hathi_tiff_profile = imagevalidate.get_profile("HathiTrust JPEG 2000")
     assert isinstance(hathi_tiff_profile, imagevalidate.profiles.AbsProfile)
+
+
+def test_get_profile_returns_shared_instance():
+    first = imagevalidate.get_profile("HathiTrust Tiff")
+    second = imagevalidate.get_profile("HathiTrust Tiff")
+    assert first is second
+
+
+def test_registry_is_only_discovered_once(monkeypatch):
+    imagevalidate.invalidate_profile_registry()
+    discover = Mock(wraps=imagevalidate.profiles.discover_profiles)
+    monkeypatch.setattr(imagevalidate.profiles, "discover_profiles", discover)
+    for _ in range(3):
+        imagevalidate.get_profile("HathiTrust Tiff")
+        imagevalidate.available_profiles()
+    assert discover.call_count == 1
+
+
+def test_invalidate_profile_registry():
+    first = imagevalidate.get_profile("HathiTrust Tiff")
+    imagevalidate.invalidate_profile_registry()
+    second = imagevalidate.get_profile("HathiTrust Tiff")
+    assert first is not second
+    assert type(first) is type(second)
+
+
+def test_get_profile_from_many_threads():
+    imagevalidate.invalidate_profile_registry()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        found = set(
+            map(id, pool.map(
+                lambda _: imagevalidate.get_profile("HathiTrust Tiff"),
+                range(100)
+            ))
+        )
+    assert len(found) == 1
+
+
+def test_import_does_not_load_profiles():
+    loaded = subprocess.check_output([
+        sys.executable, "-c",
+        "import sys; "
+        "import uiucprescon.imagevalidate; "
+        "print(sorted(name for name in sys.modules if name in {"
+        "'py3exiv2bind', "
+        "'uiucprescon.imagevalidate.openjp2wrap', "
+        "'uiucprescon.imagevalidate.profiles.hathi_tiff', "
+        "'uiucprescon.imagevalidate.profiles.hathi_jp2000'}))"
+    ], text=True)
+    assert loaded.strip() == "[]"
+
+
+def test_profile_from_entry_point(monkeypatch):
+    entry_point = importlib.metadata.EntryPoint(
+        name="Local Tiff",
+        value="uiucprescon.imagevalidate.profiles.hathi_tiff:HathiTiff",
+        group=imagevalidate.profiles.ENTRY_POINT_GROUP
+    )
+    monkeypatch.setattr(
+        importlib.metadata,
+        "entry_points",
+        Mock(return_value=[entry_point])
+    )
+    imagevalidate.invalidate_profile_registry()
+    try:
+        assert "Local Tiff" in imagevalidate.available_profiles()
+        assert isinstance(imagevalidate.get_profile("Local Tiff"),
+                          imagevalidate.profiles.HathiTiff)
+    finally:
+        monkeypatch.undo()
+        imagevalidate.invalidate_profile_registry()
@@ -0,0 +1,77 @@
+import pickle
+
+import pytest
+
+from uiucprescon.imagevalidate import IssueCategory, Report
+from uiucprescon.imagevalidate.report import Issue, Result, ResultCategory
+
+
+@pytest.fixture
+def report():
+    new_report = Report()
+    new_report.filename = "0000001.tif"
+    new_report.bytes_read = 4096
+    new_report._properties = {
+        "Xmp.dc.creator": Result(expected=ResultCategory.ANY, actual=""),
+        "Exif.Image.XResolution": Result(expected="400/1", actual="300/1"),
+        "Exif.Image.YResolution": Result(expected="400/1", actual="400/1"),
+    }
+    new_report.add_issue(
+        "Xmp.dc.creator",
+        IssueCategory.EMPTY_DATA,
+        new_report._properties["Xmp.dc.creator"]
+    )
+    new_report.add_issue(
+        "Exif.Image.XResolution",
+        IssueCategory.INVALID_DATA,
+        new_report._properties["Exif.Image.XResolution"]
+    )
+    return new_report
+
+
+def test_new_report_is_valid():
+    assert Report().valid
+
+
+def test_issue_records(report):
+    assert not report.valid
+    assert report.issue_records(IssueCategory.INVALID_DATA) == [
+        Issue(field="Exif.Image.XResolution",
+              category=IssueCategory.INVALID_DATA,
+              expected="400/1",
+              actual="300/1")
+    ]
+
+
+def test_issues_are_rendered_as_messages(report):
+    assert report.issues(IssueCategory.INVALID_DATA) == [
+        'Invalid match for "Exif.Image.XResolution". '
+        'Expected: "400/1". Got: "300/1".'
+    ]
+    assert len(report.issues()) == 2
+    assert report.issues(IssueCategory.MISSING_FIELD) == []
+
+
+def test_uses_slots(report):
+    with pytest.raises(AttributeError):
+        report.spam = "eggs"
+
+
+@pytest.mark.parametrize("round_trip", [
+    lambda report: Report.from_json(report.to_json()),
+    lambda report: Report.from_dict(report.to_dict()),
+    lambda report: pickle.loads(pickle.dumps(report)),
+], ids=["json", "dict", "pickle"])
+def test_round_trip(report, round_trip):
+    restored = round_trip(report)
+    assert restored.filename == report.filename
+    assert restored.bytes_read == report.bytes_read
+    assert restored._properties == report._properties
+    assert restored.issue_records() == report.issue_records()
+    assert restored.issues() == report.issues()
+
+
+def test_pickle_keeps_seconds(report):
+    report.seconds = 0.25
+    assert pickle.loads(pickle.dumps(report)).seconds == 0.25
+    assert "seconds" not in report.to_dict()
@@ -0,0 +1,242 @@
+import concurrent.futures
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from uiucprescon.imagevalidate import IssueCategory, profiles
+from uiucprescon.imagevalidate.report import Result, ResultCategory
+from uiucprescon.imagevalidate.rules import InRange, OneOf, Pattern, Rule, \
+    RuleTable, find_issue
+from uiucprescon.imagevalidate.snapshot import MetadataSnapshot
+
+
+def create_snapshot(metadata, width=3000, height=2000):
+    return MetadataSnapshot("dummy.tif", metadata, width, height)
+
+
+@pytest.mark.parametrize("expected, actual, category", [
+    ("400/1", None, IssueCategory.MISSING_FIELD),
+    ("400/1", "", IssueCategory.EMPTY_DATA),
+    ("400/1", "300/1", IssueCategory.INVALID_DATA),
+    ("400/1", "400/1", None),
+    (ResultCategory.ANY, "anything", None),
+    (ResultCategory.ANY, None, IssueCategory.MISSING_FIELD),
+])
+def test_find_issue(expected, actual, category):
+    assert find_issue(expected, actual) == category
+
+
+def test_rule_table():
+    longest_side = Mock(return_value="3000")
+    table = RuleTable(
+        [
+            Rule("Xmp.dc.creator"),
+            Rule("Color Space", "sRGB", derive="color_space",
+                 default="Unknown"),
+            Rule("Exif.Image.XResolution", "400/1"),
+            Rule("Pixel on longest angle", "3000", derive="longest_side"),
+        ],
+        {"color_space": Mock(return_value=None),
+         "longest_side": longest_side}.__getitem__
+    )
+    image = create_snapshot({"Exif.Image.XResolution": "300/1"})
+
+    values = table.values(image)
+    assert values == [None, "Unknown", "300/1", "3000"]
+    longest_side.assert_called_once_with(image)
+
+    properties = table.results(values)
+    assert list(properties) == list(table.fields)
+    assert properties["Exif.Image.XResolution"] == \
+        Result(expected="400/1", actual="300/1")
+    assert [
+        (issue.field, issue.category) for issue in table.evaluate(values)
+    ] == [
+        ("Xmp.dc.creator", IssueCategory.MISSING_FIELD),
+        ("Color Space", IssueCategory.INVALID_DATA),
+        ("Exif.Image.XResolution", IssueCategory.INVALID_DATA),
+    ]
+
+
+def test_rule_table_valid_values():
+    table = RuleTable(
+        [Rule("Xmp.dc.creator"), Rule("Exif.Image.XResolution", "400/1")],
+        {}.__getitem__
+    )
+    assert table.evaluate(["someone", "400/1"]) == []
+    assert [
+        issue.category for issue in table.evaluate(["", ""])
+    ] == [IssueCategory.EMPTY_DATA, IssueCategory.EMPTY_DATA]
+
+
+class DataProfile(profiles.AbsProfile):
+    rules = [
+        Rule("Xmp.dc.creator"),
+        Rule("Pixel on longest angle", "3000", derive="longest_side"),
+    ]
+
+    @staticmethod
+    def profile_name() -> str:
+        return "Data"
+
+
+class LegacyProfile(profiles.AbsProfile):
+    expected_metadata_any_value = ["Xmp.dc.creator"]
+    expected_metadata_constants = {"Exif.Image.XResolution": "400/1"}
+
+    @staticmethod
+    def profile_name() -> str:
+        return "Legacy"
+
+
+class HookProfile(LegacyProfile):
+    @classmethod
+    def get_data_from_image(cls, image):
+        data = super().get_data_from_image(image)
+        data["Extra"] = Result(expected="yes", actual="no")
+        return data
+
+
+def test_profile_from_rules():
+    report = DataProfile().validate_snapshot(
+        create_snapshot({"Xmp.dc.creator": "someone"}, width=3000)
+    )
+    assert report.valid
+    assert DataProfile.rule_table() is DataProfile().compiled_rules()
+
+
+def test_rule_table_compiled_once_by_threads():
+    compiled = []
+
+    class SlowProfile(DataProfile):
+        @classmethod
+        def _profile_rules(cls):
+            compiled.append(cls)
+            time.sleep(0.05)
+            return super()._profile_rules()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        tables = list(
+            pool.map(lambda _: SlowProfile.rule_table(), range(8))
+        )
+    assert compiled == [SlowProfile]
+    assert all(table is tables[0] for table in tables)
+
+
+def test_legacy_attributes_are_compiled():
+    assert LegacyProfile.rule_table().fields == \
+        ("Xmp.dc.creator", "Exif.Image.XResolution")
+    report = LegacyProfile().validate_snapshot(
+        create_snapshot({"Exif.Image.XResolution": "400/1"})
+    )
+    assert [issue.field for issue in report.issue_records()] == \
+        ["Xmp.dc.creator"]
+
+
+def test_extended_hooks_are_still_used():
+    assert HookProfile.compiled_rules() is None
+    report = HookProfile().validate_snapshot(
+        create_snapshot({
+            "Xmp.dc.creator": "someone",
+            "Exif.Image.XResolution": "400/1",
+        })
+    )
+    assert [issue.field for issue in report.issue_records()] == ["Extra"]
+
+
+def test_hathi_profiles_are_compiled():
+    for profile in (profiles.HathiTiff, profiles.HathiJP2000):
+        assert profile.compiled_rules() is not None
+
+
+@pytest.mark.parametrize("matcher, actual, accepted", [
+    (InRange(300, 600), "400/1", True),
+    (InRange(300, 600), "600", True),
+    (InRange(300, 600), "299.5", False),
+    (InRange(minimum=3000), "8 8 8", False),
+    (InRange(maximum=8), "1/0", False),
+    (Pattern("[0-9]+/1"), "400/1", True),
+    (Pattern("[0-9]+/1"), "400/1 ", False),
+    (OneOf(["sRGB", "Adobe RGB"]), "Adobe RGB", True),
+    (OneOf(["sRGB", "Adobe RGB"]), "srgb", False),
+])
+def test_matchers(matcher, actual, accepted):
+    assert matcher(actual) is accepted
+
+
+def test_matched_rules_report_the_description():
+    table = RuleTable(
+        [Rule("Exif.Image.XResolution", matcher=InRange(300, 600))],
+        {}.__getitem__
+    )
+    assert table.expected == ("300 to 600",)
+    assert [issue.category for issue in table.evaluate([None])] == \
+        [IssueCategory.MISSING_FIELD]
+    assert table.evaluate(["400/1"]) == []
+
+
+def test_first_issue_checks_the_cheapest_values_first():
+    calls = []
+
+    def derive(name, value):
+        def derive_value(image):
+            calls.append(name)
+            return value
+        return derive_value
+
+    costs = {"bit_depth": 2, "color_space": 1, "longest_side": 0}
+    rules = [
+        Rule("color bit depth", "8", derive="bit_depth"),
+        Rule("Color Space", "sRGB", derive="color_space"),
+        Rule("Pixel on longest angle", "3000", derive="longest_side"),
+        Rule("Exif.Image.XResolution", "400/1"),
+    ]
+
+    def create_table(values):
+        return RuleTable(
+            rules,
+            lambda name: derive(name, values[name]),
+            costs.__getitem__
+        )
+
+    table = create_table(
+        {"bit_depth": "8", "color_space": "Gray", "longest_side": "3000"}
+    )
+    issue = table.first_issue(create_snapshot({}))
+    assert issue.field == "Exif.Image.XResolution"
+    assert issue.category == IssueCategory.MISSING_FIELD
+    assert calls == []
+
+    image = create_snapshot({"Exif.Image.XResolution": "400/1"})
+    issue = table.first_issue(image)
+    assert issue.field == "Color Space"
+    assert calls == ["longest_side", "color_space"]
+
+    calls.clear()
+    table = create_table(
+        {"bit_depth": "8", "color_space": "sRGB", "longest_side": "3000"}
+    )
+    assert table.first_issue(image) is None
+    assert calls == ["longest_side", "color_space", "bit_depth"]
+
+
+def test_first_issue_uses_defaults():
+    table = RuleTable(
+        [
+            Rule("Color Space", "sRGB", derive="color_space",
+                 default="Unknown"),
+            Rule("Other", derive="other"),
+        ],
+        {"color_space": Mock(return_value=None),
+         "other": Mock(return_value="")}.__getitem__
+    )
+    issue = table.first_issue(create_snapshot({}))
+    assert (issue.category, issue.actual) == \
+        (IssueCategory.INVALID_DATA, "Unknown")
+    table = RuleTable(
+        [Rule("Other", derive="other")],
+        {"other": Mock(return_value="")}.__getitem__
+    )
+    assert table.first_issue(create_snapshot({})).category == \
+        IssueCategory.EMPTY_DATA
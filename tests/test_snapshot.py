@@ -0,0 +1,187 @@
+import concurrent.futures
+import os
+import struct
+import time
+from unittest.mock import Mock
+
+import py3exiv2bind
+
+from uiucprescon.imagevalidate import header, openjp2wrap
+from uiucprescon.imagevalidate import snapshot as snapshot_module
+from uiucprescon.imagevalidate.snapshot import MetadataSnapshot
+
+
+def test_from_file_parses_once(monkeypatch):
+    image = Mock(
+        metadata={"Exif.Image.XResolution": "400/1"},
+        pixelWidth=3000,
+        pixelHeight=2000,
+        icc=Mock(return_value={'pref_ccm': Mock(value=b'sRGB')})
+    )
+    image_class = Mock(return_value=image)
+    monkeypatch.setattr(py3exiv2bind, "Image", image_class)
+    snapshot = MetadataSnapshot.from_file("dummy.tif")
+    image_class.assert_called_once_with("dummy.tif")
+    assert snapshot.metadata["Exif.Image.XResolution"] == "400/1"
+    assert snapshot.pixel_width == 3000
+    assert snapshot.pixel_height == 2000
+    assert "pref_ccm" in snapshot.icc
+
+
+def test_from_file_without_icc(monkeypatch):
+    image = Mock(
+        metadata={},
+        pixelWidth=1,
+        pixelHeight=1,
+        icc=Mock(side_effect=py3exiv2bind.core.NoICCError("no icc"))
+    )
+    monkeypatch.setattr(py3exiv2bind, "Image", Mock(return_value=image))
+    snapshot = MetadataSnapshot.from_file("dummy.tif")
+    assert snapshot.icc is None
+    assert "no icc" in snapshot.icc_error
+
+
+def test_from_file_defer_icc(monkeypatch):
+    image = Mock(
+        metadata={},
+        pixelWidth=1,
+        pixelHeight=1,
+        icc=Mock(side_effect=py3exiv2bind.core.NoICCError("no icc"))
+    )
+    monkeypatch.setattr(py3exiv2bind, "Image", Mock(return_value=image))
+    snapshot = MetadataSnapshot.from_file("dummy.tif", defer_icc=True)
+    image.icc.assert_not_called()
+    assert snapshot.icc is None
+    assert "no icc" in snapshot.icc_error
+    image.icc.assert_called_once_with()
+
+
+def test_deferred_icc_shared_by_threads(monkeypatch):
+    def read_icc():
+        # Keep other threads waiting on the profile being read
+        time.sleep(0.05)
+        return {"pref_ccm": "sRGB"}
+
+    image = Mock(
+        metadata={},
+        pixelWidth=1,
+        pixelHeight=1,
+        icc=Mock(side_effect=read_icc)
+    )
+    monkeypatch.setattr(py3exiv2bind, "Image", Mock(return_value=image))
+    snapshot = MetadataSnapshot.from_file("dummy.tif", defer_icc=True)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: snapshot.icc, range(8)))
+    assert results == [{"pref_ccm": "sRGB"}] * 8
+    image.icc.assert_called_once_with()
+
+
+def test_from_buffer_reads_through_temporary_file(monkeypatch):
+    read = {}
+
+    def parse(filename):
+        with open(filename, "rb") as file_handle:
+            read["data"] = file_handle.read()
+        read["filename"] = filename
+        return Mock(
+            metadata={}, pixelWidth=1, pixelHeight=1,
+            icc=Mock(return_value={})
+        )
+
+    monkeypatch.setattr(py3exiv2bind, "Image", parse)
+    data = b"image data"
+    snapshot = MetadataSnapshot.from_buffer(data, "0000001.jp2")
+    assert read["data"] == data
+    assert read["filename"].endswith(".jp2")
+    assert not os.path.exists(read["filename"])
+    assert snapshot.filename == "0000001.jp2"
+    assert snapshot.buffer is data
+
+
+def test_from_buffer_writes_only_metadata(monkeypatch):
+    xmp = b"<x:xmpmeta>creator</x:xmpmeta>"
+    pixels = b"\xaa" * 10000
+    ifd_offset = 8 + len(pixels) + len(xmp)
+    data = memoryview(
+        b"II*\0" + struct.pack("<I", ifd_offset) + pixels + xmp +
+        struct.pack("<H", 1) +
+        struct.pack("<HHII", 700, 1, len(xmp), 8 + len(pixels)) +
+        struct.pack("<I", 0)
+    )
+    read = {}
+
+    def parse(filename):
+        with open(filename, "rb") as file_handle:
+            read["data"] = file_handle.read()
+        return Mock(
+            metadata={}, pixelWidth=1, pixelHeight=1,
+            icc=Mock(return_value={})
+        )
+
+    monkeypatch.setattr(py3exiv2bind, "Image", parse)
+    snapshot = MetadataSnapshot.from_buffer(data, "0000001.tif")
+    assert len(read["data"]) == len(data)
+    assert xmp in read["data"]
+    # Only the signature is read from the start of the pixels
+    assert b"\xaa" not in read["data"][header.SIGNATURE_SIZE:]
+    assert snapshot.buffer is data
+
+
+def test_codestream_of_buffer_is_probed_in_memory(monkeypatch):
+    probe_buffer = Mock(return_value=Mock(color_space="sRGB"))
+    monkeypatch.setattr(openjp2wrap, "probe_buffer", probe_buffer)
+    data = memoryview(b"image data")
+    snapshot = MetadataSnapshot(
+        filename="0000001.jp2",
+        metadata={},
+        pixel_width=1,
+        pixel_height=1,
+        buffer=data
+    )
+    assert snapshot.codestream.color_space == "sRGB"
+    probe_buffer.assert_called_once_with(data)
+
+
+def test_from_header_parses_sparse_copy(monkeypatch, tmp_path):
+    image_file = tmp_path / "image.jp2"
+    image_file.write_bytes(b"original")
+    region = Mock(size=1000, ranges=[(0, b"head"), (996, b"tail")],
+                  bytes_read=8)
+    region.prefix.return_value = b"head"
+    monkeypatch.setattr(header, "read_header", Mock(return_value=region))
+    read = {}
+
+    def parse(filename):
+        with open(filename, "rb") as file_handle:
+            read["data"] = file_handle.read()
+        return Mock(
+            metadata={}, pixelWidth=1, pixelHeight=1,
+            icc=Mock(return_value={})
+        )
+
+    monkeypatch.setattr(py3exiv2bind, "Image", parse)
+    snapshot = MetadataSnapshot.from_header(str(image_file))
+    assert len(read["data"]) == 1000
+    assert read["data"].startswith(b"head")
+    assert read["data"].endswith(b"tail")
+    assert snapshot.filename == str(image_file)
+    assert snapshot.buffer == b"head"
+    assert snapshot.bytes_read == 8
+
+
+def test_without_sparse_files_original_is_parsed(monkeypatch, tmp_path):
+    image_file = tmp_path / "image.jp2"
+    image_file.write_bytes(b"original")
+    region = Mock(size=1000, ranges=[(0, b"head"), (996, b"tail")],
+                  bytes_read=8)
+    region.prefix.return_value = b"head"
+    monkeypatch.setattr(header, "read_header", Mock(return_value=region))
+    monkeypatch.setattr(snapshot_module, "SPARSE_FILES", False)
+    image_class = Mock(return_value=Mock(
+        metadata={}, pixelWidth=1, pixelHeight=1, icc=Mock(return_value={})
+    ))
+    monkeypatch.setattr(py3exiv2bind, "Image", image_class)
+    snapshot = MetadataSnapshot.from_header(str(image_file))
+    image_class.assert_called_once_with(str(image_file))
+    assert snapshot.buffer == b"head"
+    assert snapshot.bytes_read is None
@@ -0,0 +1,115 @@
+import collections
+import random
+
+import pytest
+
+from uiucprescon import imagevalidate
+from uiucprescon.imagevalidate.report import Result, ResultCategory
+from uiucprescon.imagevalidate.summary import BoundedCounter, \
+    ValidationSummary
+
+
+def create_report(filename, *issues):
+    report = imagevalidate.Report()
+    report.filename = filename
+    for field, category, expected, actual in issues:
+        report.add_issue(field, category, Result(expected, actual))
+    return report
+
+
+def test_counts_issues():
+    summary = ValidationSummary()
+    reports = [
+        create_report("1.tif"),
+        create_report(
+            "2.tif",
+            ("Exif.Image.XResolution",
+             imagevalidate.IssueCategory.INVALID_DATA, "400/1", "300/1"),
+            ("Xmp.dc.creator",
+             imagevalidate.IssueCategory.MISSING_FIELD,
+             ResultCategory.ANY, None),
+        ),
+        create_report(
+            "3.tif",
+            ("Exif.Image.XResolution",
+             imagevalidate.IssueCategory.INVALID_DATA, "400/1", "300/1"),
+        ),
+    ]
+    assert list(summary.track(reports)) == reports
+    summary.add_error("4.tif")
+
+    totals = summary.summary()
+    assert totals["files"] == 4
+    assert totals["valid"] == 1
+    assert totals["invalid"] == 2
+    assert totals["errors"] == 1
+    assert totals["issues_by_category"] == {
+        "INVALID_DATA": 2,
+        "MISSING_FIELD": 1,
+    }
+    assert totals["issues_by_field"]["Exif.Image.XResolution"] == 2
+    assert totals["issues_by_value"][0] == {
+        "field": "Exif.Image.XResolution",
+        "expected": "400/1",
+        "actual": "300/1",
+        "count": 2,
+    }
+    assert "Files: 4" in str(summary)
+
+
+def test_keeps_slowest_files():
+    summary = ValidationSummary(slowest=2)
+    for i, seconds in enumerate([0.5, 3.0, 1.0, 2.0]):
+        summary.add(create_report(f"{i}.tif"), seconds)
+    assert summary.slowest_files() == [("1.tif", 3.0), ("3.tif", 2.0)]
+
+
+def test_track_uses_recorded_time(tmp_path):
+    class NamedReportProfile(imagevalidate.profiles.AbsProfile):
+        @staticmethod
+        def profile_name():
+            return "Named report"
+
+        def validate(self, file):
+            return create_report(file)
+
+    files = []
+    for i in range(3):
+        file = tmp_path / f"{i}.tif"
+        file.write_bytes(b"")
+        files.append(str(file))
+    profile = imagevalidate.Profile(NamedReportProfile())
+    summary = ValidationSummary(slowest=2)
+    reports = list(summary.track(profile.validate_many(files, workers=1)))
+    assert all(report.seconds is not None for report in reports)
+    assert len(summary.slowest_files()) == 2
+
+
+def test_bounded_counter_keeps_capacity():
+    counter = BoundedCounter(capacity=2)
+    for key in ["a", "a", "a", "b", "c", "d"]:
+        counter.add(key)
+    assert len(counter) == 2
+    assert counter.most_common(1) == [("a", 3)]
+    assert counter.error("a") == 0
+    assert counter.error("d") > 0
+
+
+def test_bounded_counter_bounds_hold_for_many_keys():
+    keys = random.Random(0).choices(range(5000), k=20000)
+    keys += [-1] * 2000
+    counter = BoundedCounter(capacity=50)
+    for key in keys:
+        counter.add(key)
+    actual = collections.Counter(keys)
+    assert len(counter) == 50
+    assert len(counter._heap) <= 2 * counter.capacity + 16
+    assert sum(count for _, count in counter.most_common()) == len(keys)
+    for key, count in counter.most_common():
+        assert actual[key] <= count <= actual[key] + counter.error(key)
+    assert counter.most_common(1)[0][0] == -1
+
+
+def test_bounded_counter_invalid_capacity():
+    with pytest.raises(ValueError):
+        BoundedCounter(capacity=0)